@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# SPDX-License-Identifier: ISC
+"""Compact, cached view of an arcilator state.json.
+
+The arcilator runner's generator steps (driver, runtime, trace filter) all
+need the model layout from state.json, which is several MB of JSON for
+rocket-sized designs. `load_models()` parses it once and pickles an indexed
+table next to the file (`state.json.desc`, following symlinks, so a cached
+DUT build keeps one descriptor for all tests that use it):
+
+    per model:  meta (every key but "states"), the state field names, one
+                row tuple per state, a type -> row ids index and the
+                name / leaf -> row ids indexes (as a nested pickle)
+
+Later loads unpickle the rows, only build state dicts for the rows that are
+actually looked at, and only unpack the name indexes on the first lookup.
+The descriptor is rebuilt whenever state.json's size or mtime changes.
+
+Run as a script to (re)build the descriptor ahead of time:
+
+    arcilator_state.py STATE_JSON
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+DESC_VERSION = 1
+DESC_SUFFIX = ".desc"
+
+
+class StateTable:
+    """One model of a state.json: meta keys plus row-backed states."""
+
+    __slots__ = (
+        "meta", "columns", "rows", "by_type", "_names", "_col", "_states")
+
+    def __init__(
+        self,
+        meta: dict[str, Any],
+        columns: tuple[str, ...],
+        rows: list[tuple],
+        by_type: dict[str, tuple[int, ...]],
+        names: Any,
+    ):
+        self.meta = meta
+        self.columns = columns
+        self.rows = rows
+        self.by_type = by_type
+        # (by_name, by_leaf), or their pickle until the first lookup.
+        self._names = names
+        self._col = {c: i for i, c in enumerate(columns)}
+        self._states: dict[int, dict] = {}
+
+    @classmethod
+    def from_model(cls, model: dict[str, Any]) -> "StateTable":
+        states = [
+            st for st in (model.get("states") or []) if isinstance(st, dict)
+        ]
+        columns: dict[str, None] = {}
+        for st in states:
+            for key in st:
+                columns.setdefault(key)
+        cols = tuple(columns)
+        rows = [tuple(st.get(c) for c in cols) for st in states]
+
+        by_name: dict[str, list[int]] = {}
+        by_leaf: dict[str, list[int]] = {}
+        by_type: dict[str, list[int]] = {}
+        for i, st in enumerate(states):
+            by_type.setdefault(str(st.get("type") or ""), []).append(i)
+            name = st.get("name") or ""
+            if not name:
+                continue
+            by_name.setdefault(name, []).append(i)
+            by_leaf.setdefault(name.split("/")[-1], []).append(i)
+
+        # "states" stays as a placeholder so to_model() keeps the key order.
+        meta = {k: (None if k == "states" else v) for k, v in model.items()}
+        return cls(
+            meta,
+            cols,
+            rows,
+            {k: tuple(v)
+             for k, v in by_type.items()},
+            (
+                {k: tuple(v)
+                 for k, v in by_name.items()
+                 }, {k: tuple(v)
+                     for k, v in by_leaf.items()}),
+        )
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def name(self) -> str:
+        return self.meta.get("name", "top")
+
+    def _name_indexes(
+            self
+    ) -> tuple[dict[str, tuple[int, ...]], dict[str, tuple[int, ...]]]:
+        if isinstance(self._names, bytes):
+            self._names = pickle.loads(self._names)
+        return self._names
+
+    @property
+    def by_name(self) -> dict[str, tuple[int, ...]]:
+        return self._name_indexes()[0]
+
+    @property
+    def by_leaf(self) -> dict[str, tuple[int, ...]]:
+        return self._name_indexes()[1]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Model-level key (`name`, `numStateBytes`, `sigInits`, ...)."""
+        return self.meta.get(key, default)
+
+    def field(self, i: int, key: str, default: Any = None) -> Any:
+        col = self._col.get(key)
+        if col is None:
+            return default
+        v = self.rows[i][col]
+        return default if v is None else v
+
+    def state(self, i: int) -> dict:
+        """State `i` as its state.json dict (built once, then shared)."""
+        st = self._states.get(i)
+        if st is None:
+            st = {
+                c: v
+                for c, v in zip(self.columns, self.rows[i])
+                if v is not None
+            }
+            self._states[i] = st
+        return st
+
+    @property
+    def states(self) -> list[dict]:
+        return [self.state(i) for i in range(len(self.rows))]
+
+    def of_type(self, *types: str) -> list[dict]:
+        """States of the given types, in state.json order."""
+        ids: Iterable[int] = self.by_type.get(
+            types[0], ()) if len(types) == 1 else sorted(
+                i for t in types for i in self.by_type.get(t, ()))
+        return [self.state(i) for i in ids]
+
+    def find(self, name: str, preferred_types: list[str]) -> Optional[dict]:
+        """State named `name` (full path first, then leaf name), preferring
+        earlier entries of `preferred_types`; ties go to state.json order."""
+        for index in (self.by_name, self.by_leaf):
+            best: Optional[int] = None
+            best_rank = len(preferred_types) + 1
+            for i in index.get(name, ()):
+                st_type = str(self.field(i, "type") or "")
+                rank = preferred_types.index(
+                    st_type) if st_type in preferred_types else len(
+                        preferred_types)
+                if rank < best_rank:
+                    best, best_rank = i, rank
+            if best is not None:
+                return self.state(best)
+        return None
+
+    def to_model(self, ids: Optional[Iterable[int]] = None) -> dict[str, Any]:
+        """JSON-shaped model, optionally restricted to the rows in `ids`."""
+        model = dict(self.meta)
+        model["states"] = [
+            self.state(i)
+            for i in (range(len(self.rows)) if ids is None else ids)
+        ]
+        return model
+
+    def _pack(self) -> tuple:
+        names = self._names
+        if not isinstance(names, bytes):
+            names = pickle.dumps(names, protocol=pickle.HIGHEST_PROTOCOL)
+        return (self.meta, self.columns, self.rows, self.by_type, names)
+
+
+def descriptor_path(state_json: Path) -> Path:
+    return Path(os.path.realpath(state_json) + DESC_SUFFIX)
+
+
+def _source_key(state_json: Path) -> tuple[int, int]:
+    st = os.stat(state_json)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def build_descriptor(state_json: Path) -> list[StateTable]:
+    """Parses state.json and (best effort) writes its descriptor."""
+    state_json = Path(state_json)
+    source = _source_key(state_json)
+    models = json.loads(state_json.read_text())
+    tables = [StateTable.from_model(m) for m in models if isinstance(m, dict)]
+    payload = {
+        "version": DESC_VERSION,
+        "source": source,
+        "models": [t._pack() for t in tables],
+    }
+    desc = descriptor_path(state_json)
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=desc.name + ".", dir=desc.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, desc)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        # Read-only cache dir: the tables are still good for this process.
+        pass
+    return tables
+
+
+def load_models(state_json: Path) -> list[StateTable]:
+    """All models of `state_json`, from its descriptor when that is current."""
+    state_json = Path(state_json)
+    desc = descriptor_path(state_json)
+    try:
+        with open(desc, "rb") as f:
+            payload = pickle.load(f)
+        if (payload.get("version") == DESC_VERSION
+                and tuple(payload.get("source",
+                                      ())) == _source_key(state_json)):
+            return [StateTable(*packed) for packed in payload["models"]]
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            KeyError, TypeError, ValueError):
+        pass
+    return build_descriptor(state_json)
+
+
+def select_model(tables: list[StateTable],
+                 top_name: str = "") -> Optional[StateTable]:
+    """The model named `top_name`, else the first one (None if empty)."""
+    if not tables:
+        return None
+    if top_name:
+        for t in tables:
+            if t.name == top_name:
+                return t
+    return tables[0]
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) != 1:
+        sys.stderr.write("usage: arcilator_state.py STATE_JSON\n")
+        return 2
+    tables = build_descriptor(Path(argv[0]))
+    for t in tables:
+        print(
+            f"[arcilator] state index: {t.name}: {len(t)} states -> {descriptor_path(Path(argv[0]))}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
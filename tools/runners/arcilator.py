@@ -73,6 +73,740 @@ def _sanitize_path_component(text: str) -> str:
     return text.strip("._-") or "unnamed"
 
 
+def _trace_scope_regex(patterns: list[str]) -> str:
+    # Trace scope patterns select signals by dotted hierarchical name
+    # (`top.u_core.pc`). `re:<regex>` is used verbatim; anything else is a glob
+    # where `*` stays within one hierarchy level and `**` crosses levels.
+    alts = []
+    for pat in patterns:
+        if pat.startswith("re:"):
+            alts.append(f"(?:{pat[3:]})")
+            continue
+        out = []
+        i = 0
+        pat = pat.replace("/", ".")
+        while i < len(pat):
+            if pat.startswith("**", i):
+                out.append(".*")
+                i += 2
+            elif pat[i] == "*":
+                out.append(r"[^.]*")
+                i += 1
+            elif pat[i] == "?":
+                out.append(r"[^.]")
+                i += 1
+            else:
+                out.append(re.escape(pat[i]))
+                i += 1
+        alts.append("(?:" + "".join(out) + ")")
+    return "|".join(alts)
+
+
+# Observation profiles: which values arcilator keeps materialized in model
+# state (and so visible in state.json, the VCD and uvm_hdl paths). Everything
+# not observed is free to be optimized away. A profile is `all` or a `+`-joined
+# list of the parts below, e.g. `ports` or `ports+regs`.
+_OBSERVE_PARTS = {
+    "ports": "--observe-ports",
+    "wires": "--observe-wires",
+    "regs": "--observe-registers",
+    "named": "--observe-named-values",
+}
+
+
+def _observe_flags(profile: str) -> tuple[str, list[str], list[str]]:
+    # Returns the normalized profile, its arcilator flags and the unknown
+    # parts (the flow script refuses to run with any). An empty profile
+    # means `all`.
+    tokens = [t for t in (profile or "").strip().lower().split("+") if t]
+    unknown = [t for t in tokens if t != "all" and t not in _OBSERVE_PARTS]
+    parts = [p for p in _OBSERVE_PARTS if p in tokens]
+    if "all" in tokens or not parts or len(parts) == len(_OBSERVE_PARTS):
+        return "all", list(_OBSERVE_PARTS.values()), unknown
+    return "+".join(parts), [_OBSERVE_PARTS[p] for p in parts], unknown
+
+
+# The generator heredocs import tools/arcilator_state.py (state.json is parsed
+# once into a cached descriptor shared by all of them).
+_TOOLS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+_PY_TOOLS_ENV = "PYTHONPATH=" + shlex.quote(_TOOLS_DIR) + "${PYTHONPATH:+:${PYTHONPATH}} "
+
+
+# `dut.view.*` members the autogenerated driver touches; they stay in a
+# trace-scoped header whatever the scope says (see _TRACE_FILTER_SRC).
+_DRIVER_VIEW_REFS = "clk internal.dut.clk"
+
+
+# Drops states outside the trace scope from a state.json copy so the header
+# generator only lays out (and the VCD writer only dumps) selected signals.
+# States the driver reaches through `view.<member>` are kept regardless, or
+# the driver would not compile against the scoped header.
+# argv: <state.json in> <state.json out> [driver sources...]; regex in
+# ARCILATOR_TRACE_SCOPE_RE, extra view members in ARCILATOR_TRACE_KEEP.
+_TRACE_FILTER_SRC = r"""import json
+import os
+import pathlib
+import re
+import sys
+
+from arcilator_state import load_models
+
+state_in, state_out = sys.argv[1:3]
+scope = re.compile(os.environ.get("ARCILATOR_TRACE_SCOPE_RE", ""))
+refs = set(os.environ.get("ARCILATOR_TRACE_KEEP", "").split())
+for src in sys.argv[3:]:
+  try:
+    text = pathlib.Path(src).read_text(errors="replace")
+  except OSError:
+    continue
+  refs.update(re.findall(r"\bview\.((?:[A-Za-z_]\w*\.)*[A-Za-z_]\w*)", text))
+refs.discard("state")
+
+def referenced(name, is_port):
+  dotted = name.replace("/", ".")
+  path = dotted if is_port else "internal." + dotted
+  for ref in refs:
+    if path == ref or path.startswith(ref + "."):
+      return True
+  return False
+
+models = []
+kept = 0
+forced = 0
+total = 0
+for table in load_models(pathlib.Path(state_in)):
+  prefix = table.name
+  sel = []
+  for i in range(len(table)):
+    name = str(table.field(i, "name") or "")
+    if not name:
+      continue
+    if scope.fullmatch(prefix + "." + name.replace("/", ".")):
+      sel.append(i)
+    elif refs and referenced(name, table.field(i, "type") in ("input", "output")):
+      sel.append(i)
+      forced += 1
+  total += len(table)
+  kept += len(sel)
+  models.append(table.to_model(sel))
+pathlib.Path(state_out).write_text(json.dumps(models))
+print(f"[arcilator] trace scope: {kept} of {total} states ({forced} kept for the driver)")
+"""
+
+
+# Trace-on-failure: decides from the untraced run's log whether the test
+# failed by the same rule as tools/runner (rc vs. should_fail, then the UVM M0
+# marker and the `:assert:` lines) and, if so, prints the
+# `<trace start> <trace cycles>` window for the traced rerun, ending shortly
+# after the first UVM_ERROR/UVM_FATAL time or the step the run stopped at.
+# argv: <run log> <run rc> <should fail 0/1> <expect M0 marker 0/1> <window>
+_TRACE_ON_FAIL_SRC = r"""import os
+import pathlib
+import re
+import sys
+
+from logparser import parseLog
+
+log_path, rc, should_fail, expect_m0, window = sys.argv[1:]
+log = pathlib.Path(log_path).read_text(errors="ignore")
+rc = int(rc)
+should_fail = should_fail == "1"
+passed = rc < 126 and should_fail == (rc != 0)
+if passed and rc == 0 and not should_fail and expect_m0 == "1":
+  passed = bool(re.search(r"(?m)^\s*(?:#\s*)?SVTESTS_UVM_M0_RAN\s*$", log))
+if passed:
+  passed = parseLog(log)
+if passed:
+  sys.exit(0)
+
+cycles = int(os.environ.get("ARCILATOR_CYCLES", "128"), 0)
+vcd_dt = max(int(os.environ.get("ARCILATOR_VCD_DT", "10"), 0), 1)
+# The UVM `@ <time>` is printed in the bench's time unit, which the log does
+# not state; it is taken to be the VCD time unit unless
+# ARCILATOR_TRACE_ON_FAIL_UVM_DT gives the UVM time per driver step.
+uvm_dt = max(int(os.environ.get("ARCILATOR_TRACE_ON_FAIL_UVM_DT", str(vcd_dt)), 0), 1)
+window = max(int(window, 0), 1)
+ends = [int(v) for v in re.findall(r"\[arcilator\] end step (\d+)", log)]
+end_step = max(ends) if ends else cycles
+step = end_step
+why = f"run stopped at step {step}"
+m = re.search(r"\bUVM_(?:ERROR|FATAL)\b[^\n@]*@\s*(\d+)", log)
+# A UVM time past the step the run stopped at means the units differ.
+if m and int(m.group(1)) // uvm_dt <= end_step:
+  step = int(m.group(1)) // uvm_dt
+  why = f"first UVM error at time {m.group(1)}"
+step = min(step, cycles)
+start = max(step - window, 0)
+tail = max(window // 10, 16)
+sys.stderr.write(f"[arcilator] trace-on-fail: {why}; tracing steps {start}..{step + tail}\n")
+print(start, step + tail - start)
+"""
+
+
+# Prints the region breakdown of an ARCILATOR_PROFILE driver run.
+# argv: <profile.json>
+_PROFILE_SUMMARY_SRC = r"""import json
+import pathlib
+import sys
+
+path = pathlib.Path(sys.argv[1])
+if not path.is_file():
+  print(f"[profile] no profile written ({path})")
+  sys.exit(0)
+prof = json.loads(path.read_text())
+wall = prof.get("wall_s", 0.0)
+steps = prof.get("steps", 0)
+deltas = prof.get("deltas", 0)
+print(f"[profile] wall {wall:.3f}s, {steps} steps, {deltas} deltas -> {path}")
+for name, r in sorted(prof.get("regions", {}).items(), key=lambda kv: -kv[1].get("seconds", 0.0)):
+  calls = r.get("calls", 0)
+  if not calls:
+    continue
+  sec = r.get("seconds", 0.0)
+  print(f"[profile]   {name:<16} {sec:9.4f}s {100.0 * r.get('share', 0.0):5.1f}%  {calls} calls, {1e9 * sec / calls:.1f} ns/call")
+"""
+
+
+# M3 scheduler runtime hooks (cycle-driven polling; best-effort). Shared by the
+# autogenerated driver and the linked-driver runtime TU, which both include it
+# from the tmp dir as `arcilator_sched.h`.
+_SCHED_RUNTIME_HEADER = "arcilator_sched.h"
+_SCHED_RUNTIME_SRC = r"""#pragma once
+
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <cstdio>
+#include <type_traits>
+#include <vector>
+
+struct ArcilatorDelayWait { bool active = false; uint64_t targetFs = 0; };
+struct ArcilatorChangeWait { bool active = false; uint64_t lastSig = 0; };
+
+// Per-process view of the signals a process wrote in the current delta cycle.
+// Processes typically touch a handful of signals, so keep a small
+// open-addressing table per process instead of a dense procs x signals array.
+// Slots are only valid while their stamp matches `gen`; bumping `gen` at commit
+// clears the overlay in O(1).
+struct ArcilatorSigOverlay {
+  std::vector<uint32_t> keys;
+  std::vector<uint64_t> values;
+  std::vector<uint32_t> stamps;
+  uint32_t count = 0;
+  uint32_t gen = 1;
+};
+
+// All scheduler state of one model instance. The extern "C" hooks operate on
+// the calling thread's current context (see arcilator_context_bind()), so K
+// instances can run on K threads in one process.
+struct ArcilatorSchedContext {
+  uint64_t now_fs = 0;
+  std::vector<uint32_t> proc_pc;
+  std::vector<std::vector<uint64_t>> proc_frame;
+  std::vector<ArcilatorDelayWait> delay_waits;
+  std::vector<ArcilatorChangeWait> change_waits;
+  std::vector<uint64_t> sig_cur;
+  std::vector<uint64_t> sig_next;
+  std::vector<uint8_t> sig_dirty_flag;
+  std::vector<uint32_t> sig_dirty;
+  std::vector<uint64_t> sig_nba_mask;
+  std::vector<uint64_t> sig_nba_value;
+  std::vector<uint8_t> sig_nba_dirty_flag;
+  std::vector<uint32_t> sig_nba_dirty;
+  std::vector<ArcilatorSigOverlay> sig_local;
+  std::vector<uint32_t> sig_local_active;
+
+  // Delta sensitivity tracking (opt-in via arcilator_sensitivity_enable()).
+  // Records which processes read each signal in the current delta (every
+  // eval() re-runs the parked processes' wait checks, so that is exactly what
+  // they are sensitive to now) and which processes are parked on a change
+  // wait, so a commit can tell whether any changed signal has someone that
+  // could react to it. Reads without a process (procId ~0) and change waits
+  // whose owning process is unknown are treated as always sensitive. The read
+  // sets are dropped at every commit.
+  bool track_sens = false;
+  uint32_t cur_proc = 0xFFFFFFFFu;
+  std::vector<uint8_t> sig_any_reader;
+  std::vector<uint32_t> sig_last_reader;
+  std::vector<std::vector<uint32_t>> sig_proc_readers;
+  std::vector<uint32_t> sig_read;  // signals with a reader this delta
+  std::vector<uint32_t> change_wait_owner;
+  std::vector<uint32_t> proc_change_waits;
+  uint32_t unowned_change_waits = 0;
+  bool commit_woke = false;
+};
+
+static ArcilatorSchedContext g_arcilator_default_ctx;
+static thread_local ArcilatorSchedContext* g_arcilator_ctx = &g_arcilator_default_ctx;
+// Seeds a fresh context (signal init values); set by the including TU.
+static void (*g_arcilator_ctx_init)() = nullptr;
+
+static inline ArcilatorSchedContext& arcilator_ctx() { return *g_arcilator_ctx; }
+
+static void ensure_proc_state(uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (ctx.proc_pc.size() <= procId) ctx.proc_pc.resize(procId + 1u, 0u);
+}
+
+static void ensure_proc_frame(uint32_t procId, uint32_t slot) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_proc_state(procId);
+  if (ctx.proc_frame.size() <= procId) ctx.proc_frame.resize(procId + 1u);
+  if (ctx.proc_frame[procId].size() <= slot)
+    ctx.proc_frame[procId].resize(static_cast<size_t>(slot) + 1u, 0ull);
+}
+
+static void ensure_wait_state(uint32_t waitId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (ctx.delay_waits.size() <= waitId) ctx.delay_waits.resize(waitId + 1u);
+  if (ctx.change_waits.size() <= waitId) {
+    ctx.change_waits.resize(waitId + 1u);
+    ctx.change_wait_owner.resize(waitId + 1u, 0xFFFFFFFFu);
+  }
+}
+
+static void ensure_sig_state(uint32_t sigId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (ctx.sig_cur.size() <= sigId) {
+    const size_t n = static_cast<size_t>(sigId) + 1u;
+    // Initialize signals to X (all-ones) so 4-state values start unknown.
+    // 2-state signals are expected to be driven to known values by the SV
+    // initialization code at time 0.
+    ctx.sig_cur.resize(n, ~0ull);
+    ctx.sig_next.resize(n, ~0ull);
+    ctx.sig_dirty_flag.resize(n, 0u);
+    ctx.sig_nba_mask.resize(n, 0ull);
+    ctx.sig_nba_value.resize(n, 0ull);
+    ctx.sig_nba_dirty_flag.resize(n, 0u);
+    ctx.sig_any_reader.resize(n, 0u);
+    ctx.sig_last_reader.resize(n, 0xFFFFFFFFu);
+    ctx.sig_proc_readers.resize(n);
+  }
+}
+
+static ArcilatorSigOverlay& ensure_sig_local(uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (ctx.sig_local.size() <= procId) ctx.sig_local.resize(static_cast<size_t>(procId) + 1u);
+  return ctx.sig_local[procId];
+}
+
+static inline size_t arcilator_overlay_slot(const ArcilatorSigOverlay& o, uint32_t sigId) {
+  const size_t mask = o.keys.size() - 1u;
+  size_t i = static_cast<size_t>(sigId * 0x9E3779B1u) & mask;
+  while (o.stamps[i] == o.gen && o.keys[i] != sigId) i = (i + 1u) & mask;
+  return i;
+}
+
+static bool arcilator_overlay_find(const ArcilatorSigOverlay& o, uint32_t sigId, uint64_t* out) {
+  if (o.count == 0) return false;
+  const size_t i = arcilator_overlay_slot(o, sigId);
+  if (o.stamps[i] != o.gen) return false;
+  *out = o.values[i];
+  return true;
+}
+
+static void arcilator_overlay_grow(ArcilatorSigOverlay& o) {
+  const size_t cap = o.keys.empty() ? 8u : o.keys.size() * 2u;
+  std::vector<uint32_t> keys(cap, 0u);
+  std::vector<uint64_t> values(cap, 0ull);
+  std::vector<uint32_t> stamps(cap, 0u);
+  for (size_t j = 0; j < o.keys.size(); ++j) {
+    if (o.stamps[j] != o.gen) continue;
+    size_t i = static_cast<size_t>(o.keys[j] * 0x9E3779B1u) & (cap - 1u);
+    while (stamps[i] == 1u) i = (i + 1u) & (cap - 1u);
+    keys[i] = o.keys[j];
+    values[i] = o.values[j];
+    stamps[i] = 1u;
+  }
+  o.keys.swap(keys);
+  o.values.swap(values);
+  o.stamps.swap(stamps);
+  o.gen = 1u;
+}
+
+static void arcilator_overlay_store(uint32_t procId, uint32_t sigId, uint64_t value) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ArcilatorSigOverlay& o = ensure_sig_local(procId);
+  if ((o.count + 1u) * 2u > o.keys.size()) arcilator_overlay_grow(o);
+  const size_t i = arcilator_overlay_slot(o, sigId);
+  if (o.stamps[i] != o.gen) {
+    if (o.count == 0) ctx.sig_local_active.push_back(procId);
+    o.stamps[i] = o.gen;
+    o.keys[i] = sigId;
+    ++o.count;
+  }
+  o.values[i] = value;
+}
+
+static void arcilator_overlay_clear_all() {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  for (uint32_t procId : ctx.sig_local_active) {
+    ArcilatorSigOverlay& o = ctx.sig_local[procId];
+    o.count = 0;
+    if (++o.gen == 0u) {
+      std::fill(o.stamps.begin(), o.stamps.end(), 0u);
+      o.gen = 1u;
+    }
+  }
+  ctx.sig_local_active.clear();
+}
+
+static void arcilator_sensitivity_enable(bool on) { arcilator_ctx().track_sens = on; }
+
+// Whether the last __arcilator_sig_commit() changed a signal that somebody is
+// sensitive to. Equivalent to its return value while tracking is disabled.
+static bool arcilator_commit_woke() { return arcilator_ctx().commit_woke; }
+
+static inline void arcilator_note_read(uint32_t sigId, uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (!ctx.track_sens) return;
+  auto &readers = ctx.sig_proc_readers[sigId];
+  if (procId == 0xFFFFFFFFu) {
+    if (ctx.sig_any_reader[sigId]) return;
+    if (readers.empty()) ctx.sig_read.push_back(sigId);
+    ctx.sig_any_reader[sigId] = 1u;
+    return;
+  }
+  ctx.cur_proc = procId;
+  if (ctx.sig_last_reader[sigId] == procId) return;
+  ctx.sig_last_reader[sigId] = procId;
+  if (readers.empty() && !ctx.sig_any_reader[sigId]) ctx.sig_read.push_back(sigId);
+  if (std::find(readers.begin(), readers.end(), procId) == readers.end()) readers.push_back(procId);
+}
+
+static void arcilator_sensitivity_clear_reads() {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  for (uint32_t sigId : ctx.sig_read) {
+    ctx.sig_any_reader[sigId] = 0u;
+    ctx.sig_last_reader[sigId] = 0xFFFFFFFFu;
+    ctx.sig_proc_readers[sigId].clear();
+  }
+  ctx.sig_read.clear();
+}
+
+static void arcilator_change_wait_armed(uint32_t waitId, bool armed) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  uint32_t &owner = ctx.change_wait_owner[waitId];
+  if (armed) owner = ctx.cur_proc;
+  const int32_t d = armed ? 1 : -1;
+  if (owner == 0xFFFFFFFFu) {
+    ctx.unowned_change_waits += d;
+    return;
+  }
+  if (ctx.proc_change_waits.size() <= owner) ctx.proc_change_waits.resize(owner + 1u, 0u);
+  ctx.proc_change_waits[owner] += d;
+}
+
+static bool arcilator_sig_has_waiters(uint32_t sigId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  if (ctx.unowned_change_waits || ctx.sig_any_reader[sigId]) return true;
+  for (uint32_t procId : ctx.sig_proc_readers[sigId]) {
+    if (procId < ctx.proc_change_waits.size() && ctx.proc_change_waits[procId]) return true;
+  }
+  return false;
+}
+
+// Earliest pending delay-wait wake-up time (fs), or ~0 if nothing is scheduled.
+static uint64_t arcilator_next_wake_fs() {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  uint64_t wake = ~0ull;
+  for (const auto &w : ctx.delay_waits) {
+    if (w.active && w.targetFs < wake) wake = w.targetFs;
+  }
+  return wake;
+}
+
+extern "C" uint64_t __arcilator_now_fs() { return arcilator_ctx().now_fs; }
+
+extern "C" uint32_t __arcilator_get_pc(uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_proc_state(procId);
+  ctx.cur_proc = procId;
+  return ctx.proc_pc[procId];
+}
+
+extern "C" void __arcilator_set_pc(uint32_t procId, uint32_t pc) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_proc_state(procId);
+  ctx.cur_proc = procId;
+  ctx.proc_pc[procId] = pc;
+}
+
+extern "C" uint64_t __arcilator_frame_load_u64(uint32_t procId, uint32_t slot) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_proc_frame(procId, slot);
+  return ctx.proc_frame[procId][slot];
+}
+
+extern "C" void __arcilator_frame_store_u64(uint32_t procId, uint32_t slot, uint64_t value) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_proc_frame(procId, slot);
+  ctx.proc_frame[procId][slot] = value;
+}
+
+extern "C" bool __arcilator_wait_delay(uint32_t waitId, uint64_t delayFs) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_wait_state(waitId);
+  auto &w = ctx.delay_waits[waitId];
+  if (!w.active) {
+    w.active = true;
+    uint64_t target = 0;
+    if (__builtin_add_overflow(ctx.now_fs, delayFs, &target)) target = ~0ull;
+    w.targetFs = target;
+    return false;
+  }
+  if (ctx.now_fs >= w.targetFs) {
+    w.active = false;
+    return true;
+  }
+  return false;
+}
+
+extern "C" bool __arcilator_wait_change(uint32_t waitId, uint64_t sig) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_wait_state(waitId);
+  auto &w = ctx.change_waits[waitId];
+  if (!w.active) {
+    w.active = true;
+    w.lastSig = sig;
+    arcilator_change_wait_armed(waitId, true);
+    return false;
+  }
+  if (sig != w.lastSig) {
+    w.active = false;
+    w.lastSig = sig;
+    arcilator_change_wait_armed(waitId, false);
+    return true;
+  }
+  return false;
+}
+
+extern "C" uint64_t __arcilator_sig_load_u64(uint32_t sigId, uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_sig_state(sigId);
+  arcilator_note_read(sigId, procId);
+  if (procId != 0xFFFFFFFFu && procId < ctx.sig_local.size()) {
+    uint64_t local = 0;
+    if (arcilator_overlay_find(ctx.sig_local[procId], sigId, &local)) return local;
+  }
+  // If the signal has been written in the current delta cycle, expose the
+  // pending value to later processes in the same timestep. This preserves
+  // SystemVerilog-style immediate visibility for blocking assignments and
+  // avoids clobbering independent bit-slice updates to packed runtime
+  // signals (e.g. interface field packs).
+  if (ctx.sig_dirty_flag[sigId]) return ctx.sig_next[sigId];
+  return ctx.sig_cur[sigId];
+}
+
+extern "C" uint64_t __arcilator_sig_load_nba_u64(uint32_t sigId, uint32_t /*procId*/) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_sig_state(sigId);
+  // NBAs should not be visible to regular reads within the same delta cycle,
+  // but masked/NBA stores need a stable base for bit-slice merging. Provide a
+  // view that includes any pending blocking updates (dirty) and any queued
+  // NBA masks for this signal.
+  uint64_t base = ctx.sig_cur[sigId];
+  if (ctx.sig_dirty_flag[sigId]) base = ctx.sig_next[sigId];
+  if (ctx.sig_nba_dirty_flag[sigId]) {
+    const uint64_t mask = ctx.sig_nba_mask[sigId];
+    base = (base & ~mask) | (ctx.sig_nba_value[sigId] & mask);
+  }
+  return base;
+}
+
+extern "C" uint64_t __arcilator_sig_read_u64(uint32_t sigId, uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_sig_state(sigId);
+  arcilator_note_read(sigId, procId);
+  return ctx.sig_cur[sigId];
+}
+
+extern "C" void __arcilator_sig_store_u64(uint32_t sigId, uint64_t value, uint32_t procId) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_sig_state(sigId);
+  ctx.sig_next[sigId] = value;
+  if (!ctx.sig_dirty_flag[sigId]) {
+    ctx.sig_dirty_flag[sigId] = 1u;
+    ctx.sig_dirty.push_back(sigId);
+  }
+  if (procId != 0xFFFFFFFFu) {
+    ctx.cur_proc = procId;
+    arcilator_overlay_store(procId, sigId, value);
+  }
+}
+
+extern "C" void __arcilator_sig_store_nba_masked_u64(uint32_t sigId, uint64_t mask, uint64_t value, uint32_t /*procId*/) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  ensure_sig_state(sigId);
+  if (mask == 0ull) return;
+  // Queue an end-of-delta update for the specified bit mask. This preserves
+  // SystemVerilog nonblocking assignment semantics for packed runtime signals,
+  // including independent bit-slice updates from multiple processes.
+  ctx.sig_nba_value[sigId] = (ctx.sig_nba_value[sigId] & ~mask) | (value & mask);
+  ctx.sig_nba_mask[sigId] |= mask;
+  if (!ctx.sig_nba_dirty_flag[sigId]) {
+    ctx.sig_nba_dirty_flag[sigId] = 1u;
+    ctx.sig_nba_dirty.push_back(sigId);
+  }
+}
+
+extern "C" void __arcilator_sig_store_nba_u64(uint32_t sigId, uint64_t value, uint32_t procId) {
+  __arcilator_sig_store_nba_masked_u64(sigId, ~0ull, value, procId);
+}
+
+extern "C" bool __arcilator_sig_commit() {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  bool changed = false;
+  bool woke = false;
+  for (uint32_t sigId : ctx.sig_dirty) {
+    const uint64_t next = ctx.sig_next[sigId];
+    if (ctx.sig_cur[sigId] != next) {
+      changed = true;
+      if (!woke) woke = !ctx.track_sens || arcilator_sig_has_waiters(sigId);
+    }
+    ctx.sig_cur[sigId] = next;
+    ctx.sig_dirty_flag[sigId] = 0u;
+  }
+  ctx.sig_dirty.clear();
+  for (uint32_t sigId : ctx.sig_nba_dirty) {
+    const uint64_t mask = ctx.sig_nba_mask[sigId];
+    if (mask != 0ull) {
+      const uint64_t before = ctx.sig_cur[sigId];
+      const uint64_t after = (before & ~mask) | (ctx.sig_nba_value[sigId] & mask);
+      if (before != after) {
+        changed = true;
+        if (!woke) woke = !ctx.track_sens || arcilator_sig_has_waiters(sigId);
+      }
+      ctx.sig_cur[sigId] = after;
+      ctx.sig_next[sigId] = after;
+    }
+    ctx.sig_nba_mask[sigId] = 0ull;
+    ctx.sig_nba_value[sigId] = 0ull;
+    ctx.sig_nba_dirty_flag[sigId] = 0u;
+  }
+  ctx.sig_nba_dirty.clear();
+  arcilator_overlay_clear_all();
+  arcilator_sensitivity_clear_reads();
+  ctx.cur_proc = 0xFFFFFFFFu;
+  ctx.commit_woke = woke;
+  return changed;
+}
+
+// Drop all scheduler state of the current context, e.g. between in-process
+// seed runs.
+static void arcilator_runtime_reset() { arcilator_ctx() = ArcilatorSchedContext(); }
+
+// Multi-instance API: each model instance gets its own context, bound to the
+// thread that evaluates it. Fresh contexts are seeded via g_arcilator_ctx_init.
+extern "C" void* arcilator_context_create() {
+  ArcilatorSchedContext* ctx = new ArcilatorSchedContext();
+  ArcilatorSchedContext* prev = g_arcilator_ctx;
+  g_arcilator_ctx = ctx;
+  if (g_arcilator_ctx_init) g_arcilator_ctx_init();
+  g_arcilator_ctx = prev;
+  return ctx;
+}
+
+extern "C" void arcilator_context_destroy(void* ctx) {
+  if (ctx == g_arcilator_ctx) g_arcilator_ctx = &g_arcilator_default_ctx;
+  if (ctx != &g_arcilator_default_ctx) delete static_cast<ArcilatorSchedContext*>(ctx);
+}
+
+// Binds `ctx` (nullptr: the process default) to the calling thread and
+// returns the previously bound context.
+extern "C" void* arcilator_context_bind(void* ctx) {
+  ArcilatorSchedContext* prev = g_arcilator_ctx;
+  g_arcilator_ctx = ctx ? static_cast<ArcilatorSchedContext*>(ctx) : &g_arcilator_default_ctx;
+  return prev;
+}
+
+// Checkpoint/restore of the scheduler runtime. Only valid between steps
+// (after a commit), when the proc-local overlays are empty.
+template <typename T>
+static void arcilator_ckpt_put(std::FILE* f, const std::vector<T>& v) {
+  static_assert(std::is_trivially_copyable<T>::value, "POD vectors only");
+  const uint64_t n = v.size();
+  std::fwrite(&n, sizeof(n), 1, f);
+  if (n) std::fwrite(v.data(), sizeof(T), v.size(), f);
+}
+
+template <typename T>
+static void arcilator_ckpt_put(std::FILE* f, const std::vector<std::vector<T>>& v) {
+  const uint64_t n = v.size();
+  std::fwrite(&n, sizeof(n), 1, f);
+  for (const auto &inner : v) arcilator_ckpt_put(f, inner);
+}
+
+template <typename T>
+static bool arcilator_ckpt_get(std::FILE* f, std::vector<T>& v) {
+  uint64_t n = 0;
+  if (std::fread(&n, sizeof(n), 1, f) != 1) return false;
+  v.resize(static_cast<size_t>(n));
+  return !n || std::fread(v.data(), sizeof(T), v.size(), f) == v.size();
+}
+
+template <typename T>
+static bool arcilator_ckpt_get(std::FILE* f, std::vector<std::vector<T>>& v) {
+  uint64_t n = 0;
+  if (std::fread(&n, sizeof(n), 1, f) != 1) return false;
+  v.resize(static_cast<size_t>(n));
+  for (auto &inner : v) {
+    if (!arcilator_ckpt_get(f, inner)) return false;
+  }
+  return true;
+}
+
+static void arcilator_checkpoint_write(std::FILE* f) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  std::fwrite(&ctx.now_fs, sizeof(ctx.now_fs), 1, f);
+  arcilator_ckpt_put(f, ctx.proc_pc);
+  arcilator_ckpt_put(f, ctx.proc_frame);
+  arcilator_ckpt_put(f, ctx.delay_waits);
+  arcilator_ckpt_put(f, ctx.change_waits);
+  arcilator_ckpt_put(f, ctx.sig_cur);
+  arcilator_ckpt_put(f, ctx.sig_next);
+  arcilator_ckpt_put(f, ctx.sig_dirty_flag);
+  arcilator_ckpt_put(f, ctx.sig_dirty);
+  arcilator_ckpt_put(f, ctx.sig_nba_mask);
+  arcilator_ckpt_put(f, ctx.sig_nba_value);
+  arcilator_ckpt_put(f, ctx.sig_nba_dirty_flag);
+  arcilator_ckpt_put(f, ctx.sig_nba_dirty);
+  arcilator_ckpt_put(f, ctx.sig_any_reader);
+  arcilator_ckpt_put(f, ctx.sig_last_reader);
+  arcilator_ckpt_put(f, ctx.sig_proc_readers);
+  arcilator_ckpt_put(f, ctx.change_wait_owner);
+  arcilator_ckpt_put(f, ctx.proc_change_waits);
+  std::fwrite(&ctx.unowned_change_waits, sizeof(ctx.unowned_change_waits), 1, f);
+}
+
+static bool arcilator_checkpoint_read(std::FILE* f) {
+  ArcilatorSchedContext& ctx = arcilator_ctx();
+  arcilator_overlay_clear_all();
+  ctx.cur_proc = 0xFFFFFFFFu;
+  ctx.commit_woke = false;
+  return std::fread(&ctx.now_fs, sizeof(ctx.now_fs), 1, f) == 1 &&
+         arcilator_ckpt_get(f, ctx.proc_pc) &&
+         arcilator_ckpt_get(f, ctx.proc_frame) &&
+         arcilator_ckpt_get(f, ctx.delay_waits) &&
+         arcilator_ckpt_get(f, ctx.change_waits) &&
+         arcilator_ckpt_get(f, ctx.sig_cur) &&
+         arcilator_ckpt_get(f, ctx.sig_next) &&
+         arcilator_ckpt_get(f, ctx.sig_dirty_flag) &&
+         arcilator_ckpt_get(f, ctx.sig_dirty) &&
+         arcilator_ckpt_get(f, ctx.sig_nba_mask) &&
+         arcilator_ckpt_get(f, ctx.sig_nba_value) &&
+         arcilator_ckpt_get(f, ctx.sig_nba_dirty_flag) &&
+         arcilator_ckpt_get(f, ctx.sig_nba_dirty) &&
+         arcilator_ckpt_get(f, ctx.sig_any_reader) &&
+         arcilator_ckpt_get(f, ctx.sig_last_reader) &&
+         arcilator_ckpt_get(f, ctx.sig_proc_readers) &&
+         arcilator_ckpt_get(f, ctx.change_wait_owner) &&
+         arcilator_ckpt_get(f, ctx.proc_change_waits) &&
+         std::fread(&ctx.unowned_change_waits, sizeof(ctx.unowned_change_waits), 1, f) == 1;
+}
+"""
+
+
 class arcilator(BaseRunner):
     """Run a full Arcilator simulation for sv-tests.
 
@@ -86,6 +820,11 @@ class arcilator(BaseRunner):
            - call eval() for N timesteps
       5) clang++ compiles and runs the driver
 
+    The driver/runtime generators and the trace-scope filter read state.json
+    through `tools/arcilator_state.py`, which parses it once into a pickled
+    descriptor (`state.json.desc`, next to the cached DUT build's state.json)
+    with name/leaf/type indexes; later steps and tests only unpickle it.
+
     UVM notes:
       - By default, UVM-tagged tests prefer `module top` when present.
         Set `ARCILATOR_UVM_TOP_MODE=dut` to fall back to running the first
@@ -96,6 +835,124 @@ class arcilator(BaseRunner):
       - Experimental: set `ARCILATOR_DRIVER_ASSERTS=1` to enable a few
         autogenerated driver-side `:assert:` checks for select tests.
 
+    Trace scope:
+      - `ARCILATOR_TRACE_SCOPE` / `:runner_arcilator_trace_filter:` limit the
+        VCD to a subset of signals. Patterns match dotted hierarchical names
+        (`top.u_core.pc`): globs where `*` stays within one level and `**`
+        crosses levels, or `re:<regex>`. E.g. `top.*` dumps top-level ports
+        and top-scope state only (like Questa's `vcd add -r -ports` at top).
+      - The header is generated from a filtered `state.trace.json`, so the
+        model view only exposes the selected signals. Works with the DUT
+        cache (only the header is regenerated).
+      - States the driver reaches through `view.<member>` are always kept
+        (and so also dumped): the autogenerated driver's members are listed in
+        `ARCILATOR_TRACE_KEEP`, a linked driver's sources are scanned for
+        them. gen-driver fails with a clear error if it uses a member that
+        the scope would drop.
+
+    Autogenerated driver runtime knobs (read by driver.bin at run time):
+      - `ARCILATOR_CYCLES`, `ARCILATOR_RESET_CYCLES`, `ARCILATOR_SEED`,
+        `ARCILATOR_VCD_DT`: run parameters. The runner exports its values
+        before running driver.bin; `+arcilator_cycles=`,
+        `+arcilator_reset_cycles=`, `+arcilator_seed=` and
+        `+arcilator_vcd_dt=` plusargs override them. Since none of them are
+        compiled in, driver.bin is cached under
+        `OUT_DIR/cache/arcilator_driver/<key>/` (key: generated driver,
+        model, headers, compile command, compiler binary and its
+        `--version`; override the root with
+        `ARCILATOR_DRIVER_CACHE_ROOT`, disable via `ARCILATOR_DRIVER_CACHE=0`).
+      - `ARCILATOR_EVENT_DRIVEN=1`: when the driver has no per-step input
+        drives/checks, skip idle steps and jump straight to the step where
+        the earliest pending delay wait fires. VCD timestamps are unchanged.
+      - `ARCILATOR_DELTA_SENSITIVITY=1`: stop a step's delta loop once the
+        committed changes have no readers in that delta that could react
+        (comb readers or processes parked on a change wait), instead of
+        re-running `eval()` until nothing changes.
+      - `ARCILATOR_DELTA_HIST=1|<path>`: write a per-step delta-count
+        histogram (`delta_hist.json` in the tmp dir by default); `capped`
+        counts the steps that ran out of deltas without settling.
+      - `ARCILATOR_VCD_BACKEND=ofstream|buffered|async` (default `buffered`):
+        `buffered` writes the VCD in large blocks via `write(2)`; `async`
+        additionally hands full blocks to a writer thread. `ofstream` is the
+        previous `std::ofstream` path. Block size: `ARCILATOR_VCD_BUFFER_KB`
+        (default 1024).
+      - `ARCILATOR_VCD_CHANGE_ONLY=0`: with the buffered backends, timesteps
+        whose model state is byte-identical to the last dumped one are skipped
+        (on by default). Value changes are identical; only empty `#t` markers
+        disappear.
+      - `ARCILATOR_CHECKPOINT_SAVE=<path>`: write a checkpoint (model state,
+        scheduler runtime, active `uvm_hdl` forces) at the start of step
+        `ARCILATOR_CHECKPOINT_AT` (required). `ARCILATOR_CHECKPOINT_EXIT=1`
+        stops the run right after saving.
+      - `ARCILATOR_CHECKPOINT_LOAD=<path>`: resume from a checkpoint instead
+        of time 0. The header carries a format version, an endianness marker
+        and a layout hash of the model's state.json entry and the generated
+        driver; a checkpoint from another build, host byte order or timebase
+        is rejected with the reason. The RNG is seeded from the current run,
+        so seed sweeps can share one warm checkpoint. State kept outside the
+        model/scheduler is not captured, so drivers refuse both for
+        `uvm`-tagged tests and for models whose LLVM IR declares heap-backed
+        runtime calls (class objects, queues, strings, mailboxes, randomize,
+        allocators).
+      - `+arcilator_seeds=1,2,3` / `ARCILATOR_SEEDS`: run one simulation per
+        seed (passed as `+ntb_random_seed`) from one driver.bin invocation,
+        writing `wave.seed<N>.vcd` per seed and a `wave.seeds.json` summary.
+        Each seed runs in a forked child (`ARCILATOR_SEED_FORK=N`: up to N at
+        a time, default 1), which isolates runtime heap state (UVM) and
+        `$finish`. `ARCILATOR_SEED_FORK=0` runs the seeds back to back in the
+        driver process after a scheduler reset instead; a `$finish` there
+        ends the batch, the unfinished seeds are reported and the run fails.
+        Non-UVM drivers also accept `ARCILATOR_SEED_THREADS=K`: K forked
+        children at a time, or with `ARCILATOR_SEED_THREADS_UNSAFE=1` K
+        threads of one process (one scheduler context per thread). Threads
+        share the CIRCT runtime's `$urandom` state and `$finish` exits all
+        of them, so they are unsafe for randomized benches.
+        With `ARCILATOR_CHECKPOINT_AT=<step>` the batch warms up once: a
+        forked child runs the shared prefix (with the base seed) up to that
+        step and checkpoints it, then every seed resumes from there with its
+        own seed. Per-seed VCDs start at that step. The checkpoint goes to
+        `ARCILATOR_CHECKPOINT_SAVE` if set (and is kept), else to a temporary
+        `wave.warm.ckpt`. Models that refuse checkpoints fail the batch.
+      - `ARCILATOR_STIMULUS=<path>` / `:runner_arcilator_stimulus:`: replay
+        recorded input port values (mmap'd, one memcpy per port per step)
+        instead of the clock/reset/data heuristics. Build the file from a
+        gold VCD with `tools/vcd_to_stimulus.py`; inputs hold their last
+        value once the stimulus runs out.
+      - `ARCILATOR_PROFILE=1`: build the driver with per-region call counts
+        and TSC timers (drive, eval, sig_commit, apply_forces, vcd,
+        uvm_hdl_lookup), written to `profile.json` next to the VCD
+        (`ARCILATOR_PROFILE_JSON` overrides) and summarized in the log after
+        the run. On Linux, `ARCILATOR_PERF_MAP=1` also writes
+        `/tmp/perf-<pid>.map` from the driver's own symbol table so `perf
+        report` still resolves model functions after the tmp dir is gone.
+
+    Trace on failure:
+      - `ARCILATOR_TRACE_ON_FAIL=1` / `:runner_arcilator_trace_on_fail: 1`
+        runs driver.bin with tracing off (`ARCILATOR_TRACE_CYCLES=0` writes
+        no VCD at all). Only if that run fails the test (by the runner's
+        rule: exit code vs. `should_fail`, a false `:assert:`, or a missing
+        UVM M0 marker) is the same driver.bin rerun with the VCD confined to
+        `ARCILATOR_TRACE_ON_FAIL_WINDOW` steps (default 2000) before the
+        first UVM_ERROR/UVM_FATAL time, or before the step the run stopped
+        at, plus a short tail. The UVM time is taken in VCD time units
+        (`ARCILATOR_TRACE_ON_FAIL_UVM_DT` sets the UVM time per step); one
+        past the end step falls back to the end step. The test log and exit
+        code come from the first run; the rerun's output goes to
+        `trace_rerun.log`.
+
+    Observation:
+      - `ARCILATOR_OBSERVE` / `:runner_arcilator_observe:` pick which values
+        arcilator keeps in model state: `all` (default; ports, wires,
+        registers and named values), `ports`, `ports+regs`, or any
+        `+`-joined set of `ports`/`wires`/`regs`/`named`; any other part
+        fails the run. Smaller profiles
+        let arcilator optimize unobserved values away (faster eval, smaller
+        state.json/VCD) for pass/fail and throughput runs; parity runs that
+        diff internal signals need `all`. Internal clock/reset taps of
+        port-less UVM tops and uvm_hdl paths only see observed values. The
+        profile is part of the DUT cache key, and the gen-driver stage logs
+        the resulting state size.
+
     Linked-driver mode (real DUT + custom testbench):
       - Add `:runner_arcilator_driver:` to a test to compile/link a user-provided
         C++ driver instead of the autogenerated one.
@@ -110,6 +967,11 @@ class arcilator(BaseRunner):
           - `runner_arcilator_driver_args` (supports `{VCD},{STATE},{IR},{LLVM},{TEST},{TMP}`)
           - `runner_arcilator_header_basename` (e.g. `rocket-arc.h`)
           - `runner_arcilator_header_gen_flags` (passed to arcilator-header-cpp.py)
+      - Scheduler state lives in a per-instance context resolved through a
+        thread-local pointer. To run several model instances on several
+        threads, give each thread its own `arcilator_context_create()` /
+        `arcilator_context_bind()` (and `arcilator_context_destroy()` when
+        done); the default context keeps single-instance drivers unchanged.
       - The runner exports `ARCILATOR_VCD_PATH`, `ARCILATOR_STATE_JSON`,
         `ARCILATOR_MODEL_HEADER`, `ARCILATOR_MODEL_OBJ`, `ARCILATOR_TEST_REL`,
         `ARCILATOR_DUT_CACHE_DIR` to the driver environment.
@@ -199,6 +1061,75 @@ class arcilator(BaseRunner):
     def _format_cmd(cmd):
         return " ".join(shlex.quote(arg) for arg in cmd)
 
+    @classmethod
+    def _write_trace_filter(
+        cls, script, state_path: str, trace_state_path: str, driver_sources: list[str]
+    ):
+        # A linked driver is scanned for the view members it uses; the
+        # autogenerated one lists them in ARCILATOR_TRACE_KEEP.
+        script.write('echo "[stage] trace-scope (state.json -> state.trace.json)"\n')
+        script.write(
+            _PY_TOOLS_ENV
+            + cls._format_cmd(["python3", "-", state_path, trace_state_path] + driver_sources)
+            + " <<'PY'\n"
+        )
+        script.write(_TRACE_FILTER_SRC)
+        script.write("PY\n")
+        script.write("trace_rc=$?\n")
+        script.write("if [[ ${trace_rc} -ne 0 ]]; then exit ${trace_rc}; fi\n")
+
+    @staticmethod
+    def _profile_json_path(vcd_path: str) -> str:
+        # Mirrors arcilator_prof_path() in the autogenerated driver.
+        env = os.environ.get("ARCILATOR_PROFILE_JSON", "")
+        if env:
+            return env
+        head, base = os.path.split(vcd_path)
+        if base == "wave.vcd":
+            return os.path.join(head, "profile.json")
+        return os.path.join(head, os.path.splitext(base)[0] + ".profile.json")
+
+    @classmethod
+    def _write_trace_on_fail_run(
+        cls, script, run_cmd: str, tmp_dir: str, should_fail: bool, expect_m0: bool, window: str
+    ):
+        # Two-phase run: no VCD at all first, then (only on failure) the same
+        # driver.bin again with tracing confined to a window before the
+        # failure. The test log and exit code are the first run's.
+        run_log = os.path.join(tmp_dir, "run.log")
+        rerun_log = os.path.join(tmp_dir, "trace_rerun.log")
+        script.write('echo "[stage] run (driver.bin) [trace off]"\n')
+        script.write(
+            "ARCILATOR_TRACE_CYCLES=0 ARCILATOR_REPORT_END_STEP=1 "
+            + run_cmd
+            + f" 2>&1 | tee {shlex.quote(run_log)}\n"
+        )
+        script.write("run_rc=${PIPESTATUS[0]}\n")
+        script.write(
+            "TRACE_WINDOW=$("
+            + _PY_TOOLS_ENV
+            + f'python3 - {shlex.quote(run_log)} "${{run_rc}}" {1 if should_fail else 0} {1 if expect_m0 else 0} {shlex.quote(window)}'
+            + " <<'PY'\n"
+        )
+        script.write(_TRACE_ON_FAIL_SRC)
+        script.write("PY\n)\n")
+        script.write('if [[ -n "${TRACE_WINDOW}" ]]; then\n')
+        script.write('  read -r TRACE_START TRACE_CYCLES <<< "${TRACE_WINDOW}"\n')
+        script.write('  echo "[stage] rerun (driver.bin) [trace steps ${TRACE_START}+${TRACE_CYCLES}]"\n')
+        script.write(
+            '  ARCILATOR_TRACE_START="${TRACE_START}" ARCILATOR_TRACE_CYCLES="${TRACE_CYCLES}" '
+            + run_cmd
+            + f" > {shlex.quote(rerun_log)} 2>&1\n"
+        )
+        script.write(f'  echo "[stage] rerun rc=$? (log: {rerun_log})"\n')
+        script.write("fi\n")
+
+    @classmethod
+    def _write_profile_summary(cls, script, profile_path: str):
+        script.write(cls._format_cmd(["python3", "-", profile_path]) + " <<'PY'\n")
+        script.write(_PROFILE_SUMMARY_SRC)
+        script.write("PY\n")
+
     @staticmethod
     def _module_defined(files, module_name: str) -> bool:
         # Best-effort scan; false negatives are ok (we fall back to other guesses).
@@ -403,18 +1334,20 @@ class arcilator(BaseRunner):
         if not _is_truthy_env("ARCILATOR_STRIP_VERIFICATION", default="1"):
             arc_flags.append("--strip-verification=false")
 
+        # Observation profile (`:runner_arcilator_observe:` over
+        # ARCILATOR_OBSERVE, default `all`).
+        observe, observe_flags, observe_unknown = _observe_flags(
+            (params.get("runner_arcilator_observe") or "").strip()
+            or os.environ.get("ARCILATOR_OBSERVE", "")
+        )
+
         # arcilator does the conversion and can optionally emit intermediate MLIR.
         arc_mlir_cmd = self._format_cmd(
             [self._arcilator, "--emit-mlir", ir_path] + arc_flags
         ) + f" > {shlex.quote(arc_mlir_path)}"
 
         # For simulation we also need a state file and LLVM output.
-        arc_emit_argv = [
-            self._arcilator,
-            "--observe-ports",
-            "--observe-wires",
-            "--observe-registers",
-            "--observe-named-values",
+        arc_emit_argv = [self._arcilator] + observe_flags + [
             "--state-file",
             state_path,
             "--emit-llvm",
@@ -424,12 +1357,21 @@ class arcilator(BaseRunner):
         ] + arc_flags
         arc_emit_cmd = self._format_cmd(arc_emit_argv)
 
-        # Driver controls (compile-time constants for simplicity).
+        # Driver run parameters (exported to driver.bin, which reads them at run time).
         cycles = os.environ.get("ARCILATOR_CYCLES", os.environ.get("CYCLES", "128"))
         reset_cycles = os.environ.get("ARCILATOR_RESET_CYCLES", "2")
         seed = os.environ.get("ARCILATOR_SEED", "1")
         vcd_dt = os.environ.get("ARCILATOR_VCD_DT", "10")
 
+        # Autogenerated driver.bin cache (content-keyed; see the compile step).
+        driver_cache_root = ""
+        if _is_truthy_env("ARCILATOR_DRIVER_CACHE", default="1"):
+            driver_cache_root = _abspath_or_empty(os.environ.get("ARCILATOR_DRIVER_CACHE_ROOT", ""))
+            if not driver_cache_root and os.environ.get("OUT_DIR", ""):
+                driver_cache_root = _abspath_or_empty(
+                    os.path.join(os.environ["OUT_DIR"], "cache", "arcilator_driver")
+                )
+
         # Optional artifact capture (MLIR, LLVM IR, driver, VCD).
         artifacts_mode = os.environ.get("ARCILATOR_ARTIFACTS", "0").strip().lower()
         save_artifacts = artifacts_mode not in ("", "0", "false", "no", "off")
@@ -475,6 +1417,38 @@ class arcilator(BaseRunner):
             params.get("runner_arcilator_header_gen_flags", "")
         )
 
+        # Optional: restrict the VCD to a subset of signals (globs or `re:`
+        # regexes over dotted hierarchical names, e.g. `top.*`).
+        trace_scope = _split_space_list(os.environ.get("ARCILATOR_TRACE_SCOPE", ""))
+        trace_scope += _split_space_list(
+            params.get("runner_arcilator_trace_filter", "")
+        )
+        trace_scope_re = _trace_scope_regex(trace_scope) if trace_scope else ""
+        trace_state_path = os.path.join(tmp_dir, "state.trace.json")
+        header_state_path = trace_state_path if trace_scope_re else state_path
+
+        # Optional: trace only on failure (untraced run, then a windowed
+        # rerun of the same driver.bin when the run fails).
+        raw_trace_on_fail = (params.get("runner_arcilator_trace_on_fail") or "").strip()
+        trace_on_fail = (
+            _is_truthy_str(raw_trace_on_fail)
+            if raw_trace_on_fail
+            else _is_truthy_env("ARCILATOR_TRACE_ON_FAIL", default="0")
+        )
+        trace_on_fail_window = os.environ.get("ARCILATOR_TRACE_ON_FAIL_WINDOW", "2000").strip() or "2000"
+        # tools/runner adds the M0 wrapper to real UVM testbenches; those runs
+        # also fail when its marker is missing.
+        expect_m0 = any(
+            os.path.basename(p) == "svtests_uvm_m0.sv" for p in params.get("files", [])
+        )
+
+        # Optional: replay recorded input stimulus instead of the generated
+        # drive (see tools/vcd_to_stimulus.py).
+        stimulus_path = _resolve_path(
+            (params.get("runner_arcilator_stimulus") or "").strip(),
+            tests_root or os.getcwd(),
+        )
+
         # Optional: compile/link controls for the generated simulation binary.
         base_cxxflags = _split_shlex_list(os.environ.get("ARCILATOR_CXXFLAGS", ""))
         model_cxxflags = base_cxxflags + _split_shlex_list(
@@ -573,6 +1547,7 @@ class arcilator(BaseRunner):
                 "incdirs": list(params.get("incdirs", [])),
                 "files": [_file_fingerprint(p) for p in params.get("files", [])],
                 "arc_flags": list(arc_flags),
+                "observe": observe,
                 "header_gen_flags": list(header_gen_flags),
                 "model_cxxflags": list(model_cxxflags),
                 "circt_verilog": _file_fingerprint(self._circt_verilog),
@@ -607,6 +1582,7 @@ class arcilator(BaseRunner):
         is_linux = sys.platform.startswith("linux")
         linux_atomic = ["-latomic"] if is_linux else []
         linux_no_pie = ["-no-pie"] if is_linux else []
+        linux_pthread = ["-pthread"] if is_linux else []
         cxx = os.environ.get("CXX", "clang++")
         use_llc = _is_executable(self._llc)
         model_obj_stage = "llc (model.o)" if use_llc else "clang++ (model.o)"
@@ -647,12 +1623,9 @@ class arcilator(BaseRunner):
             ) + f" > {shlex.quote(cache_arc_mlir)}"
 
             arc_emit_cmd_cache = self._format_cmd(
-                [
-                    self._arcilator,
-                    "--observe-ports",
-                    "--observe-wires",
-                    "--observe-registers",
-                    "--observe-named-values",
+                [self._arcilator]
+                + observe_flags
+                + [
                     "--state-file",
                     cache_state,
                     "--emit-llvm",
@@ -678,6 +1651,11 @@ class arcilator(BaseRunner):
                     + [cache_llvm, "-o", cache_obj]
                 )
 
+        sched_hdr = os.path.join(tmp_dir, _SCHED_RUNTIME_HEADER)
+        if mode in ("simulation", "simulation_without_run"):
+            with open(sched_hdr, "w", encoding="utf-8") as f:
+                f.write(_SCHED_RUNTIME_SRC)
+
         script_path = os.path.join(tmp_dir, "run_arcilator_flow.sh")
         with open(script_path, "w", encoding="utf-8") as script:
             script.write("#!/usr/bin/env bash\n")
@@ -695,13 +1673,19 @@ class arcilator(BaseRunner):
                     ir_path,
                     arc_mlir_path,
                     state_path,
+                    trace_state_path,
                     llvm_path,
                     header_path,
                     model_obj_path,
                     driver_cpp,
                     runtime_cpp,
+                    sched_hdr,
                     driver_bin,
                     vcd_path,
+                    os.path.join(tmp_dir, "delta_hist.json"),
+                    os.path.splitext(vcd_path)[0] + ".seeds.json",
+                    self._profile_json_path(vcd_path),
+                    os.path.join(tmp_dir, "trace_rerun.log"),
                 ):
                     script.write(
                         f'  if [[ -f {shlex.quote(path)} ]]; then cp -f {shlex.quote(path)} "${{ARTIFACT_DIR}}/"; fi\n'
@@ -712,7 +1696,8 @@ class arcilator(BaseRunner):
                 vcd_prefix = os.path.splitext(vcd_path)[0]
                 script.write(f"  VCD_PREFIX={shlex.quote(vcd_prefix)}\n")
                 script.write(
-                    '  for f in "${VCD_PREFIX}"*.vcd; do if [[ -f "$f" ]]; then cp -f "$f" "${ARTIFACT_DIR}/"; fi; done\n'
+                    '  for f in "${VCD_PREFIX}"*.vcd "${VCD_PREFIX}"*.profile.json; do'
+                    ' if [[ -f "$f" ]]; then cp -f "$f" "${ARTIFACT_DIR}/"; fi; done\n'
                 )
                 script.write("}\n")
                 script.write("trap save_artifacts EXIT\n")
@@ -723,8 +1708,18 @@ class arcilator(BaseRunner):
             script.write(f'export ARCILATOR_STATE_JSON={shlex.quote(state_path)}\n')
             script.write(f'export ARCILATOR_MODEL_HEADER={shlex.quote(header_path)}\n')
             script.write(f'export ARCILATOR_MODEL_OBJ={shlex.quote(model_obj_path)}\n')
+            script.write(f'export ARCILATOR_MODEL_LLVM={shlex.quote(llvm_path)}\n')
             script.write(f'export ARCILATOR_TEST_REL={shlex.quote(test_rel)}\n')
             script.write(f'export ARCILATOR_DUT_CACHE_DIR={shlex.quote(cache_dir)}\n')
+            if trace_scope_re:
+                script.write(f'export ARCILATOR_TRACE_SCOPE_RE={shlex.quote(trace_scope_re)}\n')
+                if not linked_mode:
+                    script.write(f'export ARCILATOR_TRACE_KEEP={shlex.quote(_DRIVER_VIEW_REFS)}\n')
+            if observe_unknown:
+                bad = shlex.quote(" ".join(observe_unknown))
+                script.write(
+                    f'echo "[error] unknown observe profile part(s): "{bad}" (expected all or a +-joined set of {"/".join(_OBSERVE_PARTS)})"; exit 2\n'
+                )
             if firrtl_mode:
                 script.write(
                     f'[[ -f {shlex.quote(firrtl_src)} ]] || {{ echo "[error] FIRRTL not found: {shlex.quote(firrtl_src)}"; exit 2; }}\n'
@@ -842,7 +1837,7 @@ class arcilator(BaseRunner):
                     script.write('  echo "[stage] arcilator emit-mlir rc=${arc_mlir_rc}"\n')
                     script.write("  if [[ ${arc_mlir_rc} -ne 0 ]]; then unlock_cache; exit ${arc_mlir_rc}; fi\n")
 
-                    script.write('  echo "[stage] arc lower-to-llvm (and write state.json) [cache]"\n')
+                    script.write(f'  echo "[stage] arc lower-to-llvm (and write state.json) [observe={observe}] [cache]"\n')
                     script.write("  " + arc_emit_cmd_cache + "\n")
                     script.write("  arc_emit_rc=$?\n")
                     script.write('  echo "[stage] arcilator emit-llvm rc=${arc_emit_rc}"\n')
@@ -854,6 +1849,15 @@ class arcilator(BaseRunner):
                     script.write('  echo "[stage] header-gen rc=${hdr_rc}"\n')
                     script.write("  if [[ ${hdr_rc} -ne 0 ]]; then unlock_cache; exit ${hdr_rc}; fi\n")
 
+                    script.write('  echo "[stage] state index (state.json -> state.json.desc) [cache]"\n')
+                    script.write(
+                        "  "
+                        + self._format_cmd(["python3", os.path.join(_TOOLS_DIR, "arcilator_state.py"), cache_state])
+                        + "\n"
+                    )
+                    script.write("  desc_rc=$?\n")
+                    script.write("  if [[ ${desc_rc} -ne 0 ]]; then unlock_cache; exit ${desc_rc}; fi\n")
+
                     script.write(f'  echo "[stage] {model_obj_stage} [cache]"\n')
                     script.write("  " + model_obj_cmd_cache + "\n")
                     script.write("  obj_rc=$?\n")
@@ -875,39 +1879,45 @@ class arcilator(BaseRunner):
                         ("${CACHE_HEADER}", header_path),
                         ("${CACHE_OBJ}", model_obj_path),
                     ):
+                        if trace_scope_re and dst == header_path:
+                            continue
                         script.write(f"ln -sf {src} {shlex.quote(dst)}\n")
+                    if trace_scope_re:
+                        # The header only describes the state layout, so a
+                        # scoped one can be regenerated without touching the
+                        # cached model object.
+                        self._write_trace_filter(script, state_path, trace_state_path, driver_sources)
+                        script.write(f'echo "[stage] header-gen (state.trace.json -> {shlex.quote(header_basename)})"\n')
+                        header_cmd = ["python3", self._header_gen] + header_gen_flags + [trace_state_path]
+                        script.write(self._format_cmd(header_cmd) + f" > {shlex.quote(header_path)}\n")
+                        script.write("hdr_rc=$?\n")
+                        script.write('echo "[stage] header-gen rc=${hdr_rc}"\n')
+                        script.write("if [[ ${hdr_rc} -ne 0 ]]; then exit ${hdr_rc}; fi\n")
 
                     if mode == "elaboration":
                         script.write("exit 0\n")
 
                     script.write('echo "[stage] gen-runtime (state.json -> arcilator_runtime.cpp)"\n')
                     script.write(
-                        "python3 - "
+                        _PY_TOOLS_ENV
+                        + "python3 - "
                         + shlex.quote(state_path)
                         + " "
                         + shlex.quote(runtime_cpp)
                         + " "
                         + shlex.quote(top or "")
                         + " <<'PY'\n"
-                        "import json\n"
                         "import pathlib\n"
                         "import sys\n"
                         "\n"
+                        "from arcilator_state import load_models, select_model\n"
+                        "\n"
                         "state_json, cpp_out, top_name = sys.argv[1:]\n"
-                        "models = json.loads(pathlib.Path(state_json).read_text())\n"
-                        "if not models:\n"
+                        "model = select_model(load_models(pathlib.Path(state_json)), top_name)\n"
+                        "if model is None:\n"
                         "  sys.stderr.write(f\"empty state.json: {state_json}\\n\")\n"
                         "  sys.exit(2)\n"
                         "\n"
-                        "model = None\n"
-                        "if top_name:\n"
-                        "  for m in models:\n"
-                        "    if m.get(\"name\") == top_name:\n"
-                        "      model = m\n"
-                        "      break\n"
-                        "if model is None:\n"
-                        "  model = models[0]\n"
-                        "\n"
                         "sig_inits_by_id = {}\n"
                         "for entry in (model.get(\"sigInits\") or []):\n"
                         "  if not isinstance(entry, dict):\n"
@@ -924,226 +1934,7 @@ class arcilator(BaseRunner):
                         "\n"
                         "lines = []\n"
                         "lines += [\n"
-                        "  \"#include <cstddef>\",\n"
-                        "  \"#include <cstdint>\",\n"
-                        "  \"#include <vector>\",\n"
-                        "  \"\",\n"
-                        "  \"static uint64_t g_arcilator_now_fs = 0;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_proc_pc;\",\n"
-                        "  \"static std::vector<std::vector<uint64_t>> g_arcilator_proc_frame;\",\n"
-                        "  \"struct ArcilatorDelayWait { bool active = false; uint64_t targetFs = 0; };\",\n"
-                        "  \"struct ArcilatorChangeWait { bool active = false; uint64_t lastSig = 0; };\",\n"
-                        "  \"static std::vector<ArcilatorDelayWait> g_arcilator_delay_waits;\",\n"
-                        "  \"static std::vector<ArcilatorChangeWait> g_arcilator_change_waits;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_cur;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_next;\",\n"
-                        "  \"static std::vector<uint8_t> g_arcilator_sig_dirty_flag;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_sig_dirty;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_nba_mask;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_nba_value;\",\n"
-                        "  \"static std::vector<uint8_t> g_arcilator_sig_nba_dirty_flag;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_sig_nba_dirty;\",\n"
-                        "  \"static std::vector<std::vector<uint64_t>> g_arcilator_sig_local;\",\n"
-                        "  \"static std::vector<std::vector<uint8_t>> g_arcilator_sig_local_valid;\",\n"
-                        "  \"static std::vector<std::vector<uint32_t>> g_arcilator_sig_local_dirty;\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_proc_state(uint32_t procId) {\",\n"
-                        "  \"  if (g_arcilator_proc_pc.size() <= procId) g_arcilator_proc_pc.resize(procId + 1u, 0u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_proc_frame(uint32_t procId, uint32_t slot) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  if (g_arcilator_proc_frame.size() <= procId) g_arcilator_proc_frame.resize(procId + 1u);\",\n"
-                        "  \"  if (g_arcilator_proc_frame[procId].size() <= slot)\",\n"
-                        "  \"    g_arcilator_proc_frame[procId].resize(static_cast<size_t>(slot) + 1u, 0ull);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_wait_state(uint32_t waitId) {\",\n"
-                        "  \"  if (g_arcilator_delay_waits.size() <= waitId) g_arcilator_delay_waits.resize(waitId + 1u);\",\n"
-                        "  \"  if (g_arcilator_change_waits.size() <= waitId) g_arcilator_change_waits.resize(waitId + 1u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_sig_state(uint32_t sigId) {\",\n"
-                        "  \"  if (g_arcilator_sig_cur.size() <= sigId) {\",\n"
-                        "  \"    const size_t n = static_cast<size_t>(sigId) + 1u;\",\n"
-                        "  \"    // Initialize signals to X (all-ones) so 4-state values start unknown.\",\n"
-                        "  \"    // 2-state signals are expected to be driven to known values by the SV\",\n"
-                        "  \"    // initialization code at time 0.\",\n"
-                        "  \"    g_arcilator_sig_cur.resize(n, ~0ull);\",\n"
-                        "  \"    g_arcilator_sig_next.resize(n, ~0ull);\",\n"
-                        "  \"    g_arcilator_sig_dirty_flag.resize(n, 0u);\",\n"
-                        "  \"    g_arcilator_sig_nba_mask.resize(n, 0ull);\",\n"
-                        "  \"    g_arcilator_sig_nba_value.resize(n, 0ull);\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty_flag.resize(n, 0u);\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_sig_local(uint32_t procId) {\",\n"
-                        "  \"  if (g_arcilator_sig_local.size() <= procId) {\",\n"
-                        "  \"    const size_t n = static_cast<size_t>(procId) + 1u;\",\n"
-                        "  \"    g_arcilator_sig_local.resize(n);\",\n"
-                        "  \"    g_arcilator_sig_local_valid.resize(n);\",\n"
-                        "  \"    g_arcilator_sig_local_dirty.resize(n);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  const size_t sigs = g_arcilator_sig_cur.size();\",\n"
-                        "  \"  if (g_arcilator_sig_local[procId].size() < sigs) g_arcilator_sig_local[procId].resize(sigs, 0ull);\",\n"
-                        "  \"  if (g_arcilator_sig_local_valid[procId].size() < sigs) g_arcilator_sig_local_valid[procId].resize(sigs, 0u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_now_fs() { return g_arcilator_now_fs; }\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint32_t __arcilator_get_pc(uint32_t procId) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  return g_arcilator_proc_pc[procId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_set_pc(uint32_t procId, uint32_t pc) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  g_arcilator_proc_pc[procId] = pc;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_frame_load_u64(uint32_t procId, uint32_t slot) {\",\n"
-                        "  \"  ensure_proc_frame(procId, slot);\",\n"
-                        "  \"  return g_arcilator_proc_frame[procId][slot];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_frame_store_u64(uint32_t procId, uint32_t slot, uint64_t value) {\",\n"
-                        "  \"  ensure_proc_frame(procId, slot);\",\n"
-                        "  \"  g_arcilator_proc_frame[procId][slot] = value;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_wait_delay(uint32_t waitId, uint64_t delayFs) {\",\n"
-                        "  \"  ensure_wait_state(waitId);\",\n"
-                        "  \"  auto &w = g_arcilator_delay_waits[waitId];\",\n"
-                        "  \"  if (!w.active) {\",\n"
-                        "  \"    w.active = true;\",\n"
-                        "  \"    uint64_t target = 0;\",\n"
-                        "  \"    if (__builtin_add_overflow(g_arcilator_now_fs, delayFs, &target)) target = ~0ull;\",\n"
-                        "  \"    w.targetFs = target;\",\n"
-                        "  \"    return false;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (g_arcilator_now_fs >= w.targetFs) {\",\n"
-                        "  \"    w.active = false;\",\n"
-                        "  \"    return true;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return false;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_wait_change(uint32_t waitId, uint64_t sig) {\",\n"
-                        "  \"  ensure_wait_state(waitId);\",\n"
-                        "  \"  auto &w = g_arcilator_change_waits[waitId];\",\n"
-                        "  \"  if (!w.active) {\",\n"
-                        "  \"    w.active = true;\",\n"
-                        "  \"    w.lastSig = sig;\",\n"
-                        "  \"    return false;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (sig != w.lastSig) {\",\n"
-                        "  \"    w.active = false;\",\n"
-                        "  \"    w.lastSig = sig;\",\n"
-                        "  \"    return true;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return false;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_load_u64(uint32_t sigId, uint32_t procId) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  if (procId != 0xFFFFFFFFu) {\",\n"
-                        "  \"    ensure_sig_local(procId);\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local_valid[procId].size() && g_arcilator_sig_local_valid[procId][sigId])\",\n"
-                        "  \"      return g_arcilator_sig_local[procId][sigId];\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])\",\n"
-                        "  \"    return g_arcilator_sig_next[sigId];\",\n"
-                        "  \"  return g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_load_nba_u64(uint32_t sigId, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  uint64_t base = g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])\",\n"
-                        "  \"    base = g_arcilator_sig_next[sigId];\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_nba_dirty_flag.size() && g_arcilator_sig_nba_dirty_flag[sigId]) {\",\n"
-                        "  \"    const uint64_t mask = g_arcilator_sig_nba_mask[sigId];\",\n"
-                        "  \"    base = (base & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return base;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_read_u64(uint32_t sigId, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  return g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_u64(uint32_t sigId, uint64_t value, uint32_t procId) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  g_arcilator_sig_next[sigId] = value;\",\n"
-                        "  \"  if (!g_arcilator_sig_dirty_flag[sigId]) {\",\n"
-                        "  \"    g_arcilator_sig_dirty_flag[sigId] = 1u;\",\n"
-                        "  \"    g_arcilator_sig_dirty.push_back(sigId);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (procId != 0xFFFFFFFFu) {\",\n"
-                        "  \"    ensure_sig_local(procId);\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local[procId].size()) g_arcilator_sig_local[procId][sigId] = value;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local_valid[procId].size()) {\",\n"
-                        "  \"      if (!g_arcilator_sig_local_valid[procId][sigId]) {\",\n"
-                        "  \"        g_arcilator_sig_local_valid[procId][sigId] = 1u;\",\n"
-                        "  \"        g_arcilator_sig_local_dirty[procId].push_back(sigId);\",\n"
-                        "  \"      }\",\n"
-                        "  \"    }\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_nba_masked_u64(uint32_t sigId, uint64_t mask, uint64_t value, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  if (mask == 0ull) return;\",\n"
-                        "  \"  g_arcilator_sig_nba_value[sigId] = (g_arcilator_sig_nba_value[sigId] & ~mask) | (value & mask);\",\n"
-                        "  \"  g_arcilator_sig_nba_mask[sigId] |= mask;\",\n"
-                        "  \"  if (!g_arcilator_sig_nba_dirty_flag[sigId]) {\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty_flag[sigId] = 1u;\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty.push_back(sigId);\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_nba_u64(uint32_t sigId, uint64_t value, uint32_t procId) {\",\n"
-                        "  \"  __arcilator_sig_store_nba_masked_u64(sigId, ~0ull, value, procId);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_sig_commit() {\",\n"
-                        "  \"  bool changed = false;\",\n"
-                        "  \"  for (uint32_t sigId : g_arcilator_sig_dirty) {\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_cur.size()) {\",\n"
-                        "  \"      const uint64_t next = g_arcilator_sig_next[sigId];\",\n"
-                        "  \"      if (g_arcilator_sig_cur[sigId] != next) changed = true;\",\n"
-                        "  \"      g_arcilator_sig_cur[sigId] = next;\",\n"
-                        "  \"    }\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_dirty_flag.size()) g_arcilator_sig_dirty_flag[sigId] = 0u;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  g_arcilator_sig_dirty.clear();\",\n"
-                        "  \"  for (uint32_t sigId : g_arcilator_sig_nba_dirty) {\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_cur.size()) {\",\n"
-                        "  \"      const uint64_t mask = (sigId < g_arcilator_sig_nba_mask.size()) ? g_arcilator_sig_nba_mask[sigId] : 0ull;\",\n"
-                        "  \"      if (mask != 0ull) {\",\n"
-                        "  \"        const uint64_t before = g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"        const uint64_t after = (before & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);\",\n"
-                        "  \"        if (before != after) changed = true;\",\n"
-                        "  \"        g_arcilator_sig_cur[sigId] = after;\",\n"
-                        "  \"        if (sigId < g_arcilator_sig_next.size()) g_arcilator_sig_next[sigId] = after;\",\n"
-                        "  \"      }\",\n"
-                        "  \"    }\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_mask.size()) g_arcilator_sig_nba_mask[sigId] = 0ull;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_value.size()) g_arcilator_sig_nba_value[sigId] = 0ull;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_dirty_flag.size()) g_arcilator_sig_nba_dirty_flag[sigId] = 0u;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  g_arcilator_sig_nba_dirty.clear();\",\n"
-                        "  \"  for (size_t p = 0; p < g_arcilator_sig_local_dirty.size(); ++p) {\",\n"
-                        "  \"    for (uint32_t sigId : g_arcilator_sig_local_dirty[p]) {\",\n"
-                        "  \"      if (p < g_arcilator_sig_local_valid.size() && sigId < g_arcilator_sig_local_valid[p].size())\",\n"
-                        "  \"        g_arcilator_sig_local_valid[p][sigId] = 0u;\",\n"
-                        "  \"    }\",\n"
-                        "  \"    g_arcilator_sig_local_dirty[p].clear();\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return changed;\",\n"
-                        "  \"}\",\n"
+                        "  \"#include \\\"" + _SCHED_RUNTIME_HEADER + "\\\"\",\n"
                         "  \"\",\n"
                         "  \"struct ArcilatorSigInit { uint32_t sigId; uint64_t value; };\",\n"
                         "  \"static const ArcilatorSigInit kArcilatorSigInits[] = {\",\n"
@@ -1156,14 +1947,20 @@ class arcilator(BaseRunner):
                         "  \"};\",\n"
                         "  \"\",\n"
                         "  \"static void arcilator_seed_sig_inits() {\",\n"
+                        "  \"  ArcilatorSchedContext& ctx = arcilator_ctx();\",\n"
                         "  \"  for (const auto &it : kArcilatorSigInits) {\",\n"
                         "  \"    ensure_sig_state(it.sigId);\",\n"
-                        "  \"    g_arcilator_sig_cur[it.sigId] = it.value;\",\n"
-                        "  \"    g_arcilator_sig_next[it.sigId] = it.value;\",\n"
+                        "  \"    ctx.sig_cur[it.sigId] = it.value;\",\n"
+                        "  \"    ctx.sig_next[it.sigId] = it.value;\",\n"
                         "  \"  }\",\n"
                         "  \"}\",\n"
                         "  \"\",\n"
-                        "  \"struct ArcilatorAutoInit { ArcilatorAutoInit() { arcilator_seed_sig_inits(); } };\",\n"
+                        "  \"struct ArcilatorAutoInit {\",\n"
+                        "  \"  ArcilatorAutoInit() {\",\n"
+                        "  \"    g_arcilator_ctx_init = arcilator_seed_sig_inits;\",\n"
+                        "  \"    arcilator_seed_sig_inits();\",\n"
+                        "  \"  }\",\n"
+                        "  \"};\",\n"
                         "  \"static ArcilatorAutoInit g_arcilator_auto_init;\",\n"
                         "]\n"
                         "\n"
@@ -1256,7 +2053,7 @@ class arcilator(BaseRunner):
                     script.write('echo "[stage] arcilator emit-mlir rc=${arc_mlir_rc}"\n')
                     script.write("if [[ ${arc_mlir_rc} -ne 0 ]]; then exit ${arc_mlir_rc}; fi\n")
 
-                    script.write('echo "[stage] arc lower-to-llvm (and write state.json)"\n')
+                    script.write(f'echo "[stage] arc lower-to-llvm (and write state.json) [observe={observe}]"\n')
                     script.write(arc_emit_cmd + "\n")
                     script.write("arc_emit_rc=$?\n")
                     script.write('echo "[stage] arcilator emit-llvm rc=${arc_emit_rc}"\n')
@@ -1265,8 +2062,10 @@ class arcilator(BaseRunner):
                     if mode == "elaboration":
                         script.write("exit 0\n")
 
+                    if trace_scope_re:
+                        self._write_trace_filter(script, state_path, trace_state_path, driver_sources)
                     script.write(f'echo "[stage] header-gen (state.json -> {shlex.quote(header_basename)})"\n')
-                    header_cmd = ["python3", self._header_gen] + header_gen_flags + [state_path]
+                    header_cmd = ["python3", self._header_gen] + header_gen_flags + [header_state_path]
                     script.write(self._format_cmd(header_cmd) + f" > {shlex.quote(header_path)}\n")
                     script.write("hdr_rc=$?\n")
                     script.write('echo "[stage] header-gen rc=${hdr_rc}"\n')
@@ -1302,32 +2101,25 @@ class arcilator(BaseRunner):
 
                     script.write('echo "[stage] gen-runtime (state.json -> arcilator_runtime.cpp)"\n')
                     script.write(
-                        "python3 - "
+                        _PY_TOOLS_ENV
+                        + "python3 - "
                         + shlex.quote(state_path)
                         + " "
                         + shlex.quote(runtime_cpp)
                         + " "
                         + shlex.quote(top or "")
                         + " <<'PY'\n"
-                        "import json\n"
                         "import pathlib\n"
                         "import sys\n"
                         "\n"
+                        "from arcilator_state import load_models, select_model\n"
+                        "\n"
                         "state_json, cpp_out, top_name = sys.argv[1:]\n"
-                        "models = json.loads(pathlib.Path(state_json).read_text())\n"
-                        "if not models:\n"
+                        "model = select_model(load_models(pathlib.Path(state_json)), top_name)\n"
+                        "if model is None:\n"
                         "  sys.stderr.write(f\"empty state.json: {state_json}\\n\")\n"
                         "  sys.exit(2)\n"
                         "\n"
-                        "model = None\n"
-                        "if top_name:\n"
-                        "  for m in models:\n"
-                        "    if m.get(\"name\") == top_name:\n"
-                        "      model = m\n"
-                        "      break\n"
-                        "if model is None:\n"
-                        "  model = models[0]\n"
-                        "\n"
                         "sig_inits_by_id = {}\n"
                         "for entry in (model.get(\"sigInits\") or []):\n"
                         "  if not isinstance(entry, dict):\n"
@@ -1344,226 +2136,7 @@ class arcilator(BaseRunner):
                         "\n"
                         "lines = []\n"
                         "lines += [\n"
-                        "  \"#include <cstddef>\",\n"
-                        "  \"#include <cstdint>\",\n"
-                        "  \"#include <vector>\",\n"
-                        "  \"\",\n"
-                        "  \"static uint64_t g_arcilator_now_fs = 0;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_proc_pc;\",\n"
-                        "  \"static std::vector<std::vector<uint64_t>> g_arcilator_proc_frame;\",\n"
-                        "  \"struct ArcilatorDelayWait { bool active = false; uint64_t targetFs = 0; };\",\n"
-                        "  \"struct ArcilatorChangeWait { bool active = false; uint64_t lastSig = 0; };\",\n"
-                        "  \"static std::vector<ArcilatorDelayWait> g_arcilator_delay_waits;\",\n"
-                        "  \"static std::vector<ArcilatorChangeWait> g_arcilator_change_waits;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_cur;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_next;\",\n"
-                        "  \"static std::vector<uint8_t> g_arcilator_sig_dirty_flag;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_sig_dirty;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_nba_mask;\",\n"
-                        "  \"static std::vector<uint64_t> g_arcilator_sig_nba_value;\",\n"
-                        "  \"static std::vector<uint8_t> g_arcilator_sig_nba_dirty_flag;\",\n"
-                        "  \"static std::vector<uint32_t> g_arcilator_sig_nba_dirty;\",\n"
-                        "  \"static std::vector<std::vector<uint64_t>> g_arcilator_sig_local;\",\n"
-                        "  \"static std::vector<std::vector<uint8_t>> g_arcilator_sig_local_valid;\",\n"
-                        "  \"static std::vector<std::vector<uint32_t>> g_arcilator_sig_local_dirty;\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_proc_state(uint32_t procId) {\",\n"
-                        "  \"  if (g_arcilator_proc_pc.size() <= procId) g_arcilator_proc_pc.resize(procId + 1u, 0u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_proc_frame(uint32_t procId, uint32_t slot) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  if (g_arcilator_proc_frame.size() <= procId) g_arcilator_proc_frame.resize(procId + 1u);\",\n"
-                        "  \"  if (g_arcilator_proc_frame[procId].size() <= slot)\",\n"
-                        "  \"    g_arcilator_proc_frame[procId].resize(static_cast<size_t>(slot) + 1u, 0ull);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_wait_state(uint32_t waitId) {\",\n"
-                        "  \"  if (g_arcilator_delay_waits.size() <= waitId) g_arcilator_delay_waits.resize(waitId + 1u);\",\n"
-                        "  \"  if (g_arcilator_change_waits.size() <= waitId) g_arcilator_change_waits.resize(waitId + 1u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_sig_state(uint32_t sigId) {\",\n"
-                        "  \"  if (g_arcilator_sig_cur.size() <= sigId) {\",\n"
-                        "  \"    const size_t n = static_cast<size_t>(sigId) + 1u;\",\n"
-                        "  \"    // Initialize signals to X (all-ones) so 4-state values start unknown.\",\n"
-                        "  \"    // 2-state signals are expected to be driven to known values by the SV\",\n"
-                        "  \"    // initialization code at time 0.\",\n"
-                        "  \"    g_arcilator_sig_cur.resize(n, ~0ull);\",\n"
-                        "  \"    g_arcilator_sig_next.resize(n, ~0ull);\",\n"
-                        "  \"    g_arcilator_sig_dirty_flag.resize(n, 0u);\",\n"
-                        "  \"    g_arcilator_sig_nba_mask.resize(n, 0ull);\",\n"
-                        "  \"    g_arcilator_sig_nba_value.resize(n, 0ull);\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty_flag.resize(n, 0u);\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"static void ensure_sig_local(uint32_t procId) {\",\n"
-                        "  \"  if (g_arcilator_sig_local.size() <= procId) {\",\n"
-                        "  \"    const size_t n = static_cast<size_t>(procId) + 1u;\",\n"
-                        "  \"    g_arcilator_sig_local.resize(n);\",\n"
-                        "  \"    g_arcilator_sig_local_valid.resize(n);\",\n"
-                        "  \"    g_arcilator_sig_local_dirty.resize(n);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  const size_t sigs = g_arcilator_sig_cur.size();\",\n"
-                        "  \"  if (g_arcilator_sig_local[procId].size() < sigs) g_arcilator_sig_local[procId].resize(sigs, 0ull);\",\n"
-                        "  \"  if (g_arcilator_sig_local_valid[procId].size() < sigs) g_arcilator_sig_local_valid[procId].resize(sigs, 0u);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_now_fs() { return g_arcilator_now_fs; }\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint32_t __arcilator_get_pc(uint32_t procId) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  return g_arcilator_proc_pc[procId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_set_pc(uint32_t procId, uint32_t pc) {\",\n"
-                        "  \"  ensure_proc_state(procId);\",\n"
-                        "  \"  g_arcilator_proc_pc[procId] = pc;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_frame_load_u64(uint32_t procId, uint32_t slot) {\",\n"
-                        "  \"  ensure_proc_frame(procId, slot);\",\n"
-                        "  \"  return g_arcilator_proc_frame[procId][slot];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_frame_store_u64(uint32_t procId, uint32_t slot, uint64_t value) {\",\n"
-                        "  \"  ensure_proc_frame(procId, slot);\",\n"
-                        "  \"  g_arcilator_proc_frame[procId][slot] = value;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_wait_delay(uint32_t waitId, uint64_t delayFs) {\",\n"
-                        "  \"  ensure_wait_state(waitId);\",\n"
-                        "  \"  auto &w = g_arcilator_delay_waits[waitId];\",\n"
-                        "  \"  if (!w.active) {\",\n"
-                        "  \"    w.active = true;\",\n"
-                        "  \"    uint64_t target = 0;\",\n"
-                        "  \"    if (__builtin_add_overflow(g_arcilator_now_fs, delayFs, &target)) target = ~0ull;\",\n"
-                        "  \"    w.targetFs = target;\",\n"
-                        "  \"    return false;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (g_arcilator_now_fs >= w.targetFs) {\",\n"
-                        "  \"    w.active = false;\",\n"
-                        "  \"    return true;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return false;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_wait_change(uint32_t waitId, uint64_t sig) {\",\n"
-                        "  \"  ensure_wait_state(waitId);\",\n"
-                        "  \"  auto &w = g_arcilator_change_waits[waitId];\",\n"
-                        "  \"  if (!w.active) {\",\n"
-                        "  \"    w.active = true;\",\n"
-                        "  \"    w.lastSig = sig;\",\n"
-                        "  \"    return false;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (sig != w.lastSig) {\",\n"
-                        "  \"    w.active = false;\",\n"
-                        "  \"    w.lastSig = sig;\",\n"
-                        "  \"    return true;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return false;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_load_u64(uint32_t sigId, uint32_t procId) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  if (procId != 0xFFFFFFFFu) {\",\n"
-                        "  \"    ensure_sig_local(procId);\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local_valid[procId].size() && g_arcilator_sig_local_valid[procId][sigId])\",\n"
-                        "  \"      return g_arcilator_sig_local[procId][sigId];\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])\",\n"
-                        "  \"    return g_arcilator_sig_next[sigId];\",\n"
-                        "  \"  return g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_load_nba_u64(uint32_t sigId, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  uint64_t base = g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])\",\n"
-                        "  \"    base = g_arcilator_sig_next[sigId];\",\n"
-                        "  \"  if (sigId < g_arcilator_sig_nba_dirty_flag.size() && g_arcilator_sig_nba_dirty_flag[sigId]) {\",\n"
-                        "  \"    const uint64_t mask = g_arcilator_sig_nba_mask[sigId];\",\n"
-                        "  \"    base = (base & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return base;\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" uint64_t __arcilator_sig_read_u64(uint32_t sigId, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  return g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_u64(uint32_t sigId, uint64_t value, uint32_t procId) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  g_arcilator_sig_next[sigId] = value;\",\n"
-                        "  \"  if (!g_arcilator_sig_dirty_flag[sigId]) {\",\n"
-                        "  \"    g_arcilator_sig_dirty_flag[sigId] = 1u;\",\n"
-                        "  \"    g_arcilator_sig_dirty.push_back(sigId);\",\n"
-                        "  \"  }\",\n"
-                        "  \"  if (procId != 0xFFFFFFFFu) {\",\n"
-                        "  \"    ensure_sig_local(procId);\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local[procId].size()) g_arcilator_sig_local[procId][sigId] = value;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_local_valid[procId].size()) {\",\n"
-                        "  \"      if (!g_arcilator_sig_local_valid[procId][sigId]) {\",\n"
-                        "  \"        g_arcilator_sig_local_valid[procId][sigId] = 1u;\",\n"
-                        "  \"        g_arcilator_sig_local_dirty[procId].push_back(sigId);\",\n"
-                        "  \"      }\",\n"
-                        "  \"    }\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_nba_masked_u64(uint32_t sigId, uint64_t mask, uint64_t value, uint32_t /*procId*/) {\",\n"
-                        "  \"  ensure_sig_state(sigId);\",\n"
-                        "  \"  if (mask == 0ull) return;\",\n"
-                        "  \"  g_arcilator_sig_nba_value[sigId] = (g_arcilator_sig_nba_value[sigId] & ~mask) | (value & mask);\",\n"
-                        "  \"  g_arcilator_sig_nba_mask[sigId] |= mask;\",\n"
-                        "  \"  if (!g_arcilator_sig_nba_dirty_flag[sigId]) {\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty_flag[sigId] = 1u;\",\n"
-                        "  \"    g_arcilator_sig_nba_dirty.push_back(sigId);\",\n"
-                        "  \"  }\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" void __arcilator_sig_store_nba_u64(uint32_t sigId, uint64_t value, uint32_t procId) {\",\n"
-                        "  \"  __arcilator_sig_store_nba_masked_u64(sigId, ~0ull, value, procId);\",\n"
-                        "  \"}\",\n"
-                        "  \"\",\n"
-                        "  \"extern \\\"C\\\" bool __arcilator_sig_commit() {\",\n"
-                        "  \"  bool changed = false;\",\n"
-                        "  \"  for (uint32_t sigId : g_arcilator_sig_dirty) {\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_cur.size()) {\",\n"
-                        "  \"      const uint64_t next = g_arcilator_sig_next[sigId];\",\n"
-                        "  \"      if (g_arcilator_sig_cur[sigId] != next) changed = true;\",\n"
-                        "  \"      g_arcilator_sig_cur[sigId] = next;\",\n"
-                        "  \"    }\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_dirty_flag.size()) g_arcilator_sig_dirty_flag[sigId] = 0u;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  g_arcilator_sig_dirty.clear();\",\n"
-                        "  \"  for (uint32_t sigId : g_arcilator_sig_nba_dirty) {\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_cur.size()) {\",\n"
-                        "  \"      const uint64_t mask = (sigId < g_arcilator_sig_nba_mask.size()) ? g_arcilator_sig_nba_mask[sigId] : 0ull;\",\n"
-                        "  \"      if (mask != 0ull) {\",\n"
-                        "  \"        const uint64_t before = g_arcilator_sig_cur[sigId];\",\n"
-                        "  \"        const uint64_t after = (before & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);\",\n"
-                        "  \"        if (before != after) changed = true;\",\n"
-                        "  \"        g_arcilator_sig_cur[sigId] = after;\",\n"
-                        "  \"        if (sigId < g_arcilator_sig_next.size()) g_arcilator_sig_next[sigId] = after;\",\n"
-                        "  \"      }\",\n"
-                        "  \"    }\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_mask.size()) g_arcilator_sig_nba_mask[sigId] = 0ull;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_value.size()) g_arcilator_sig_nba_value[sigId] = 0ull;\",\n"
-                        "  \"    if (sigId < g_arcilator_sig_nba_dirty_flag.size()) g_arcilator_sig_nba_dirty_flag[sigId] = 0u;\",\n"
-                        "  \"  }\",\n"
-                        "  \"  g_arcilator_sig_nba_dirty.clear();\",\n"
-                        "  \"  for (size_t p = 0; p < g_arcilator_sig_local_dirty.size(); ++p) {\",\n"
-                        "  \"    for (uint32_t sigId : g_arcilator_sig_local_dirty[p]) {\",\n"
-                        "  \"      if (p < g_arcilator_sig_local_valid.size() && sigId < g_arcilator_sig_local_valid[p].size())\",\n"
-                        "  \"        g_arcilator_sig_local_valid[p][sigId] = 0u;\",\n"
-                        "  \"    }\",\n"
-                        "  \"    g_arcilator_sig_local_dirty[p].clear();\",\n"
-                        "  \"  }\",\n"
-                        "  \"  return changed;\",\n"
-                        "  \"}\",\n"
+                        "  \"#include \\\"" + _SCHED_RUNTIME_HEADER + "\\\"\",\n"
                         "  \"\",\n"
                         "  \"struct ArcilatorSigInit { uint32_t sigId; uint64_t value; };\",\n"
                         "  \"static const ArcilatorSigInit kArcilatorSigInits[] = {\",\n"
@@ -1576,14 +2149,20 @@ class arcilator(BaseRunner):
                         "  \"};\",\n"
                         "  \"\",\n"
                         "  \"static void arcilator_seed_sig_inits() {\",\n"
+                        "  \"  ArcilatorSchedContext& ctx = arcilator_ctx();\",\n"
                         "  \"  for (const auto &it : kArcilatorSigInits) {\",\n"
                         "  \"    ensure_sig_state(it.sigId);\",\n"
-                        "  \"    g_arcilator_sig_cur[it.sigId] = it.value;\",\n"
-                        "  \"    g_arcilator_sig_next[it.sigId] = it.value;\",\n"
+                        "  \"    ctx.sig_cur[it.sigId] = it.value;\",\n"
+                        "  \"    ctx.sig_next[it.sigId] = it.value;\",\n"
                         "  \"  }\",\n"
                         "  \"}\",\n"
                         "  \"\",\n"
-                        "  \"struct ArcilatorAutoInit { ArcilatorAutoInit() { arcilator_seed_sig_inits(); } };\",\n"
+                        "  \"struct ArcilatorAutoInit {\",\n"
+                        "  \"  ArcilatorAutoInit() {\",\n"
+                        "  \"    g_arcilator_ctx_init = arcilator_seed_sig_inits;\",\n"
+                        "  \"    arcilator_seed_sig_inits();\",\n"
+                        "  \"  }\",\n"
+                        "  \"};\",\n"
                         "  \"static ArcilatorAutoInit g_arcilator_auto_init;\",\n"
                         "]\n"
                         "\n"
@@ -1674,7 +2253,7 @@ class arcilator(BaseRunner):
                 script.write('echo "[stage] arcilator emit-mlir rc=${arc_mlir_rc}"\n')
                 script.write("if [[ ${arc_mlir_rc} -ne 0 ]]; then exit ${arc_mlir_rc}; fi\n")
 
-                script.write('echo "[stage] arc lower-to-llvm (and write state.json)"\n')
+                script.write(f'echo "[stage] arc lower-to-llvm (and write state.json) [observe={observe}]"\n')
                 script.write(arc_emit_cmd + "\n")
                 script.write("arc_emit_rc=$?\n")
                 script.write('echo "[stage] arcilator emit-llvm rc=${arc_emit_rc}"\n')
@@ -1684,11 +2263,13 @@ class arcilator(BaseRunner):
                     script.write("exit 0\n")
                 else:
                     # Generate model header.
+                    if trace_scope_re:
+                        self._write_trace_filter(script, state_path, trace_state_path, driver_sources)
                     script.write(
                         f'echo "[stage] header-gen (state.json -> {shlex.quote(header_basename)})"\n'
                     )
                     header_cmd = ["python3", self._header_gen] + header_gen_flags + [
-                        state_path
+                        header_state_path
                     ]
                     script.write(
                         self._format_cmd(header_cmd)
@@ -1703,19 +2284,19 @@ class arcilator(BaseRunner):
                     # Generate the C++ driver from state.json, preferring the selected top model.
                     script.write('echo "[stage] gen-driver (state.json -> driver.cpp)"\n')
                     script.write(
-                        f'python3 - {shlex.quote(state_path)} {shlex.quote(driver_cpp)} {shlex.quote(top or "")} {shlex.quote(cycles)} {shlex.quote(reset_cycles)} {shlex.quote(seed)} {shlex.quote(vcd_dt)} {shlex.quote(test_rel)} {shlex.quote(tags)} <<\'PY\'\n'
+                        _PY_TOOLS_ENV
+                        + f'python3 - {shlex.quote(state_path)} {shlex.quote(driver_cpp)} {shlex.quote(top or "")} {shlex.quote(test_rel)} {shlex.quote(tags)} <<\'PY\'\n'
                     )
-                    script.write(r"""import json
+                    script.write(r"""import hashlib
+import json
 import os
 import pathlib
 import re
 import sys
 
-state_json, cpp_out, top_name, cycles_s, reset_cycles_s, seed_s, vcd_dt_s, test_path, tags_s = sys.argv[1:]
-cycles = int(cycles_s)
-reset_cycles = int(reset_cycles_s)
-seed = int(seed_s)
-vcd_dt = int(vcd_dt_s)
+from arcilator_state import load_models, select_model
+
+state_json, cpp_out, top_name, test_path, tags_s = sys.argv[1:]
 test_path = test_path or ""
 tags = set((tags_s or "").split())
 raw_checks = os.environ.get("ARCILATOR_DRIVER_ASSERTS", "").strip().lower()
@@ -1730,21 +2311,30 @@ if raw_uvm_hdl == "":
 else:
   enable_uvm_hdl = raw_uvm_hdl not in ("0", "false", "no", "off")
 
-models = json.loads(pathlib.Path(state_json).read_text())
-if not models:
+raw_profile = os.environ.get("ARCILATOR_PROFILE", "").strip().lower()
+enable_profile = raw_profile not in ("", "0", "false", "no", "off")
+prof_ids = iter(range(1 << 30))
+
+def prof(region: str, body: list[str]) -> list[str]:
+  # ARCILATOR_PROFILE builds: time `body` into profile region `region`.
+  if not enable_profile or not body:
+    return body
+  indent = body[0][: len(body[0]) - len(body[0].lstrip())]
+  var = f"prof_t{next(prof_ids)}"
+  return (
+    [f"{indent}const uint64_t {var} = arcilator_prof_now();"]
+    + body
+    + [f"{indent}arcilator_prof_add(kArcProf{region}, {var});"]
+  )
+
+model = select_model(load_models(pathlib.Path(state_json)), top_name)
+if model is None:
   sys.stderr.write("empty state.json\n")
   sys.exit(2)
 
-model = None
-if top_name:
-  for m in models:
-    if m.get("name") == top_name:
-      model = m
-      break
-if model is None:
-  model = models[0]
-
-model_name = model.get("name", "top")
+model_name = model.name
+state_bytes = int(model.get("numStateBytes", 0) or 0)
+print(f"[arcilator] model {model_name}: {len(model)} states, {state_bytes} state bytes")
 sig_inits_by_id: dict[int, int] = {}
 for entry in (model.get("sigInits") or []):
   if not isinstance(entry, dict):
@@ -1758,44 +2348,22 @@ for entry in (model.get("sigInits") or []):
     continue
   sig_inits_by_id[sig_id] = init_u64 & ((1 << 64) - 1)
 sig_init_items = sorted(sig_inits_by_id.items())
-states = model.get("states", [])
-inputs = [s for s in states if s.get("type") == "input"]
+# Only the rows that are looked at become dicts; `model.states` builds all.
+inputs = model.of_type("input")
 in_bits = {s.get("name"): int(s.get("numBits", 0)) for s in inputs if s.get("name")}
-ports = [s for s in states if s.get("name") and s.get("type") in ("input", "output")]
+ports = [s for s in model.of_type("input", "output") if s.get("name")]
 port_bits = {s.get("name"): int(s.get("numBits", 0)) for s in ports if s.get("name")}
 port_by_name = {s.get("name"): s for s in ports if s.get("name")}
-internal_states = [
-  s for s in states
-  if s.get("name") and s.get("type") not in ("input", "output", "memory")
-  and int(s.get("numBits", 0)) > 0
-]
 
-states_by_name: dict[str, list[dict]] = {}
-states_by_leaf: dict[str, list[dict]] = {}
-for st in states:
-  name = st.get("name") or ""
-  if not name:
-    continue
-  states_by_name.setdefault(name, []).append(st)
-  leaf = name.split("/")[-1]
-  states_by_leaf.setdefault(leaf, []).append(st)
-
-def _pick_state(candidates: list[dict], preferred_types: list[str]) -> dict | None:
-  best: dict | None = None
-  best_rank = 10**9
-  for st in candidates:
-    st_type = str(st.get("type") or "")
-    rank = preferred_types.index(st_type) if st_type in preferred_types else len(preferred_types)
-    if best is None or rank < best_rank:
-      best = st
-      best_rank = rank
-  return best
+def internal_states() -> list[dict]:
+  return [
+    s for s in model.states
+    if s.get("name") and s.get("type") not in ("input", "output", "memory")
+    and int(s.get("numBits", 0)) > 0
+  ]
 
 def find_state(name: str, preferred_types: list[str]) -> dict | None:
-  st = _pick_state(states_by_name.get(name, []), preferred_types)
-  if st is not None:
-    return st
-  return _pick_state(states_by_leaf.get(name, []), preferred_types)
+  return model.find(name, preferred_types)
 
 def byte_len(bits: int) -> int:
   return (bits + 7) // 8
@@ -1831,6 +2399,47 @@ def four_state_field_bytes(st: dict) -> int:
     return sb // 2
   return byte_len(int(st.get("numBits", 0)))
 
+# Byte spans of the traced states: the VCD change-only shadow only compares
+# these, so steps where just untraced state moved are not dumped.
+# States the driver references stay in a scoped header (and so in the VCD).
+trace_scope_re = os.environ.get("ARCILATOR_TRACE_SCOPE_RE", "")
+trace_keep = set(os.environ.get("ARCILATOR_TRACE_KEEP", "").split())
+
+def trace_kept(st: dict) -> bool:
+  dotted = str(st.get("name") or "").replace("/", ".")
+  path = dotted if st.get("type") in ("input", "output") else "internal." + dotted
+  return any(path == ref or path.startswith(ref + ".") for ref in trace_keep)
+
+trace_spans: list[tuple[int, int]] = []
+if trace_scope_re and state_bytes:
+  trace_scope = re.compile(trace_scope_re)
+  for st in model.states:
+    name = str(st.get("name") or "")
+    if not name:
+      continue
+    if not trace_scope.fullmatch(model_name + "." + name.replace("/", ".")) and not trace_kept(st):
+      continue
+    nbytes = int(st.get("storageBytes", 0) or 0)
+    if not nbytes:
+      if st.get("type") == "memory":
+        nbytes = int(st.get("stride", 0)) * int(st.get("depth", 0))
+      else:
+        nbytes = byte_len(int(st.get("numBits", 0))) * (2 if is_four_state(st) else 1)
+    off = int(st.get("offset", 0))
+    end = min(off + nbytes, state_bytes)
+    if end > off:
+      trace_spans.append((off, end))
+  trace_spans.sort()
+  merged: list[tuple[int, int]] = []
+  for off, end in trace_spans:
+    if merged and off <= merged[-1][1]:
+      merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+    else:
+      merged.append((off, end))
+  trace_spans = merged or [(0, 0)]
+elif state_bytes:
+  trace_spans = [(0, state_bytes)]
+
 def set_offset(offset: int, bits: int, val_expr: str, label: str = "") -> list[str]:
   nbytes = byte_len(bits)
   if nbytes == 0:
@@ -1917,6 +2526,30 @@ def should_hold_high(name: str) -> bool:
 def is_test(suffix: str) -> bool:
   return test_path.endswith(suffix)
 
+# Checkpoints only capture the state buffer and the scheduler runtime, so
+# refuse them for models that keep state on the runtime heap: UVM benches and
+# anything whose IR calls heap-backed runtime helpers or allocators.
+heap_call_re = re.compile(
+  r"(?:malloc|calloc|realloc|_Znwm|_Znam"
+  r"|\w*(?:class|object|queue|string|str_|mailbox|semaphore|randomize|dyn_?array|assoc)\w*)"
+)
+heap_calls: list[str] = []
+llvm_path = os.environ.get("ARCILATOR_MODEL_LLVM", "")
+if llvm_path and os.path.isfile(llvm_path):
+  with open(llvm_path, errors="replace") as f:
+    for line in f:
+      if not line.startswith("declare "):
+        continue
+      m = re.search(r"@\"?([\w.$]+)", line)
+      if m and heap_call_re.fullmatch(m.group(1)) and not m.group(1).startswith("llvm."):
+        heap_calls.append(m.group(1))
+if "uvm" in tags:
+  ckpt_refusal = "UVM class heap"
+elif heap_calls:
+  ckpt_refusal = "runtime heap calls " + ", ".join(sorted(set(heap_calls))[:4])
+else:
+  ckpt_refusal = ""
+
 raw_kind = os.environ.get("ARCILATOR_DRIVER_KIND", "").strip().lower()
 # Default to the plain driver so top-level SV testbenches execute end-to-end.
 # The old "auto" behavior injects per-test stimulus/checks and is only enabled
@@ -2021,6 +2654,13 @@ if kind == "uvm_hdl_selftest" and enable_uvm_hdl:
     "    if (!uvm_hdl_read(\"u.reg8_o\", value.data())) { std::cerr << \"uvm_hdl_read after part-select failed :assert: (False)\\n\"; return 1; }",
     "    if ((value[0].aval & 0xFFu) != 0xA7u) { std::cerr << \"uvm_hdl_deposit part-select mismatch :assert: (False)\\n\"; return 1; }",
     "",
+    "    // Handle access: one handle per bit range, whatever the path spelling.",
+    "    const int reg8_h = uvm_hdl_get_handle(\"u.reg8_o\");",
+    "    if (reg8_h < 0 || uvm_hdl_get_handle(\"/u/reg8_o\") != reg8_h) { std::cerr << \"uvm_hdl_get_handle failed :assert: (False)\\n\"; return 1; }",
+    "    clear();",
+    "    if (!uvm_hdl_read_handle(reg8_h, value.data())) { std::cerr << \"uvm_hdl_read_handle failed :assert: (False)\\n\"; return 1; }",
+    "    if ((value[0].aval & 0xFFu) != 0xA7u) { std::cerr << \"uvm_hdl_read_handle mismatch :assert: (False)\\n\"; return 1; }",
+    "",
     "    // Force/release should persist across eval() and restore on release.",
     "    clear();",
     "    if (!uvm_hdl_read(\"u.reg8_o\", value.data())) { std::cerr << \"uvm_hdl_read before force failed :assert: (False)\\n\"; return 1; }",
@@ -2382,7 +3022,7 @@ else:
   # concurrent assertions don't become vacuous.
   internal_drives: list[tuple[dict, str]] = []
   if not in_bits and ("uvm" in tags) and kind_is_auto:
-    for st in internal_states:
+    for st in internal_states():
       name = st.get("name") or ""
       leaf = name.split("/")[-1]
       bits = int(st.get("numBits", 0))
@@ -2425,15 +3065,43 @@ else:
       name = st.get("name") or "internal"
       drive_lines += [f"    // internal: {name}"] + set_state_dict(st, expr, label=name)
 
+def stim_drive(frame: str, guard: str) -> list[str]:
+  # Replay frame `frame` when a stimulus is loaded, else the generated drive.
+  replay = f"stim.apply({frame}, dut.view.state);"
+  if guard:
+    replay = f"if ({guard}) " + replay
+  if not drive_lines:
+    return [f"    if (stim.frames()) {{ {replay} }}"]
+  return (
+    ["    if (stim.frames()) {", "      " + replay, "    } else {"]
+    + ["  " + l for l in drive_lines]
+    + ["    }"]
+  )
+
+# Event-driven time skipping is only sound when nothing is driven or checked
+# per step: then a step can only do work if a delay wait is due.
+event_driven_ok = not (drive_lines or post_eval_lines or loop_checks)
+
 lines: list[str] = []
 lines += [
   "#include <array>",
+  "#include <atomic>",
   "#include <cstdlib>",
   "#include <cstdint>",
   "#include <cstring>",
   "#include <fstream>",
   "#include <iostream>",
+  "#include <condition_variable>",
+  "#include <memory>",
+  "#include <mutex>",
+  "#include <string>",
+  "#include <thread>",
   "#include <vector>",
+  "#include <fcntl.h>",
+  "#include <sys/mman.h>",
+  "#include <sys/stat.h>",
+  "#include <sys/wait.h>",
+  "#include <unistd.h>",
   "#include \"model.hpp\"",
 ]
 if enable_uvm_hdl:
@@ -2442,8 +3110,19 @@ if enable_uvm_hdl:
     "#include <cctype>",
     "#include <regex.h>",
     "#include <string>",
-    "#include <string_view>",
-    "#include <unordered_map>",
+  ]
+if enable_profile:
+  lines += [
+    "#include <chrono>",
+    "#include <cstdio>",
+    "#include <iterator>",
+    "#ifdef __linux__",
+    "#include <elf.h>",
+    "#include <link.h>",
+    "#endif",
+    "#if defined(__x86_64__) || defined(__i386__)",
+    "#include <x86intrin.h>",
+    "#endif",
   ]
 lines += [
   "",
@@ -2456,6 +3135,251 @@ lines += [
   "  return static_cast<uint64_t>(v);",
   "}",
   "",
+]
+if enable_profile:
+  lines += [
+    "// ARCILATOR_PROFILE build: call counts and TSC ticks per driver region,",
+    "// written to profile.json next to the VCD when the run ends.",
+    "static inline uint64_t arcilator_prof_now() {",
+    "#if defined(__x86_64__) || defined(__i386__)",
+    "  return __rdtsc();",
+    "#elif defined(__aarch64__)",
+    "  uint64_t v;",
+    "  asm volatile(\"mrs %0, cntvct_el0\" : \"=r\"(v));",
+    "  return v;",
+    "#else",
+    "  return static_cast<uint64_t>(std::chrono::steady_clock::now().time_since_epoch().count());",
+    "#endif",
+    "}",
+    "",
+    "enum ArcilatorProfRegion {",
+    "  kArcProfDrive,",
+    "  kArcProfEval,",
+    "  kArcProfCommit,",
+    "  kArcProfForces,",
+    "  kArcProfVcd,",
+    "  kArcProfHdl,",
+    "  kArcProfRegions",
+    "};",
+    "",
+    "static const char* const kArcProfNames[kArcProfRegions] = {",
+    "  \"drive\", \"eval\", \"sig_commit\", \"apply_forces\", \"vcd\", \"uvm_hdl_lookup\",",
+    "};",
+    "",
+    "struct ArcilatorProfile {",
+    "  std::string path;",
+    "  uint64_t calls[kArcProfRegions] = {};",
+    "  uint64_t ticks[kArcProfRegions] = {};",
+    "  uint64_t steps = 0;",
+    "  uint64_t deltas = 0;",
+    "  uint64_t tick0 = arcilator_prof_now();",
+    "  std::chrono::steady_clock::time_point wall0 = std::chrono::steady_clock::now();",
+    "};",
+    "",
+    "static thread_local ArcilatorProfile* g_arcilator_prof = nullptr;",
+    "",
+    "static inline void arcilator_prof_add(ArcilatorProfRegion region, uint64_t t0) {",
+    "  if (ArcilatorProfile* p = g_arcilator_prof) {",
+    "    ++p->calls[region];",
+    "    p->ticks[region] += arcilator_prof_now() - t0;",
+    "  }",
+    "}",
+    "",
+    "struct ArcilatorProfScope {",
+    "  explicit ArcilatorProfScope(ArcilatorProfRegion r) : region(r), t0(arcilator_prof_now()) {}",
+    "  ~ArcilatorProfScope() { arcilator_prof_add(region, t0); }",
+    "  ArcilatorProfRegion region;",
+    "  uint64_t t0;",
+    "};",
+    "",
+    "// `out/wave.vcd` -> `out/profile.json`; other VCD names (seed runs) get",
+    "// `<stem>.profile.json`. ARCILATOR_PROFILE_JSON overrides.",
+    "static std::string arcilator_prof_path(const std::string& vcd_path) {",
+    "  if (const char* env = std::getenv(\"ARCILATOR_PROFILE_JSON\")) {",
+    "    if (*env) return env;",
+    "  }",
+    "  const size_t slash = vcd_path.find_last_of('/');",
+    "  const std::string dir = (slash == std::string::npos) ? std::string() : vcd_path.substr(0, slash + 1);",
+    "  std::string base = vcd_path.substr(dir.size());",
+    "  if (base == \"wave.vcd\") return dir + \"profile.json\";",
+    "  const size_t dot = base.find_last_of('.');",
+    "  if (dot != std::string::npos) base.erase(dot);",
+    "  return dir + base + \".profile.json\";",
+    "}",
+    "",
+    "static void arcilator_prof_write(const ArcilatorProfile& p) {",
+    "  const double wall = std::chrono::duration<double>(std::chrono::steady_clock::now() - p.wall0).count();",
+    "  const uint64_t ticks = arcilator_prof_now() - p.tick0;",
+    "  const double tick_s = (ticks && wall > 0.0) ? wall / static_cast<double>(ticks) : 0.0;",
+    "  std::ofstream out(p.path);",
+    "  out << \"{\\\"wall_s\\\": \" << wall << \", \\\"tick_hz\\\": \" << (tick_s > 0.0 ? 1.0 / tick_s : 0.0)",
+    "      << \", \\\"steps\\\": \" << p.steps << \", \\\"deltas\\\": \" << p.deltas << \", \\\"regions\\\": {\";",
+    "  for (int r = 0; r < kArcProfRegions; ++r) {",
+    "    const double sec = static_cast<double>(p.ticks[r]) * tick_s;",
+    "    out << (r ? \", \" : \"\") << \"\\\"\" << kArcProfNames[r] << \"\\\": {\\\"calls\\\": \" << p.calls[r]",
+    "        << \", \\\"seconds\\\": \" << sec << \", \\\"share\\\": \" << (wall > 0.0 ? sec / wall : 0.0) << \"}\";",
+    "  }",
+    "  out << \"}}\\n\";",
+    "}",
+    "",
+    "// Runs from main() and atexit() ($finish may exit() from inside eval()).",
+    "static void arcilator_prof_finish() {",
+    "  if (ArcilatorProfile* p = g_arcilator_prof) {",
+    "    g_arcilator_prof = nullptr;",
+    "    arcilator_prof_write(*p);",
+    "  }",
+    "}",
+    "",
+    "#ifdef __linux__",
+    "// /tmp/perf-<pid>.map from our own ELF symbol table, so `perf report` can",
+    "// still symbolize model and driver code after the per-test tmp dir (and",
+    "// driver.bin with it) is gone. Opt-in: it reads the whole executable and",
+    "// the map outlives the run.",
+    "static int arcilator_perf_map_bias(struct dl_phdr_info* info, size_t, void* data) {",
+    "  *static_cast<uintptr_t*>(data) = info->dlpi_addr;",
+    "  return 1;",
+    "}",
+    "",
+    "static void arcilator_write_perf_map() {",
+    "  std::ifstream exe(\"/proc/self/exe\", std::ios::binary);",
+    "  const std::vector<char> img((std::istreambuf_iterator<char>(exe)), std::istreambuf_iterator<char>());",
+    "  if (img.size() < sizeof(Elf64_Ehdr) || std::memcmp(img.data(), ELFMAG, SELFMAG) != 0) return;",
+    "  const auto* eh = reinterpret_cast<const Elf64_Ehdr*>(img.data());",
+    "  if (eh->e_ident[EI_CLASS] != ELFCLASS64) return;",
+    "  if (eh->e_shoff + static_cast<uint64_t>(eh->e_shnum) * sizeof(Elf64_Shdr) > img.size()) return;",
+    "  const auto* sh = reinterpret_cast<const Elf64_Shdr*>(img.data() + eh->e_shoff);",
+    "  uintptr_t bias = 0;",
+    "  dl_iterate_phdr(arcilator_perf_map_bias, &bias);",
+    "  std::FILE* map = std::fopen((\"/tmp/perf-\" + std::to_string(::getpid()) + \".map\").c_str(), \"w\");",
+    "  if (!map) return;",
+    "  for (uint32_t i = 0; i < eh->e_shnum; ++i) {",
+    "    if (sh[i].sh_type != SHT_SYMTAB || sh[i].sh_link >= eh->e_shnum) continue;",
+    "    const Elf64_Shdr& strtab = sh[sh[i].sh_link];",
+    "    if (sh[i].sh_offset + sh[i].sh_size > img.size() || strtab.sh_offset + strtab.sh_size > img.size()) continue;",
+    "    const auto* syms = reinterpret_cast<const Elf64_Sym*>(img.data() + sh[i].sh_offset);",
+    "    const size_t nsyms = sh[i].sh_size / sizeof(Elf64_Sym);",
+    "    for (size_t k = 0; k < nsyms; ++k) {",
+    "      const Elf64_Sym& sym = syms[k];",
+    "      if (ELF64_ST_TYPE(sym.st_info) != STT_FUNC || !sym.st_value || !sym.st_size) continue;",
+    "      if (sym.st_name >= strtab.sh_size) continue;",
+    "      std::fprintf(map, \"%llx %llx %s\\n\", static_cast<unsigned long long>(bias + sym.st_value),",
+    "                   static_cast<unsigned long long>(sym.st_size), img.data() + strtab.sh_offset + sym.st_name);",
+    "    }",
+    "  }",
+    "  std::fclose(map);",
+    "}",
+    "#endif",
+    "",
+  ]
+lines += [
+  "// Flushed from atexit() too, since $finish may exit() from inside eval().",
+  "class ArcilatorVcdBuf;",
+  "static thread_local ArcilatorVcdBuf* g_arcilator_vcd_buf = nullptr;",
+  "",
+  "// Large-block VCD output (ARCILATOR_VCD_BACKEND=buffered|async). The async",
+  "// variant hands full blocks to a writer thread so the simulation thread only",
+  "// blocks on disk when all blocks are in flight.",
+  "class ArcilatorVcdBuf : public std::streambuf {",
+  " public:",
+  "  ArcilatorVcdBuf(int fd, size_t block_bytes, bool async) : fd_(fd), async_(async) {",
+  "    const size_t nblocks = async ? 4u : 1u;",
+  "    blocks_.resize(nblocks);",
+  "    for (auto &b : blocks_) b.resize(block_bytes);",
+  "    for (size_t i = 1; i < nblocks; ++i) free_.push_back(i);",
+  "    cur_ = 0;",
+  "    setp(blocks_[cur_].data(), blocks_[cur_].data() + blocks_[cur_].size());",
+  "    if (async_) writer_ = std::thread([this]() { run_writer(); });",
+  "  }",
+  "  ~ArcilatorVcdBuf() override {",
+  "    finish();",
+  "    if (g_arcilator_vcd_buf == this) g_arcilator_vcd_buf = nullptr;",
+  "  }",
+  "",
+  "  // Flush everything, stop the writer thread and close the file. Idempotent.",
+  "  void finish() {",
+  "    if (fd_ < 0) return;",
+  "    submit();",
+  "    if (async_) {",
+  "      {",
+  "        std::lock_guard<std::mutex> lock(mu_);",
+  "        stop_ = true;",
+  "      }",
+  "      cv_.notify_all();",
+  "      writer_.join();",
+  "    }",
+  "    ::close(fd_);",
+  "    fd_ = -1;",
+  "  }",
+  "",
+  " protected:",
+  "  int_type overflow(int_type ch) override {",
+  "    if (fd_ < 0) return traits_type::eof();",
+  "    submit();",
+  "    if (!traits_type::eq_int_type(ch, traits_type::eof())) {",
+  "      *pptr() = traits_type::to_char_type(ch);",
+  "      pbump(1);",
+  "    }",
+  "    return traits_type::not_eof(ch);",
+  "  }",
+  "",
+  "  int sync() override {",
+  "    if (fd_ >= 0) submit();",
+  "    return 0;",
+  "  }",
+  "",
+  " private:",
+  "  void write_all(const char* data, size_t n) {",
+  "    while (n) {",
+  "      const ssize_t w = ::write(fd_, data, n);",
+  "      if (w <= 0) return;",
+  "      data += w;",
+  "      n -= static_cast<size_t>(w);",
+  "    }",
+  "  }",
+  "",
+  "  void submit() {",
+  "    const size_t n = static_cast<size_t>(pptr() - pbase());",
+  "    if (!n) return;",
+  "    if (!async_) {",
+  "      write_all(pbase(), n);",
+  "    } else {",
+  "      std::unique_lock<std::mutex> lock(mu_);",
+  "      full_.push_back({cur_, n});",
+  "      cv_.notify_all();",
+  "      cv_.wait(lock, [this]() { return !free_.empty(); });",
+  "      cur_ = free_.back();",
+  "      free_.pop_back();",
+  "    }",
+  "    setp(blocks_[cur_].data(), blocks_[cur_].data() + blocks_[cur_].size());",
+  "  }",
+  "",
+  "  void run_writer() {",
+  "    std::unique_lock<std::mutex> lock(mu_);",
+  "    for (;;) {",
+  "      cv_.wait(lock, [this]() { return stop_ || !full_.empty(); });",
+  "      if (full_.empty()) return;",
+  "      const auto job = full_.front();",
+  "      full_.erase(full_.begin());",
+  "      lock.unlock();",
+  "      write_all(blocks_[job.first].data(), job.second);",
+  "      lock.lock();",
+  "      free_.push_back(job.first);",
+  "      cv_.notify_all();",
+  "    }",
+  "  }",
+  "",
+  "  int fd_;",
+  "  bool async_;",
+  "  std::vector<std::vector<char>> blocks_;",
+  "  size_t cur_ = 0;",
+  "  std::vector<size_t> free_;",
+  "  std::vector<std::pair<size_t, size_t>> full_;",
+  "  std::mutex mu_;",
+  "  std::condition_variable cv_;",
+  "  bool stop_ = false;",
+  "  std::thread writer_;",
+  "};",
+  "",
   "static bool parse_plusarg_u64(int argc, char** argv, const char* prefix, uint64_t* out) {",
   "  if (!prefix || !*prefix || !out) return false;",
   "  const size_t n = std::strlen(prefix);",
@@ -2474,227 +3398,17 @@ lines += [
   "  return false;",
   "}",
   "",
+  "static uint64_t arcilator_run_param(int argc, char** argv, const char* plusarg, const char* env, uint64_t default_value) {",
+  "  uint64_t v = parse_u64_env(env, default_value);",
+  "  parse_plusarg_u64(argc, argv, plusarg, &v);",
+  "  return v;",
+  "}",
+  "",
 ]
 
-# M3 scheduler runtime hooks (cycle-driven polling; best-effort).
+# M3 scheduler runtime hooks (shared with the linked-driver runtime).
 lines += [
-  "static uint64_t g_arcilator_now_fs = 0;",
-  "static std::vector<uint32_t> g_arcilator_proc_pc;",
-  "static std::vector<std::vector<uint64_t>> g_arcilator_proc_frame;",
-  "struct ArcilatorDelayWait { bool active = false; uint64_t targetFs = 0; };",
-  "struct ArcilatorChangeWait { bool active = false; uint64_t lastSig = 0; };",
-  "static std::vector<ArcilatorDelayWait> g_arcilator_delay_waits;",
-  "static std::vector<ArcilatorChangeWait> g_arcilator_change_waits;",
-  "static std::vector<uint64_t> g_arcilator_sig_cur;",
-  "static std::vector<uint64_t> g_arcilator_sig_next;",
-  "static std::vector<uint8_t> g_arcilator_sig_dirty_flag;",
-  "static std::vector<uint32_t> g_arcilator_sig_dirty;",
-  "static std::vector<uint64_t> g_arcilator_sig_nba_mask;",
-  "static std::vector<uint64_t> g_arcilator_sig_nba_value;",
-  "static std::vector<uint8_t> g_arcilator_sig_nba_dirty_flag;",
-  "static std::vector<uint32_t> g_arcilator_sig_nba_dirty;",
-  "static std::vector<std::vector<uint64_t>> g_arcilator_sig_local;",
-  "static std::vector<std::vector<uint8_t>> g_arcilator_sig_local_valid;",
-  "",
-  "static void ensure_proc_state(uint32_t procId) {",
-  "  if (g_arcilator_proc_pc.size() <= procId) g_arcilator_proc_pc.resize(procId + 1u, 0u);",
-  "}",
-  "",
-  "static void ensure_proc_frame(uint32_t procId, uint32_t slot) {",
-  "  ensure_proc_state(procId);",
-  "  if (g_arcilator_proc_frame.size() <= procId) g_arcilator_proc_frame.resize(procId + 1u);",
-  "  if (g_arcilator_proc_frame[procId].size() <= slot)",
-  "    g_arcilator_proc_frame[procId].resize(static_cast<size_t>(slot) + 1u, 0ull);",
-  "}",
-  "",
-  "static void ensure_wait_state(uint32_t waitId) {",
-  "  if (g_arcilator_delay_waits.size() <= waitId) g_arcilator_delay_waits.resize(waitId + 1u);",
-  "  if (g_arcilator_change_waits.size() <= waitId) g_arcilator_change_waits.resize(waitId + 1u);",
-  "}",
-  "",
-  "static void ensure_sig_state(uint32_t sigId) {",
-  "  if (g_arcilator_sig_cur.size() <= sigId) {",
-  "    const size_t n = static_cast<size_t>(sigId) + 1u;",
-  "    // Initialize signals to X (all-ones) so 4-state values start unknown.",
-  "    // 2-state signals are expected to be driven to known values by the SV",
-  "    // initialization code at time 0.",
-  "    g_arcilator_sig_cur.resize(n, ~0ull);",
-  "    g_arcilator_sig_next.resize(n, ~0ull);",
-  "    g_arcilator_sig_dirty_flag.resize(n, 0u);",
-  "    g_arcilator_sig_nba_mask.resize(n, 0ull);",
-  "    g_arcilator_sig_nba_value.resize(n, 0ull);",
-  "    g_arcilator_sig_nba_dirty_flag.resize(n, 0u);",
-  "  }",
-  "}",
-  "",
-  "static void ensure_sig_local(uint32_t procId) {",
-  "  if (g_arcilator_sig_local.size() <= procId) {",
-  "    const size_t n = static_cast<size_t>(procId) + 1u;",
-  "    g_arcilator_sig_local.resize(n);",
-  "    g_arcilator_sig_local_valid.resize(n);",
-  "  }",
-  "  const size_t sigs = g_arcilator_sig_cur.size();",
-  "  if (g_arcilator_sig_local[procId].size() < sigs) g_arcilator_sig_local[procId].resize(sigs, 0ull);",
-  "  if (g_arcilator_sig_local_valid[procId].size() < sigs) g_arcilator_sig_local_valid[procId].resize(sigs, 0u);",
-  "}",
-  "",
-  "extern \"C\" uint64_t __arcilator_now_fs() { return g_arcilator_now_fs; }",
-  "",
-  "extern \"C\" uint32_t __arcilator_get_pc(uint32_t procId) {",
-  "  ensure_proc_state(procId);",
-  "  return g_arcilator_proc_pc[procId];",
-  "}",
-  "",
-  "extern \"C\" void __arcilator_set_pc(uint32_t procId, uint32_t pc) {",
-  "  ensure_proc_state(procId);",
-  "  g_arcilator_proc_pc[procId] = pc;",
-  "}",
-  "",
-  "extern \"C\" uint64_t __arcilator_frame_load_u64(uint32_t procId, uint32_t slot) {",
-  "  ensure_proc_frame(procId, slot);",
-  "  return g_arcilator_proc_frame[procId][slot];",
-  "}",
-  "",
-  "extern \"C\" void __arcilator_frame_store_u64(uint32_t procId, uint32_t slot, uint64_t value) {",
-  "  ensure_proc_frame(procId, slot);",
-  "  g_arcilator_proc_frame[procId][slot] = value;",
-  "}",
-  "",
-  "extern \"C\" bool __arcilator_wait_delay(uint32_t waitId, uint64_t delayFs) {",
-  "  ensure_wait_state(waitId);",
-  "  auto &w = g_arcilator_delay_waits[waitId];",
-  "  if (!w.active) {",
-  "    w.active = true;",
-  "    uint64_t target = 0;",
-  "    if (__builtin_add_overflow(g_arcilator_now_fs, delayFs, &target)) target = ~0ull;",
-  "    w.targetFs = target;",
-  "    return false;",
-  "  }",
-  "  if (g_arcilator_now_fs >= w.targetFs) {",
-  "    w.active = false;",
-  "    return true;",
-  "  }",
-  "  return false;",
-  "}",
-  "",
-  "extern \"C\" bool __arcilator_wait_change(uint32_t waitId, uint64_t sig) {",
-  "  ensure_wait_state(waitId);",
-  "  auto &w = g_arcilator_change_waits[waitId];",
-  "  if (!w.active) {",
-  "    w.active = true;",
-  "    w.lastSig = sig;",
-  "    return false;",
-  "  }",
-  "  if (sig != w.lastSig) {",
-  "    w.active = false;",
-  "    w.lastSig = sig;",
-  "    return true;",
-  "  }",
-  "  return false;",
-  "}",
-  "",
-  "extern \"C\" uint64_t __arcilator_sig_load_u64(uint32_t sigId, uint32_t procId) {",
-  "  ensure_sig_state(sigId);",
-  "  if (procId != 0xFFFFFFFFu) {",
-  "    ensure_sig_local(procId);",
-  "    if (sigId < g_arcilator_sig_local_valid[procId].size() && g_arcilator_sig_local_valid[procId][sigId])",
-  "      return g_arcilator_sig_local[procId][sigId];",
-  "  }",
-  "  // If the signal has been written in the current delta cycle, expose the",
-  "  // pending value to later processes in the same timestep. This preserves",
-  "  // SystemVerilog-style immediate visibility for blocking assignments and",
-  "  // avoids clobbering independent bit-slice updates to packed runtime",
-  "  // signals (e.g. interface field packs).",
-  "  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])",
-  "    return g_arcilator_sig_next[sigId];",
-  "  return g_arcilator_sig_cur[sigId];",
-  "}",
-  "",
-  "extern \"C\" uint64_t __arcilator_sig_load_nba_u64(uint32_t sigId, uint32_t /*procId*/) {",
-  "  ensure_sig_state(sigId);",
-  "  // NBAs should not be visible to regular reads within the same delta cycle,",
-  "  // but masked/NBA stores need a stable base for bit-slice merging. Provide a",
-  "  // view that includes any pending blocking updates (dirty) and any queued",
-  "  // NBA masks for this signal.",
-  "  uint64_t base = g_arcilator_sig_cur[sigId];",
-  "  if (sigId < g_arcilator_sig_dirty_flag.size() && g_arcilator_sig_dirty_flag[sigId])",
-  "    base = g_arcilator_sig_next[sigId];",
-  "  if (sigId < g_arcilator_sig_nba_dirty_flag.size() && g_arcilator_sig_nba_dirty_flag[sigId]) {",
-  "    const uint64_t mask = g_arcilator_sig_nba_mask[sigId];",
-  "    base = (base & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);",
-  "  }",
-  "  return base;",
-  "}",
-  "",
-  "extern \"C\" uint64_t __arcilator_sig_read_u64(uint32_t sigId, uint32_t /*procId*/) {",
-  "  ensure_sig_state(sigId);",
-  "  return g_arcilator_sig_cur[sigId];",
-  "}",
-  "",
-  "extern \"C\" void __arcilator_sig_store_u64(uint32_t sigId, uint64_t value, uint32_t procId) {",
-  "  ensure_sig_state(sigId);",
-  "  g_arcilator_sig_next[sigId] = value;",
-  "  if (!g_arcilator_sig_dirty_flag[sigId]) {",
-  "    g_arcilator_sig_dirty_flag[sigId] = 1u;",
-  "    g_arcilator_sig_dirty.push_back(sigId);",
-  "  }",
-  "  if (procId != 0xFFFFFFFFu) {",
-  "    ensure_sig_local(procId);",
-  "    if (sigId < g_arcilator_sig_local[procId].size()) g_arcilator_sig_local[procId][sigId] = value;",
-  "    if (sigId < g_arcilator_sig_local_valid[procId].size()) g_arcilator_sig_local_valid[procId][sigId] = 1u;",
-  "  }",
-  "}",
-  "",
-  "extern \"C\" void __arcilator_sig_store_nba_masked_u64(uint32_t sigId, uint64_t mask, uint64_t value, uint32_t /*procId*/) {",
-  "  ensure_sig_state(sigId);",
-  "  if (mask == 0ull) return;",
-  "  // Queue an end-of-delta update for the specified bit mask. This preserves",
-  "  // SystemVerilog nonblocking assignment semantics for packed runtime signals,",
-  "  // including independent bit-slice updates from multiple processes.",
-  "  g_arcilator_sig_nba_value[sigId] = (g_arcilator_sig_nba_value[sigId] & ~mask) | (value & mask);",
-  "  g_arcilator_sig_nba_mask[sigId] |= mask;",
-  "  if (!g_arcilator_sig_nba_dirty_flag[sigId]) {",
-  "    g_arcilator_sig_nba_dirty_flag[sigId] = 1u;",
-  "    g_arcilator_sig_nba_dirty.push_back(sigId);",
-  "  }",
-  "}",
-  "",
-  "extern \"C\" void __arcilator_sig_store_nba_u64(uint32_t sigId, uint64_t value, uint32_t procId) {",
-  "  __arcilator_sig_store_nba_masked_u64(sigId, ~0ull, value, procId);",
-  "}",
-  "",
-  "extern \"C\" bool __arcilator_sig_commit() {",
-  "  bool changed = false;",
-  "  for (uint32_t sigId : g_arcilator_sig_dirty) {",
-  "    if (sigId < g_arcilator_sig_cur.size()) {",
-  "      const uint64_t next = g_arcilator_sig_next[sigId];",
-  "      if (g_arcilator_sig_cur[sigId] != next) changed = true;",
-  "      g_arcilator_sig_cur[sigId] = next;",
-  "    }",
-  "    if (sigId < g_arcilator_sig_dirty_flag.size()) g_arcilator_sig_dirty_flag[sigId] = 0u;",
-  "  }",
-  "  g_arcilator_sig_dirty.clear();",
-  "  for (uint32_t sigId : g_arcilator_sig_nba_dirty) {",
-  "    if (sigId < g_arcilator_sig_cur.size()) {",
-  "      const uint64_t mask = (sigId < g_arcilator_sig_nba_mask.size()) ? g_arcilator_sig_nba_mask[sigId] : 0ull;",
-  "      if (mask != 0ull) {",
-  "        const uint64_t before = g_arcilator_sig_cur[sigId];",
-  "        const uint64_t after = (before & ~mask) | (g_arcilator_sig_nba_value[sigId] & mask);",
-  "        if (before != after) changed = true;",
-  "        g_arcilator_sig_cur[sigId] = after;",
-  "        if (sigId < g_arcilator_sig_next.size()) g_arcilator_sig_next[sigId] = after;",
-  "      }",
-  "    }",
-  "    if (sigId < g_arcilator_sig_nba_mask.size()) g_arcilator_sig_nba_mask[sigId] = 0ull;",
-  "    if (sigId < g_arcilator_sig_nba_value.size()) g_arcilator_sig_nba_value[sigId] = 0ull;",
-  "    if (sigId < g_arcilator_sig_nba_dirty_flag.size()) g_arcilator_sig_nba_dirty_flag[sigId] = 0u;",
-  "  }",
-  "  g_arcilator_sig_nba_dirty.clear();",
-  "  for (size_t p = 0; p < g_arcilator_sig_local_valid.size(); ++p) {",
-  "    for (size_t s = 0; s < g_arcilator_sig_local_valid[p].size(); ++s) g_arcilator_sig_local_valid[p][s] = 0u;",
-  "  }",
-  "  return changed;",
-  "}",
+  "#include \"arcilator_sched.h\"",
   "",
 ]
 
@@ -2708,10 +3422,11 @@ lines += [
   "};",
   "",
   "static void arcilator_seed_sig_inits() {",
+  "  ArcilatorSchedContext& ctx = arcilator_ctx();",
   "  for (const auto &it : kArcilatorSigInits) {",
   "    ensure_sig_state(it.sigId);",
-  "    g_arcilator_sig_cur[it.sigId] = it.value;",
-  "    g_arcilator_sig_next[it.sigId] = it.value;",
+  "    ctx.sig_cur[it.sigId] = it.value;",
+  "    ctx.sig_next[it.sigId] = it.value;",
   "  }",
   "}",
   "",
@@ -2719,7 +3434,8 @@ lines += [
 
 if enable_uvm_hdl:
   hdl_entries = []
-  for st in states:
+  hdl_names: list[str] = []
+  for st in model.states:
     name = st.get("name") or ""
     if not name:
       continue
@@ -2735,6 +3451,33 @@ if enable_uvm_hdl:
     hdl_entries.append(
       "  {" + cpp_str(name) + f", {off}u, {bits}u, {stride}u, {depth}u" + "},"
     )
+    hdl_names.append(name)
+
+  # Lookup keys are normalized here ('.' -> '/', no leading separator) and
+  # include the `<model>/` and `top/` spellings the runtime used to try one
+  # after the other. Earlier spellings win; duplicate names keep the last
+  # entry, like the old map did.
+  def hdl_norm(path: str) -> str:
+    return path.replace(".", "/").lstrip("/")
+
+  hdl_keys: dict[str, tuple[int, int]] = {}
+  model_prefix = hdl_norm(model_name) + "/" if model_name else ""
+  for idx, name in enumerate(hdl_names):
+    norm = hdl_norm(name)
+    spellings = [(0, norm)]
+    if model_prefix and norm.startswith(model_prefix):
+      rest = norm[len(model_prefix):]
+      spellings += [(1, rest), (2, "top/" + rest)]
+    for prio, key in spellings:
+      if not key:
+        continue
+      cur = hdl_keys.get(key)
+      if cur is None or prio <= cur[0]:
+        hdl_keys[key] = (prio, idx)
+  hdl_index = [
+    "  {" + cpp_str(key) + f", {len(key.encode('utf-8'))}u, {hdl_keys[key][1]}u" + "},"
+    for key in sorted(hdl_keys, key=lambda k: k.encode("utf-8"))
+  ]
 
   lines += [
     "extern \"C\" {",
@@ -2752,6 +3495,20 @@ if enable_uvm_hdl:
     "static const ArcilatorHdlEntry kArcilatorHdl[] = {",
   ]
   lines += hdl_entries
+  lines += [
+    "};",
+    "",
+    "// Pre-normalized lookup keys, sorted bytewise for binary search.",
+    "struct ArcilatorHdlKey {",
+    "  const char* key;",
+    "  uint32_t len;",
+    "  uint32_t entry;",
+    "};",
+    "",
+    f"static constexpr size_t kArcilatorHdlIndexSize = {len(hdl_index)}u;",
+    "static const ArcilatorHdlKey kArcilatorHdlIndex[] = {",
+  ]
+  lines += hdl_index or ["  {\"\", 0u, 0u},"]
   lines += [
     "};",
     "",
@@ -2880,6 +3637,8 @@ if enable_uvm_hdl:
     "  return g_uvm_glob_tmp.c_str();",
     "}",
     "",
+    "// Normalized key for a path ('.' -> '/', no leading separator). Only used",
+    "// where a path has to be kept (forces, handles); lookups compare in place.",
     "static std::string normalize_uvm_path(const char* path) {",
     "  std::string out;",
     "  if (!path) return out;",
@@ -2893,41 +3652,32 @@ if enable_uvm_hdl:
     "  return out;",
     "}",
     "",
-    "static const std::unordered_map<std::string_view, const ArcilatorHdlEntry*>& get_arcilator_hdl_map() {",
-    "  static const auto* map = []() {",
-    "    auto* m = new std::unordered_map<std::string_view, const ArcilatorHdlEntry*>();",
-    f"    m->reserve({len(hdl_entries)}u);",
-    "    for (const auto& e : kArcilatorHdl) (*m)[e.name] = &e;",
-    "    return m;",
-    "  }();",
-    "  return *map;",
-    "}",
-    "",
-    "static const ArcilatorHdlEntry* find_arcilator_entry(std::string_view key) {",
-    "  const auto& m = get_arcilator_hdl_map();",
-    "  auto it = m.find(key);",
-    "  if (it == m.end()) return nullptr;",
-    "  return it->second;",
+    "// Compares the raw path span [p, p + n) with a pre-normalized key, reading",
+    "// '.' as '/', so lookups need no normalized copy of the path.",
+    "static int arcilator_hdl_key_cmp(const char* p, size_t n, const ArcilatorHdlKey& k) {",
+    "  const size_t m = (n < k.len) ? n : k.len;",
+    "  for (size_t i = 0; i < m; ++i) {",
+    "    const unsigned char a = static_cast<unsigned char>((p[i] == '.') ? '/' : p[i]);",
+    "    const unsigned char b = static_cast<unsigned char>(k.key[i]);",
+    "    if (a != b) return (a < b) ? -1 : 1;",
+    "  }",
+    "  if (n == k.len) return 0;",
+    "  return (n < k.len) ? -1 : 1;",
     "}",
     "",
-    "static const ArcilatorHdlEntry* resolve_arcilator_entry_norm(std::string_view norm) {",
-    "  if (norm.empty()) return nullptr;",
-    "  if (auto* e = find_arcilator_entry(norm)) return e;",
-    "  if (kArcilatorModelName && *kArcilatorModelName) {",
-    "    std::string with = std::string(kArcilatorModelName) + \"/\" + std::string(norm);",
-    "    if (auto* e = find_arcilator_entry(with)) return e;",
-    "    if (norm.rfind(\"top/\", 0) == 0) {",
-    "      std::string with2 = std::string(kArcilatorModelName) + \"/\" + std::string(norm.substr(4));",
-    "      if (auto* e = find_arcilator_entry(with2)) return e;",
-    "    }",
+    "static const ArcilatorHdlEntry* find_arcilator_entry(const char* p, size_t n) {",
+    "  if (!n) return nullptr;",
+    "  size_t lo = 0, hi = kArcilatorHdlIndexSize;",
+    "  while (lo < hi) {",
+    "    const size_t mid = lo + (hi - lo) / 2;",
+    "    const int c = arcilator_hdl_key_cmp(p, n, kArcilatorHdlIndex[mid]);",
+    "    if (c == 0) return &kArcilatorHdl[kArcilatorHdlIndex[mid].entry];",
+    "    if (c < 0) hi = mid;",
+    "    else lo = mid + 1;",
     "  }",
     "  return nullptr;",
     "}",
     "",
-    "static const ArcilatorHdlEntry* resolve_arcilator_entry(const char* path) {",
-    "  return resolve_arcilator_entry_norm(normalize_uvm_path(path));",
-    "}",
-    "",
     "struct ArcilatorHdlResolved {",
     "  const ArcilatorHdlEntry* entry = nullptr;",
     "  uint32_t byteOffset = 0;",
@@ -2935,57 +3685,64 @@ if enable_uvm_hdl:
     "  uint32_t numBits = 0;",
     "};",
     "",
-    "static bool parse_u64(const std::string& s, uint64_t* out) {",
-    "  if (!out) return false;",
-    "  if (s.empty()) return false;",
+    "static bool same_hdl_region(const ArcilatorHdlResolved& a, const ArcilatorHdlResolved& b) {",
+    "  return a.entry == b.entry && a.byteOffset == b.byteOffset && a.bitOffset == b.bitOffset &&",
+    "         a.numBits == b.numBits;",
+    "}",
+    "",
+    "// Parses [b, e) as a whole number (strtoull base 0); the span must be",
+    "// followed by a non-digit (':' / '+' / '-' / NUL), which stops strtoull.",
+    "static bool parse_u64(const char* b, const char* e, uint64_t* out) {",
+    "  if (!out || b == e) return false;",
     "  char* end = nullptr;",
-    "  unsigned long long v = std::strtoull(s.c_str(), &end, 0);",
-    "  if (end == s.c_str() || (end && *end != '\\0')) return false;",
+    "  unsigned long long v = std::strtoull(b, &end, 0);",
+    "  if (end != e) return false;",
     "  *out = static_cast<uint64_t>(v);",
     "  return true;",
     "}",
     "",
-    "static std::string strip_ws(const std::string& in) {",
-    "  std::string out;",
-    "  out.reserve(in.size());",
-    "  for (char c : in) {",
-    "    if (!std::isspace(static_cast<unsigned char>(c))) out.push_back(c);",
+    "// Copies [b, e) into buf without whitespace. Returns false if it does not fit.",
+    "static bool strip_ws(const char* b, const char* e, char* buf, size_t cap) {",
+    "  size_t n = 0;",
+    "  for (const char* p = b; p != e; ++p) {",
+    "    if (std::isspace(static_cast<unsigned char>(*p))) continue;",
+    "    if (n + 1 >= cap) return false;",
+    "    buf[n++] = *p;",
     "  }",
-    "  return out;",
+    "  buf[n] = '\\0';",
+    "  return true;",
     "}",
     "",
-    "static bool parse_bit_select(const std::string& raw, uint64_t* lsb, uint64_t* width) {",
-    "  if (!lsb || !width) return false;",
-    "  std::string s = strip_ws(raw);",
-    "  if (s.empty()) return false;",
+    "// `s` is a whitespace-stripped selector.",
+    "static bool parse_bit_select(const char* s, uint64_t* lsb, uint64_t* width) {",
+    "  if (!s || !lsb || !width) return false;",
+    "  const char* end = s + std::strlen(s);",
+    "  if (s == end) return false;",
     "",
-    "  auto plus = s.find(\"+:\");",
-    "  if (plus != std::string::npos) {",
+    "  if (const char* plus = std::strstr(s, \"+:\")) {",
     "    uint64_t base = 0, w = 0;",
-    "    if (!parse_u64(s.substr(0, plus), &base)) return false;",
-    "    if (!parse_u64(s.substr(plus + 2), &w)) return false;",
+    "    if (!parse_u64(s, plus, &base)) return false;",
+    "    if (!parse_u64(plus + 2, end, &w)) return false;",
     "    if (w == 0) return false;",
     "    *lsb = base;",
     "    *width = w;",
     "    return true;",
     "  }",
     "",
-    "  auto minus = s.find(\"-:\");",
-    "  if (minus != std::string::npos) {",
+    "  if (const char* minus = std::strstr(s, \"-:\")) {",
     "    uint64_t base = 0, w = 0;",
-    "    if (!parse_u64(s.substr(0, minus), &base)) return false;",
-    "    if (!parse_u64(s.substr(minus + 2), &w)) return false;",
+    "    if (!parse_u64(s, minus, &base)) return false;",
+    "    if (!parse_u64(minus + 2, end, &w)) return false;",
     "    if (w == 0 || base + 1 < w) return false;",
     "    *lsb = base - (w - 1);",
     "    *width = w;",
     "    return true;",
     "  }",
     "",
-    "  auto colon = s.find(':');",
-    "  if (colon != std::string::npos) {",
+    "  if (const char* colon = std::strchr(s, ':')) {",
     "    uint64_t msb = 0, lo = 0;",
-    "    if (!parse_u64(s.substr(0, colon), &msb)) return false;",
-    "    if (!parse_u64(s.substr(colon + 1), &lo)) return false;",
+    "    if (!parse_u64(s, colon, &msb)) return false;",
+    "    if (!parse_u64(colon + 1, end, &lo)) return false;",
     "    if (msb < lo) return false;",
     "    *lsb = lo;",
     "    *width = (msb - lo) + 1;",
@@ -2993,18 +3750,19 @@ if enable_uvm_hdl:
     "  }",
     "",
     "  uint64_t idx = 0;",
-    "  if (!parse_u64(s, &idx)) return false;",
+    "  if (!parse_u64(s, end, &idx)) return false;",
     "  *lsb = idx;",
     "  *width = 1;",
     "  return true;",
     "}",
     "",
-    "static bool resolve_arcilator_path(const char* path, ArcilatorHdlResolved* out) {",
-    "  if (!out) return false;",
-    "  std::string norm = normalize_uvm_path(path);",
-    "  if (norm.empty()) return false;",
+    "static bool resolve_arcilator_path_uncached(const char* path, ArcilatorHdlResolved* out) {",
+    "  if (!out || !path) return false;",
+    "  while (*path == '/' || *path == '.') ++path;",
+    "  const size_t n = std::strlen(path);",
+    "  if (!n) return false;",
     "",
-    "  if (const auto* e = resolve_arcilator_entry_norm(norm)) {",
+    "  if (const auto* e = find_arcilator_entry(path, n)) {",
     "    out->entry = e;",
     "    out->byteOffset = e->offset;",
     "    out->bitOffset = 0;",
@@ -3012,16 +3770,24 @@ if enable_uvm_hdl:
     "    return true;",
     "  }",
     "",
-    "  std::vector<std::string> selectors;",
-    "  std::string base = norm;",
-    "  while (!base.empty() && base.back() == ']') {",
-    "    size_t open = base.rfind('[');",
-    "    if (open == std::string::npos || open + 1 >= base.size()) break;",
-    "    selectors.push_back(base.substr(open + 1, base.size() - open - 2));",
-    "    base.erase(open);",
+    "  // Peel trailing `[...]` selectors off the path, last one first.",
+    "  constexpr int kMaxSelectors = 16;",
+    "  const char* sel_begin[kMaxSelectors];",
+    "  const char* sel_end[kMaxSelectors];",
+    "  int nsel = 0;",
+    "  size_t base_len = n;",
+    "  while (base_len && path[base_len - 1] == ']') {",
+    "    size_t open = base_len - 1;",
+    "    while (open && path[open - 1] != '[') --open;",
+    "    if (!open) break;",
+    "    if (nsel == kMaxSelectors) return false;",
+    "    sel_begin[nsel] = path + open;",
+    "    sel_end[nsel] = path + base_len - 1;",
+    "    ++nsel;",
+    "    base_len = open - 1;",
     "  }",
     "",
-    "  const auto* e = resolve_arcilator_entry_norm(base);",
+    "  const auto* e = find_arcilator_entry(path, base_len);",
     "  if (!e) return false;",
     "",
     "  uint32_t byteOffset = e->offset;",
@@ -3029,12 +3795,12 @@ if enable_uvm_hdl:
     "  uint32_t widthBits = e->numBits;",
     "  bool usedMemIndex = false;",
     "",
-    "  for (auto it = selectors.rbegin(); it != selectors.rend(); ++it) {",
-    "    const std::string& raw = *it;",
-    "    const std::string s = strip_ws(raw);",
-    "    if (!usedMemIndex && e->depth && e->stride && s.find(':') == std::string::npos) {",
+    "  char s[64];",
+    "  for (int i = nsel - 1; i >= 0; --i) {",
+    "    if (!strip_ws(sel_begin[i], sel_end[i], s, sizeof(s))) return false;",
+    "    if (!usedMemIndex && e->depth && e->stride && !std::strchr(s, ':')) {",
     "      uint64_t idx = 0;",
-    "      if (!parse_u64(s, &idx)) return false;",
+    "      if (!parse_u64(s, s + std::strlen(s), &idx)) return false;",
     "      if (idx >= e->depth) return false;",
     "      byteOffset = e->offset + static_cast<uint32_t>(idx * e->stride);",
     "      usedMemIndex = true;",
@@ -3042,7 +3808,7 @@ if enable_uvm_hdl:
     "    }",
     "",
     "    uint64_t lsb = 0, w = 0;",
-    "    if (!parse_bit_select(raw, &lsb, &w)) return false;",
+    "    if (!parse_bit_select(s, &lsb, &w)) return false;",
     "    if (w == 0 || w > widthBits) return false;",
     "    if (lsb > static_cast<uint64_t>(widthBits) - w) return false;",
     "    bitOffset += static_cast<uint32_t>(lsb);",
@@ -3056,6 +3822,36 @@ if enable_uvm_hdl:
     "  return true;",
     "}",
     "",
+    "// Resolved-path cache keyed by the caller's string pointer: register models",
+    "// pass the same path strings over and over. The pointer alone is not trusted",
+    "// (string storage gets reused), so a hit is confirmed against a copy of the",
+    "// path. Paths that do not fit a slot always take the slow path.",
+    "struct ArcilatorHdlCacheSlot {",
+    "  const char* ptr = nullptr;",
+    "  char text[120];",
+    "  ArcilatorHdlResolved resolved;",
+    "};",
+    "",
+    "static ArcilatorHdlCacheSlot g_arcilator_hdl_cache[64];",
+    "",
+    "static bool resolve_arcilator_path(const char* path, ArcilatorHdlResolved* out) {",
+  ] + (["  ArcilatorProfScope prof_scope(kArcProfHdl);"] if enable_profile else []) + [
+    "  if (!out || !path) return false;",
+    "  auto& slot = g_arcilator_hdl_cache[(reinterpret_cast<uintptr_t>(path) >> 3) & 63u];",
+    "  if (slot.ptr == path && std::strcmp(slot.text, path) == 0) {",
+    "    *out = slot.resolved;",
+    "    return true;",
+    "  }",
+    "  if (!resolve_arcilator_path_uncached(path, out)) return false;",
+    "  const size_t n = std::strlen(path);",
+    "  if (n < sizeof(slot.text)) {",
+    "    slot.ptr = path;",
+    "    std::memcpy(slot.text, path, n + 1);",
+    "    slot.resolved = *out;",
+    "  }",
+    "  return true;",
+    "}",
+    "",
     "static constexpr uint32_t kUvmHdlMaxBits = 1024u;",
     "static constexpr uint32_t kUvmHdlWords = (kUvmHdlMaxBits + 31u) / 32u;",
     "",
@@ -3152,36 +3948,88 @@ if enable_uvm_hdl:
     "  else copy_from_state_bits(src, r.bitOffset, r.numBits, out);",
     "}",
     "",
-    "static void arcilator_apply_forces() {",
-    "  if (!g_arcilator_state) return;",
+    "// Active forces flattened into per-byte (offset, mask, value) patches, in",
+    "// force order so later forces win on overlap. The driver applies forces",
+    "// before eval and after every delta commit, so this is rebuilt only when",
+    "// the force set changes and applying is a flag test when nothing is forced.",
+    "struct ArcilatorForcePatch {",
+    "  uint32_t offset;",
+    "  uint8_t mask;",
+    "  uint8_t value;",
+    "};",
+    "",
+    "static std::vector<ArcilatorForcePatch> g_arcilator_force_patches;",
+    "static bool g_arcilator_forces_active = false;",
+    "",
+    "static void arcilator_forces_changed() {",
+    "  g_arcilator_force_patches.clear();",
     "  for (const auto& f : g_arcilator_forces) {",
-    "    arcilator_apply_force_value(f.resolved, f.value.data());",
+    "    const ArcilatorHdlResolved& r = f.resolved;",
+    "    for (uint32_t i = 0; i < r.numBits;) {",
+    "      const uint32_t bit = r.bitOffset + i;",
+    "      const uint32_t shift = bit & 7u;",
+    "      const uint32_t take = std::min(8u - shift, r.numBits - i);",
+    "      uint32_t v = 0;",
+    "      for (uint32_t j = 0; j < take; ++j) {",
+    "        v |= ((f.value[(i + j) >> 5].aval >> ((i + j) & 31u)) & 1u) << j;",
+    "      }",
+    "      const uint8_t mask = static_cast<uint8_t>(((1u << take) - 1u) << shift);",
+    "      g_arcilator_force_patches.push_back(",
+    "          {r.byteOffset + (bit >> 3), mask, static_cast<uint8_t>((v << shift) & mask)});",
+    "      i += take;",
+    "    }",
     "  }",
+    "  g_arcilator_forces_active = !g_arcilator_force_patches.empty();",
     "}",
     "",
-    "extern \"C\" int uvm_hdl_check_path(const char* path) {",
-    "  if (!g_arcilator_state) return 0;",
-    "  ArcilatorHdlResolved r;",
-    "  if (!resolve_arcilator_path(path, &r)) return 0;",
-    "  return (r.numBits <= kUvmHdlMaxBits) ? 1 : 0;",
+    "static inline void arcilator_apply_forces() {",
+    "  if (!g_arcilator_forces_active || !g_arcilator_state) return;",
+    "  uint8_t* state = g_arcilator_state;",
+    "  for (const auto& p : g_arcilator_force_patches) {",
+    "    state[p.offset] = static_cast<uint8_t>((state[p.offset] & ~p.mask) | p.value);",
+    "  }",
     "}",
     "",
-    "extern \"C\" int uvm_hdl_read(const char* path, svLogicVecVal* value) {",
-    "  if (!g_arcilator_state) return 0;",
-    "  ArcilatorHdlResolved r;",
-    "  if (!resolve_arcilator_path(path, &r)) return 0;",
-    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "// Forces are checkpointed by path and re-resolved on restore.",
+    "static void arcilator_forces_checkpoint_write(std::FILE* f) {",
+    "  const uint64_t n = g_arcilator_forces.size();",
+    "  std::fwrite(&n, sizeof(n), 1, f);",
+    "  for (const auto& force : g_arcilator_forces) {",
+    "    const uint64_t len = force.key.size();",
+    "    std::fwrite(&len, sizeof(len), 1, f);",
+    "    std::fwrite(force.key.data(), 1, force.key.size(), f);",
+    "    std::fwrite(force.value.data(), sizeof(svLogicVecVal), force.value.size(), f);",
+    "    std::fwrite(force.saved.data(), sizeof(svLogicVecVal), force.saved.size(), f);",
+    "  }",
+    "}",
+    "",
+    "static bool arcilator_forces_checkpoint_read(std::FILE* f) {",
+    "  uint64_t n = 0;",
+    "  if (std::fread(&n, sizeof(n), 1, f) != 1) return false;",
+    "  g_arcilator_forces.clear();",
+    "  for (uint64_t i = 0; i < n; ++i) {",
+    "    ArcilatorHdlForce force;",
+    "    uint64_t len = 0;",
+    "    if (std::fread(&len, sizeof(len), 1, f) != 1) return false;",
+    "    force.key.resize(static_cast<size_t>(len));",
+    "    if (len && std::fread(&force.key[0], 1, force.key.size(), f) != force.key.size()) return false;",
+    "    if (std::fread(force.value.data(), sizeof(svLogicVecVal), force.value.size(), f) != force.value.size()) return false;",
+    "    if (std::fread(force.saved.data(), sizeof(svLogicVecVal), force.saved.size(), f) != force.saved.size()) return false;",
+    "    if (!resolve_arcilator_path_uncached(force.key.c_str(), &force.resolved)) return false;",
+    "    g_arcilator_forces.push_back(std::move(force));",
+    "  }",
+    "  arcilator_forces_changed();",
+    "  return true;",
+    "}",
+    "",
+    "static int arcilator_hdl_read(const ArcilatorHdlResolved& r, svLogicVecVal* value) {",
     "  const uint8_t* src = g_arcilator_state + r.byteOffset;",
     "  if (r.bitOffset == 0) copy_from_state(src, r.numBits, value);",
     "  else copy_from_state_bits(src, r.bitOffset, r.numBits, value);",
     "  return 1;",
     "}",
     "",
-    "extern \"C\" int uvm_hdl_deposit(const char* path, const svLogicVecVal* value) {",
-    "  if (!g_arcilator_state) return 0;",
-    "  ArcilatorHdlResolved r;",
-    "  if (!resolve_arcilator_path(path, &r)) return 0;",
-    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "static int arcilator_hdl_deposit(const ArcilatorHdlResolved& r, const svLogicVecVal* value) {",
     "  uint8_t* dst = g_arcilator_state + r.byteOffset;",
     "  if (r.bitOffset == 0 && r.entry && r.numBits == r.entry->numBits) {",
     "    copy_to_state(value, r.numBits, dst);",
@@ -3191,28 +4039,25 @@ if enable_uvm_hdl:
     "  return 1;",
     "}",
     "",
-    "extern \"C\" int uvm_hdl_force(const char* path, const svLogicVecVal* value) {",
-    "  if (!g_arcilator_state || !path || !*path || !value) return 0;",
-    "  ArcilatorHdlResolved r;",
-    "  if (!resolve_arcilator_path(path, &r)) return 0;",
-    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
-    "  std::string key = normalize_uvm_path(path);",
+    "// Forces are matched by resolved bit range, so `u.x` and `top.u.x` name the",
+    "// same force. `path` is only normalized when a new force is recorded.",
+    "static int arcilator_hdl_force(const ArcilatorHdlResolved& r, const char* path, const svLogicVecVal* value) {",
     "  const uint32_t numWords = (r.numBits + 31u) / 32u;",
     "",
     "  for (auto& f : g_arcilator_forces) {",
-    "    if (f.key != key) continue;",
-    "    f.resolved = r;",
+    "    if (!same_hdl_region(f.resolved, r)) continue;",
     "    uvm_vec_clear(f.value.data());",
     "    for (uint32_t w = 0; w < numWords && w < kUvmHdlWords; ++w) {",
     "      f.value[w].aval = value[w].aval;",
     "      f.value[w].bval = 0;",
     "    }",
+    "    arcilator_forces_changed();",
     "    arcilator_apply_forces();",
     "    return 1;",
     "  }",
     "",
     "  ArcilatorHdlForce f;",
-    "  f.key = std::move(key);",
+    "  f.key = normalize_uvm_path(path);",
     "  f.resolved = r;",
     "  arcilator_capture_force_saved(r, f.saved.data());",
     "  uvm_vec_clear(f.value.data());",
@@ -3221,35 +4066,118 @@ if enable_uvm_hdl:
     "    f.value[w].bval = 0;",
     "  }",
     "  g_arcilator_forces.push_back(std::move(f));",
+    "  arcilator_forces_changed();",
     "  arcilator_apply_forces();",
     "  return 1;",
     "}",
     "",
-    "extern \"C\" int uvm_hdl_release(const char* path) {",
-    "  if (!g_arcilator_state || !path || !*path) return 0;",
-    "  ArcilatorHdlResolved r;",
-    "  if (!resolve_arcilator_path(path, &r)) return 0;",
-    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
-    "  const std::string key = normalize_uvm_path(path);",
-    "",
+    "static int arcilator_hdl_release(const ArcilatorHdlResolved& r) {",
     "  for (auto it = g_arcilator_forces.begin(); it != g_arcilator_forces.end();) {",
-    "    if (it->key != key) {",
+    "    if (!same_hdl_region(it->resolved, r)) {",
     "      ++it;",
     "      continue;",
     "    }",
     "    arcilator_apply_force_value(it->resolved, it->saved.data());",
     "    it = g_arcilator_forces.erase(it);",
     "  }",
+    "  arcilator_forces_changed();",
     "  arcilator_apply_forces();",
     "  return 1;",
     "}",
     "",
+    "extern \"C\" int uvm_hdl_check_path(const char* path) {",
+    "  if (!g_arcilator_state) return 0;",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return 0;",
+    "  return (r.numBits <= kUvmHdlMaxBits) ? 1 : 0;",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_read(const char* path, svLogicVecVal* value) {",
+    "  if (!g_arcilator_state) return 0;",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return 0;",
+    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "  return arcilator_hdl_read(r, value);",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_deposit(const char* path, const svLogicVecVal* value) {",
+    "  if (!g_arcilator_state) return 0;",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return 0;",
+    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "  return arcilator_hdl_deposit(r, value);",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_force(const char* path, const svLogicVecVal* value) {",
+    "  if (!g_arcilator_state || !path || !*path || !value) return 0;",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return 0;",
+    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "  return arcilator_hdl_force(r, path, value);",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_release(const char* path) {",
+    "  if (!g_arcilator_state || !path || !*path) return 0;",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return 0;",
+    "  if (r.numBits > kUvmHdlMaxBits) return 0;",
+    "  return arcilator_hdl_release(r);",
+    "}",
+    "",
     "extern \"C\" int uvm_hdl_release_and_read(const char* path, svLogicVecVal* value) {",
     "  if (!g_arcilator_state) return 0;",
     "  if (!uvm_hdl_release(path)) return 0;",
     "  return uvm_hdl_read(path, value);",
     "}",
     "",
+    "// Handle-based access: resolve a path once with uvm_hdl_get_handle(), then",
+    "// read/deposit/force/release by handle with no lookup at all. Handles stay",
+    "// valid for the whole run; the same bit range always gets the same handle.",
+    "struct ArcilatorHdlHandle {",
+    "  ArcilatorHdlResolved resolved;",
+    "  std::string key;",
+    "};",
+    "",
+    "static std::vector<ArcilatorHdlHandle> g_arcilator_hdl_handles;",
+    "",
+    "static const ArcilatorHdlHandle* arcilator_hdl_handle(int handle) {",
+    "  if (!g_arcilator_state || handle < 0) return nullptr;",
+    "  if (static_cast<size_t>(handle) >= g_arcilator_hdl_handles.size()) return nullptr;",
+    "  return &g_arcilator_hdl_handles[static_cast<size_t>(handle)];",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_get_handle(const char* path) {",
+    "  ArcilatorHdlResolved r;",
+    "  if (!resolve_arcilator_path(path, &r)) return -1;",
+    "  if (r.numBits > kUvmHdlMaxBits) return -1;",
+    "  for (size_t i = 0; i < g_arcilator_hdl_handles.size(); ++i) {",
+    "    if (same_hdl_region(g_arcilator_hdl_handles[i].resolved, r)) return static_cast<int>(i);",
+    "  }",
+    "  g_arcilator_hdl_handles.push_back({r, normalize_uvm_path(path)});",
+    "  return static_cast<int>(g_arcilator_hdl_handles.size() - 1);",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_read_handle(int handle, svLogicVecVal* value) {",
+    "  const auto* h = arcilator_hdl_handle(handle);",
+    "  return h ? arcilator_hdl_read(h->resolved, value) : 0;",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_deposit_handle(int handle, const svLogicVecVal* value) {",
+    "  const auto* h = arcilator_hdl_handle(handle);",
+    "  return h ? arcilator_hdl_deposit(h->resolved, value) : 0;",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_force_handle(int handle, const svLogicVecVal* value) {",
+    "  const auto* h = arcilator_hdl_handle(handle);",
+    "  if (!h || !value) return 0;",
+    "  return arcilator_hdl_force(h->resolved, h->key.c_str(), value);",
+    "}",
+    "",
+    "extern \"C\" int uvm_hdl_release_handle(int handle) {",
+    "  const auto* h = arcilator_hdl_handle(handle);",
+    "  return h ? arcilator_hdl_release(h->resolved) : 0;",
+    "}",
+    "",
   ]
 
   lines += [
@@ -3271,29 +4199,306 @@ if enable_uvm_hdl:
     "",
   ]
 
+# Stimulus replay (tools/vcd_to_stimulus.py writes the file): the input ports
+# are matched by name at load time, then each step is one memcpy per port.
+stim_ports = []
+for st in inputs:
+  bits = int(st.get("numBits", 0))
+  if bits <= 0:
+    continue
+  stim_ports.append(
+    "  {" + cpp_str(st.get("name")) + f", {bits}u, {value_byte_offset(st)}u, "
+    f"{unknown_byte_offset(st)}u, {four_state_field_bytes(st)}u" + "},"
+  )
 lines += [
-  "int main(int argc, char** argv) {",
-  f"  constexpr uint64_t kSteps = {cycles};",
-  f"  constexpr uint64_t kResetSteps = {reset_cycles};",
-  f"  constexpr uint64_t kSeed = {seed}ull;",
-  f"  constexpr uint64_t kVcdDt = {vcd_dt}ull;",
+  "struct ArcilatorStimPort {",
+  "  const char* name;",
+  "  uint32_t numBits;",
+  "  uint32_t offset;",
+  "  uint32_t unknownOffset;",
+  "  uint32_t unknownBytes;",
+  "};",
+  "",
+  "static const ArcilatorStimPort kArcilatorStimPorts[] = {",
+]
+lines += stim_ports or ["  {\"\", 0u, 0u, 0u, 0u},"]
+lines += [
+  "};",
+  "",
+  "// Binary stimulus (ARCILATOR_STIMULUS): \"ARCSTIM1\", u32 port count, u32",
+  "// frame bytes, u64 frame count, then per port u32 numBits, u32 name length",
+  "// and the name, zero-padded to 8 bytes, then the frames. A frame holds each",
+  "// port's value as little-endian bytes in port order. Frame i is the input",
+  "// state at VCD time i * dt: frame 0 is driven before time 0 settles and",
+  "// frame t + 1 in step t; past the last frame the inputs hold.",
+  "class ArcilatorStimulus {",
+  " public:",
+  "  ~ArcilatorStimulus() {",
+  "    if (map_) ::munmap(map_, map_len_);",
+  "  }",
+  "",
+  "  bool open(const char* path) {",
+  "    const int fd = ::open(path, O_RDONLY);",
+  "    if (fd < 0) return false;",
+  "    struct stat sb;",
+  "    if (::fstat(fd, &sb) != 0 || sb.st_size < 24) {",
+  "      ::close(fd);",
+  "      return false;",
+  "    }",
+  "    map_len_ = static_cast<size_t>(sb.st_size);",
+  "    void* m = ::mmap(nullptr, map_len_, PROT_READ, MAP_PRIVATE, fd, 0);",
+  "    ::close(fd);",
+  "    if (m == MAP_FAILED) return false;",
+  "    map_ = m;",
+  "    const uint8_t* p = static_cast<const uint8_t*>(map_);",
+  "    const uint8_t* end = p + map_len_;",
+  "    if (std::memcmp(p, \"ARCSTIM1\", 8) != 0) return false;",
+  "    uint32_t nports = 0;",
+  "    uint64_t nframes = 0;",
+  "    std::memcpy(&nports, p + 8, 4);",
+  "    std::memcpy(&frame_bytes_, p + 12, 4);",
+  "    std::memcpy(&nframes, p + 16, 8);",
+  "    p += 24;",
+  "    uint32_t frame_off = 0;",
+  "    for (uint32_t i = 0; i < nports; ++i) {",
+  "      uint32_t bits = 0, name_len = 0;",
+  "      if (end - p < 8) return false;",
+  "      std::memcpy(&bits, p, 4);",
+  "      std::memcpy(&name_len, p + 4, 4);",
+  "      p += 8;",
+  "      if (static_cast<uint64_t>(end - p) < name_len) return false;",
+  "      const std::string name(reinterpret_cast<const char*>(p), name_len);",
+  "      p += name_len;",
+  "      const uint32_t nbytes = (bits + 7u) / 8u;",
+  "      const ArcilatorStimPort* port = nullptr;",
+  "      for (const auto& sp : kArcilatorStimPorts) {",
+  "        if (sp.numBits && name == sp.name) port = &sp;",
+  "      }",
+  "      if (!port) {",
+  "        std::cerr << \"[arcilator] stimulus: no input port \" << name << \", ignored\\n\";",
+  "      } else {",
+  "        if (port->numBits != bits) {",
+  "          std::cerr << \"[arcilator] stimulus: \" << name << \" is \" << bits << \" bits in the stimulus, \"",
+  "                    << port->numBits << \" in the model\\n\";",
+  "        }",
+  "        const uint32_t port_bytes = (port->numBits + 7u) / 8u;",
+  "        copies_.push_back({port->offset, frame_off, (nbytes < port_bytes) ? nbytes : port_bytes});",
+  "        if (port->unknownBytes) clears_.push_back({port->unknownOffset, port->unknownBytes});",
+  "      }",
+  "      frame_off += nbytes;",
+  "    }",
+  "    if (frame_off != frame_bytes_) return false;",
+  "    const size_t hdr = static_cast<size_t>(p - static_cast<const uint8_t*>(map_) + 7) & ~size_t(7);",
+  "    if (hdr > map_len_) return false;",
+  "    if (frame_bytes_ && nframes > (map_len_ - hdr) / frame_bytes_) return false;",
+  "    frames_ = static_cast<const uint8_t*>(map_) + hdr;",
+  "    nframes_ = nframes;",
+  "    ::madvise(map_, map_len_, MADV_SEQUENTIAL);",
+  "    return true;",
+  "  }",
+  "",
+  "  uint64_t frames() const { return nframes_; }",
+  "",
+  "  void apply(uint64_t i, uint8_t* state) const {",
+  "    const uint8_t* frame = frames_ + i * frame_bytes_;",
+  "    for (const auto& c : copies_) std::memcpy(state + c[0], frame + c[1], c[2]);",
+  "    for (const auto& c : clears_) std::memset(state + c[0], 0, c[1]);",
+  "  }",
+  "",
+  " private:",
+  "  void* map_ = nullptr;",
+  "  size_t map_len_ = 0;",
+  "  const uint8_t* frames_ = nullptr;",
+  "  uint64_t nframes_ = 0;",
+  "  uint32_t frame_bytes_ = 0;",
+  "  std::vector<std::array<uint32_t, 3>> copies_;",
+  "  std::vector<std::array<uint32_t, 2>> clears_;",
+  "};",
+  "",
+]
+
+# Checkpoint file: magic, then a header of format version, endianness
+# marker, layout hash (state.json model + generated driver), state size and
+# timebase, step position; then the raw model state, the scheduler runtime
+# and (with UVM HDL access) active forces.
+lines += [
+  "static const char kArcilatorCkptMagic[8] = {'A', 'R', 'C', 'C', 'K', 'P', 'T', '\\0'};",
+  "static const uint64_t kArcilatorCkptVersion = 2ull;",
+  "static const uint64_t kArcilatorCkptEndian = 0x0102030405060708ull;",
+  "static const uint64_t kArcilatorCkptLayout = @CKPT_LAYOUT@ull;",
+  "",
+  "static bool arcilator_driver_checkpoint_save(const char* path, const uint8_t* state, uint64_t state_bytes,",
+  "                                             uint64_t dt_fs, uint64_t vcd_dt, uint64_t t, uint64_t sim_time) {",
+  "  std::FILE* f = std::fopen(path, \"wb\");",
+  "  if (!f) return false;",
+  "  const uint64_t hdr[8] = {kArcilatorCkptVersion, kArcilatorCkptEndian, kArcilatorCkptLayout,",
+  "                           state_bytes, dt_fs, vcd_dt, t, sim_time};",
+  "  std::fwrite(kArcilatorCkptMagic, 1, sizeof(kArcilatorCkptMagic), f);",
+  "  std::fwrite(hdr, sizeof(hdr[0]), 8, f);",
+  "  std::fwrite(state, 1, static_cast<size_t>(state_bytes), f);",
+  "  arcilator_checkpoint_write(f);",
+]
+if enable_uvm_hdl:
+  lines += [
+    "  arcilator_forces_checkpoint_write(f);",
+  ]
+lines += [
+  "  const bool ok = !std::ferror(f);",
+  "  return (std::fclose(f) == 0) && ok;",
+  "}",
+  "",
+  "// On failure *why says what did not match.",
+  "static bool arcilator_driver_checkpoint_load(const char* path, uint8_t* state, uint64_t state_bytes,",
+  "                                             uint64_t dt_fs, uint64_t vcd_dt, uint64_t* t, uint64_t* sim_time,",
+  "                                             const char** why) {",
+  "  std::FILE* f = std::fopen(path, \"rb\");",
+  "  *why = \"cannot open file\";",
+  "  if (!f) return false;",
+  "  char magic[sizeof(kArcilatorCkptMagic)] = {};",
+  "  uint64_t hdr[8] = {};",
+  "  bool ok = false;",
+  "  if (std::fread(magic, 1, sizeof(magic), f) != sizeof(magic) ||",
+  "      std::memcmp(magic, kArcilatorCkptMagic, sizeof(magic)) != 0) {",
+  "    *why = \"not a checkpoint (or an older format)\";",
+  "  } else if (std::fread(hdr, sizeof(hdr[0]), 8, f) != 8) {",
+  "    *why = \"truncated header\";",
+  "  } else if (hdr[1] != kArcilatorCkptEndian) {",
+  "    *why = \"written on a host with a different byte order\";",
+  "  } else if (hdr[0] != kArcilatorCkptVersion) {",
+  "    *why = \"unsupported checkpoint format version\";",
+  "  } else if (hdr[2] != kArcilatorCkptLayout || hdr[3] != state_bytes) {",
+  "    *why = \"written by a different model or driver\";",
+  "  } else if (hdr[4] != dt_fs || hdr[5] != vcd_dt) {",
+  "    *why = \"timebase differs (ARCILATOR_SIM_DT_FS / ARCILATOR_VCD_DT)\";",
+  "  } else {",
+  "    *why = \"truncated state\";",
+  "    ok = std::fread(state, 1, static_cast<size_t>(state_bytes), f) == state_bytes &&",
+  "         arcilator_checkpoint_read(f);",
+]
+if enable_uvm_hdl:
+  lines += [
+    "    ok = ok && arcilator_forces_checkpoint_read(f);",
+  ]
+lines += [
+  "  }",
+  "  std::fclose(f);",
+  "  if (!ok) return false;",
+  "  *t = hdr[6];",
+  "  *sim_time = hdr[7];",
+  "  return true;",
+  "}",
+  "",
+]
+
+lines += [
+  "// Step the main loop is in, printed as `[arcilator] end step <t>` when the",
+  "// run ends if ARCILATOR_REPORT_END_STEP=1 (trace-on-failure reruns aim",
+  "// their VCD window at it). atexit() covers $finish exiting from eval().",
+  "static thread_local uint64_t g_arcilator_step = 0;",
+  "static thread_local bool g_arcilator_report_end_step = false;",
+  "",
+  "static void arcilator_report_end_step() {",
+  "  if (!g_arcilator_report_end_step) return;",
+  "  g_arcilator_report_end_step = false;",
+  "  std::cerr << \"[arcilator] end step \" << g_arcilator_step << \"\\n\";",
+  "}",
+  "",
+  "static int arcilator_simulate(int argc, char** argv, const char* vcd_path, const uint64_t* seed_override) {",
+  "  // Run parameters are read at run time so one driver.bin serves cycle,",
+  "  // seed and timestep sweeps: `+arcilator_<name>=` plusargs override the",
+  "  // ARCILATOR_* environment exported by the runner.",
+  "  const uint64_t kSteps = arcilator_run_param(argc, argv, \"+arcilator_cycles=\", \"ARCILATOR_CYCLES\", 128ull);",
+  "  const uint64_t kResetSteps = arcilator_run_param(argc, argv, \"+arcilator_reset_cycles=\", \"ARCILATOR_RESET_CYCLES\", 2ull);",
+  "  const uint64_t kSeed = arcilator_run_param(argc, argv, \"+arcilator_seed=\", \"ARCILATOR_SEED\", 1ull);",
+  "  const uint64_t kVcdDt = arcilator_run_param(argc, argv, \"+arcilator_vcd_dt=\", \"ARCILATOR_VCD_DT\", 10ull);",
   "  const uint64_t dt_fs_env = parse_u64_env(\"ARCILATOR_SIM_DT_FS\", kVcdDt * 1000000ull);",
   "  const uint64_t dt_fs = dt_fs_env ? dt_fs_env : 1ull;",
   "  const uint64_t delta_limit_env = parse_u64_env(\"ARCILATOR_DELTA_LIMIT\", 32ull);",
   "  const uint32_t delta_limit = delta_limit_env ? static_cast<uint32_t>(delta_limit_env) : 1u;",
   "  const bool stop_on_uvm_done = parse_u64_env(\"ARCILATOR_STOP_ON_UVM_DONE\", 1ull) != 0ull;",
-  "  g_arcilator_now_fs = 0;",
+  "  // Only re-run deltas while a committed change has someone sensitive to it.",
+  "  const bool delta_sensitivity = parse_u64_env(\"ARCILATOR_DELTA_SENSITIVITY\", 0ull) != 0ull;",
+  "  arcilator_sensitivity_enable(delta_sensitivity);",
+  "  const char* delta_hist_env = std::getenv(\"ARCILATOR_DELTA_HIST\");",
+  "  const bool delta_hist_enabled = delta_hist_env && *delta_hist_env && std::strcmp(delta_hist_env, \"0\") != 0;",
+  "  std::vector<uint64_t> delta_hist(static_cast<size_t>(delta_limit) + 1u, 0ull);",
+  "  uint64_t capped_steps = 0;",
+  "  uint64_t& now_fs = arcilator_ctx().now_fs;",
+  "  now_fs = 0;",
   "  const uint64_t trace_start = parse_u64_env(\"ARCILATOR_TRACE_START\", 0);",
   "  const uint64_t trace_cycles = parse_u64_env(\"ARCILATOR_TRACE_CYCLES\", kSteps);",
   "  uint64_t trace_end = trace_start + trace_cycles;",
   "  if (trace_end < trace_start) trace_end = ~0ull;",
+  "  g_arcilator_step = 0;",
+  "  g_arcilator_report_end_step = parse_u64_env(\"ARCILATOR_REPORT_END_STEP\", 0ull) != 0ull;",
+  "  static const bool end_step_atexit_registered = std::atexit(arcilator_report_end_step) == 0;",
+  "  (void)end_step_atexit_registered;",
+  "  struct EndStepGuard {",
+  "    ~EndStepGuard() { arcilator_report_end_step(); }",
+  "  } end_step_guard;",
   "  uint64_t sim_time = 0;",
   "  bool prev_trace = false;",
+  "  // Checkpoint/restore: save the full simulation state at the start of step",
+  "  // ARCILATOR_CHECKPOINT_AT (required with a save path), or resume from one.",
+  "  const char* ckpt_save_path = std::getenv(\"ARCILATOR_CHECKPOINT_SAVE\");",
+  "  const char* ckpt_load_path = std::getenv(\"ARCILATOR_CHECKPOINT_LOAD\");",
+  "  const char* ckpt_at_env = std::getenv(\"ARCILATOR_CHECKPOINT_AT\");",
+  "  if (ckpt_save_path && *ckpt_save_path && !(ckpt_at_env && *ckpt_at_env)) {",
+  "    std::cerr << \"error: ARCILATOR_CHECKPOINT_SAVE needs ARCILATOR_CHECKPOINT_AT=<step>\\n\";",
+  "    return 1;",
+  "  }",
+  "  const uint64_t ckpt_at = (ckpt_save_path && *ckpt_save_path) ? parse_u64_env(\"ARCILATOR_CHECKPOINT_AT\", 0ull) : ~0ull;",
+  "  const bool ckpt_exit = parse_u64_env(\"ARCILATOR_CHECKPOINT_EXIT\", 0ull) != 0ull;",
+]
+if ckpt_refusal:
+  lines += [
+    "  // Heap-backed runtime state (class objects, queues, strings, mailboxes,",
+    "  // randomize) is not part of a checkpoint: restoring process frames into a",
+    "  // fresh heap would run on dangling state, so refuse instead of simulating",
+    "  // garbage.",
+    "  if ((ckpt_save_path && *ckpt_save_path) || (ckpt_load_path && *ckpt_load_path)) {",
+    "    std::cerr << \"error: ARCILATOR_CHECKPOINT_SAVE/LOAD are not supported for this model \"",
+    f"                 \"(heap state is not checkpointed: {ckpt_refusal})\\n\";",
+    "    return 1;",
+    "  }",
+  ]
+lines += [
+  "  uint64_t start_t = 0;",
+  "  bool restored = false;",
+  "  // Stimulus replay replaces the generated input drive.",
+  "  ArcilatorStimulus stim;",
+  "  const char* stim_path = std::getenv(\"ARCILATOR_STIMULUS\");",
+  "  if (stim_path && *stim_path) {",
+  "    if (!stim.open(stim_path)) {",
+  "      std::cerr << \"failed to load stimulus: \" << stim_path << \"\\n\";",
+  "      return 1;",
+  "    }",
+  "    std::cerr << \"[arcilator] stimulus: \" << stim.frames() << \" frames from \" << stim_path << \"\\n\";",
+  "  }",
+]
+if enable_profile:
+  lines += [
+    "  ArcilatorProfile prof;",
+    "  prof.path = arcilator_prof_path(vcd_path);",
+    "  g_arcilator_prof = &prof;",
+    "  struct ProfGuard {",
+    "    ~ProfGuard() { arcilator_prof_finish(); }",
+    "  } prof_guard;",
+    "  static const bool prof_atexit_registered = std::atexit(arcilator_prof_finish) == 0;",
+    "  (void)prof_atexit_registered;",
+  ]
+if event_driven_ok:
+  lines += [
+    "  const bool event_driven = !stim.frames() && parse_u64_env(\"ARCILATOR_EVENT_DRIVEN\", 0ull) != 0ull;",
+    "  uint64_t skipped_steps = 0;",
+  ]
+lines += [
   f"  {model_name} dut;",
   "  arcilator_seed_sig_inits();",
   "  uint64_t rand_seed = kSeed;",
   "  uint64_t ntb_seed = 0;",
   "  if (parse_plusarg_u64(argc, argv, \"+ntb_random_seed=\", &ntb_seed)) rand_seed = ntb_seed;",
+  "  if (seed_override) rand_seed = *seed_override;",
   "  circt_sv_rand_seed(rand_seed);",
 ]
 if enable_uvm_hdl:
@@ -3302,18 +4507,66 @@ if enable_uvm_hdl:
     "  arcilator_uvm_set_state(dut.view.state);",
   ]
 lines += [
-  "  const char* vcd_path = (argc > 1) ? argv[1] : \"wave.vcd\";",
-  "  std::ofstream vcd(vcd_path);",
-  "  if (!vcd) { std::cerr << \"failed to open VCD output: \" << vcd_path << \"\\n\"; return 1; }",
+  "  // VCD backend: `ofstream` (legacy), `buffered` (default) or `async`.",
+  "  // ARCILATOR_TRACE_CYCLES=0 writes no VCD at all (not even the header):",
+  "  // the stream has no buffer, so every write is a no-op.",
+  "  const char* vcd_backend_env = std::getenv(\"ARCILATOR_VCD_BACKEND\");",
+  "  const std::string vcd_backend = (vcd_backend_env && *vcd_backend_env) ? vcd_backend_env : \"buffered\";",
+  "  const bool vcd_off = (trace_cycles == 0);",
+  "  const bool vcd_legacy = (vcd_backend == \"ofstream\");",
+  "  std::ofstream vcd_file;",
+  "  std::unique_ptr<ArcilatorVcdBuf> vcd_buf;",
+  "  if (vcd_off) {",
+  "  } else if (vcd_legacy) {",
+  "    vcd_file.open(vcd_path);",
+  "    if (!vcd_file) { std::cerr << \"failed to open VCD output: \" << vcd_path << \"\\n\"; return 1; }",
+  "  } else {",
+  "    const int vcd_fd = ::open(vcd_path, O_WRONLY | O_CREAT | O_TRUNC, 0644);",
+  "    if (vcd_fd < 0) { std::cerr << \"failed to open VCD output: \" << vcd_path << \"\\n\"; return 1; }",
+  "    const uint64_t vcd_block_kb = parse_u64_env(\"ARCILATOR_VCD_BUFFER_KB\", 1024ull);",
+  "    vcd_buf.reset(new ArcilatorVcdBuf(vcd_fd, static_cast<size_t>(vcd_block_kb ? vcd_block_kb : 1ull) * 1024u, vcd_backend == \"async\"));",
+  "    g_arcilator_vcd_buf = vcd_buf.get();",
+  "    static const bool vcd_atexit_registered =",
+  "        std::atexit([]() { if (g_arcilator_vcd_buf) g_arcilator_vcd_buf->finish(); }) == 0;",
+  "    (void)vcd_atexit_registered;",
+  "  }",
+  "  std::ostream vcd(vcd_off ? nullptr : vcd_legacy ? static_cast<std::streambuf*>(vcd_file.rdbuf()) : vcd_buf.get());",
+  "  // Change-only dumping: skip writeTimestep() entirely while the traced model",
+  "  // state is byte-identical to the last dumped step.",
+  f"  constexpr size_t kStateBytes = {state_bytes}u;",
+  "  const bool vcd_change_only = !vcd_off && !vcd_legacy && kStateBytes && parse_u64_env(\"ARCILATOR_VCD_CHANGE_ONLY\", 1ull) != 0ull;",
+  "  std::vector<uint8_t> vcd_shadow(vcd_change_only ? kStateBytes : 0u);",
+  "  static const uint32_t kVcdTraceSpans[][2] = {" + ", ".join(f"{{{o}u, {e - o}u}}" for o, e in (trace_spans or [(0, 0)])) + "};",
+  "  auto vcd_state_changed = [&]() {",
+  "    for (const auto &span : kVcdTraceSpans) {",
+  "      if (std::memcmp(vcd_shadow.data() + span[0], dut.view.state + span[0], span[1]) != 0) return true;",
+  "    }",
+  "    return false;",
+  "  };",
+  "  auto vcd_state_snapshot = [&]() {",
+  "    for (const auto &span : kVcdTraceSpans) std::memcpy(vcd_shadow.data() + span[0], dut.view.state + span[0], span[1]);",
+  "  };",
   "",
 ]
 lines += preamble_lines
 lines += [
+  "  if (ckpt_load_path && *ckpt_load_path) {",
+  "    // Restoring replaces the time-0 initialization; the RNG is still seeded",
+  "    // from this run's seed, so seed sweeps can share one warm checkpoint.",
+  "    const char* why = \"\";",
+  "    if (!arcilator_driver_checkpoint_load(ckpt_load_path, dut.view.state, kStateBytes, dt_fs, kVcdDt, &start_t, &sim_time, &why)) {",
+  "      std::cerr << \"failed to restore checkpoint: \" << ckpt_load_path << \" (\" << why << \")\\n\";",
+  "      return 1;",
+  "    }",
+  "    restored = true;",
+  "    std::cerr << \"[arcilator] checkpoint: restored step \" << start_t << \" from \" << ckpt_load_path << \"\\n\";",
+  "  }",
+  "",
   "  // Drive initial input values (t=0).",
-  "  {",
+  "  if (!restored) {",
   "    const uint64_t t = 0;",
 ]
-lines += drive_lines
+lines += stim_drive("0", "")
 lines += [
   "  }",
   "",
@@ -3329,14 +4582,14 @@ lines += [
   "  // Note: some LLHD/SV constructs schedule work for the *next* delta cycle",
   "  // even if no visible signal changed in the current one. Run at least two",
   "  // delta iterations before early-exiting so time-0 initialization settles.",
-  "  for (uint32_t delta = 0; delta < delta_limit; ++delta) {",
-  "    dut.eval();",
-  "    const bool changed = __arcilator_sig_commit();",
+  "  for (uint32_t delta = 0; !restored && delta < delta_limit; ++delta) {",
 ]
+lines += prof("Eval", ["    dut.eval();"])
+lines += prof("Commit", ["    const bool changed = __arcilator_sig_commit();"])
 if enable_uvm_hdl:
-  lines += [
+  lines += prof("Forces", [
     "    arcilator_apply_forces();",
-  ]
+  ])
 lines += [
   "    if (!changed && delta > 0) break;",
   "  }",
@@ -3351,47 +4604,131 @@ lines += [
   "  // the time-0 settled state (more comparable to Verilator tracing).",
   "  auto vcd_writer = dut.vcd(vcd);",
   "",
-  "  for (uint64_t t = 0; t < kSteps; ++t) {",
+  "  for (uint64_t t = start_t; t < kSteps; ++t) {",
+  "    g_arcilator_step = t;",
+  "    if (t == ckpt_at) {",
+  "      if (!arcilator_driver_checkpoint_save(ckpt_save_path, dut.view.state, kStateBytes, dt_fs, kVcdDt, t, sim_time)) {",
+  "        std::cerr << \"failed to write checkpoint: \" << ckpt_save_path << \"\\n\";",
+  "        return 1;",
+  "      }",
+  "      std::cerr << \"[arcilator] checkpoint: saved step \" << t << \" to \" << ckpt_save_path << \"\\n\";",
+  "      if (ckpt_exit) return 0;",
+  "    }",
 ]
-lines += drive_lines
+lines += prof("Drive", stim_drive("t + 1", "t + 1 < stim.frames()"))
 
 if enable_uvm_hdl:
-  lines += [
+  lines += prof("Forces", [
     "    arcilator_apply_forces();",
-  ]
+  ])
 lines += [
-  "    if (g_arcilator_now_fs > (~0ull - dt_fs)) g_arcilator_now_fs = ~0ull; else g_arcilator_now_fs += dt_fs;",
+  "    if (now_fs > (~0ull - dt_fs)) now_fs = ~0ull; else now_fs += dt_fs;",
+  "    bool settled = false;",
+  "    uint32_t deltas = 0;",
   "    for (uint32_t delta = 0; delta < delta_limit; ++delta) {",
-  "      dut.eval();",
-  "      const bool changed = __arcilator_sig_commit();",
 ]
+lines += prof("Eval", ["      dut.eval();"])
+lines += [
+  "      ++deltas;",
+]
+lines += prof("Commit", ["      const bool changed = __arcilator_sig_commit();"])
 if enable_uvm_hdl:
-  lines += [
+  lines += prof("Forces", [
     "      arcilator_apply_forces();",
-  ]
+  ])
 lines += [
-  "      if (!changed && delta > 0) break;",
+  "      const bool rerun = delta_sensitivity ? arcilator_commit_woke() : changed;",
+  "      if (!rerun && delta > 0) { settled = true; break; }",
   "    }",
+  "    ++delta_hist[deltas];",
+  "    // Settling on the last allowed delta is not capped; running out is.",
+  "    if (!settled) ++capped_steps;",
 ]
-if enable_uvm_hdl:
+if enable_profile:
   lines += [
-    "    arcilator_apply_forces();",
+    "    ++prof.steps;",
+    "    prof.deltas += deltas;",
   ]
+if enable_uvm_hdl:
+  lines += prof("Forces", [
+    "    arcilator_apply_forces();",
+  ])
 lines += post_eval_lines
 lines += [
   "    sim_time += kVcdDt;",
   "    const bool trace = (trace_cycles != 0) && (t >= trace_start) && (t < trace_end);",
+]
+lines += prof("Vcd", [
   "    if (trace) {",
-  "      if (!prev_trace) vcd_writer.time = sim_time - kVcdDt;",
-  "      vcd_writer.writeTimestep(kVcdDt);",
+  "      if (!vcd_change_only) {",
+  "        if (!prev_trace) vcd_writer.time = sim_time - kVcdDt;",
+  "        vcd_writer.writeTimestep(kVcdDt);",
+  "      } else if (!prev_trace || vcd_state_changed()) {",
+  "        vcd_writer.time = sim_time - kVcdDt;",
+  "        vcd_writer.writeTimestep(kVcdDt);",
+  "        vcd_state_snapshot();",
+  "      }",
   "    }",
+])
+lines += [
   "    prev_trace = trace;",
 ]
 lines += loop_checks
 lines += [
   "    if (stop_on_uvm_done && circt_uvm_phase_all_done()) break;",
 ]
+if event_driven_ok:
+  lines += [
+    "    // Event-driven mode: once the deltas settled, the next step that can do",
+    "    // any work is the one whose now_fs reaches the earliest delay wait.",
+    "    // Step n runs with now_fs == (n + 1) * dt_fs, so jump straight there and",
+    "    // keep sim_time/VCD time in step with the skipped steps.",
+    "    if (event_driven && settled) {",
+    "      const uint64_t wake_fs = arcilator_next_wake_fs();",
+    "      uint64_t next_t = kSteps;",
+    "      if (wake_fs != ~0ull) {",
+    "        const uint64_t wake_step = wake_fs / dt_fs + ((wake_fs % dt_fs) ? 1u : 0u);",
+    "        next_t = wake_step ? wake_step - 1u : 0u;",
+    "      }",
+    "      if (next_t > kSteps) next_t = kSteps;",
+    "      // Land on the first traced step so the window opens with a full dump.",
+    "      if (t + 1u < trace_start && next_t > trace_start) next_t = trace_start;",
+    "      if (t + 1u < ckpt_at && next_t > ckpt_at) next_t = ckpt_at;",
+    "      if (next_t > t + 1u) {",
+    "        skipped_steps += next_t - (t + 1u);",
+    "        t = next_t - 1u;",
+    "        now_fs = (next_t > ~0ull / dt_fs) ? ~0ull : next_t * dt_fs;",
+    "        sim_time = next_t * kVcdDt;",
+    "        vcd_writer.time = sim_time;",
+    "      }",
+    "    }",
+  ]
+lines += [
+  "  }",
+]
+if event_driven_ok:
+  lines += [
+    "  if (event_driven)",
+    "    std::cerr << \"[arcilator] event-driven: skipped \" << skipped_steps << \" of \" << kSteps << \" steps\\n\";",
+  ]
 lines += [
+  "  if (delta_hist_enabled) {",
+  "    // ARCILATOR_DELTA_HIST=1 writes delta_hist.json to the cwd; any other",
+  "    // value is taken as the output path.",
+  "    const char* hist_path = (std::strcmp(delta_hist_env, \"1\") == 0) ? \"delta_hist.json\" : delta_hist_env;",
+  "    std::ofstream hist(hist_path);",
+  "    uint64_t hist_steps = 0;",
+  "    for (uint64_t n : delta_hist) hist_steps += n;",
+  "    hist << \"{\\\"steps\\\": \" << hist_steps << \", \\\"delta_limit\\\": \" << delta_limit",
+  "         << \", \\\"sensitivity\\\": \" << (delta_sensitivity ? \"true\" : \"false\")",
+  "         << \", \\\"capped\\\": \" << capped_steps << \", \\\"histogram\\\": {\";",
+  "    bool first = true;",
+  "    for (size_t n = 1; n < delta_hist.size(); ++n) {",
+  "      if (!delta_hist[n]) continue;",
+  "      hist << (first ? \"\" : \", \") << \"\\\"\" << n << \"\\\": \" << delta_hist[n];",
+  "      first = false;",
+  "    }",
+  "    hist << \"}}\\n\";",
   "  }",
 ]
 lines += final_checks
@@ -3403,13 +4740,287 @@ lines += [
   "  __arcilator_sig_commit();",
   "  const bool trace_final = (trace_cycles != 0) && (kSteps >= trace_start) && (kSteps <= trace_end);",
   "  if (trace_final) {",
-  "    if (!prev_trace) vcd_writer.time = sim_time;",
+  "    if (!prev_trace || vcd_change_only) vcd_writer.time = sim_time;",
   "    vcd_writer.writeTimestep(0);",
   "  }",
   "  return 0;",
   "}",
+  "",
+  "// `out/wave.vcd` -> `out/wave`",
+  "static std::string arcilator_vcd_stem(const std::string& path) {",
+  "  const size_t slash = path.find_last_of('/');",
+  "  const size_t dot = path.find_last_of('.');",
+  "  const bool has_ext = dot != std::string::npos && (slash == std::string::npos || dot > slash);",
+  "  return has_ext ? path.substr(0, dot) : path;",
+  "}",
+  "",
+  "static int arcilator_wait_status(int status) {",
+  "  if (WIFEXITED(status)) return WEXITSTATUS(status);",
+  "  if (WIFSIGNALED(status)) return 128 + WTERMSIG(status);",
+  "  return 1;",
+  "}",
+  "",
+  "struct ArcilatorSeedBatch {",
+  "  std::string stem;",
+  "  std::vector<uint64_t> seeds;",
+  "  std::vector<std::string> vcds;",
+  "  std::vector<int> rcs;  // -1 until the seed's run returned",
+  "};",
+  "",
+  "// Writes `<stem>.seeds.json`; returns the first non-zero rc, 1 if a seed",
+  "// never finished.",
+  "static int arcilator_seed_summary(const ArcilatorSeedBatch& b) {",
+  "  int worst = 0;",
+  "  std::ofstream summary(b.stem + \".seeds.json\");",
+  "  summary << \"[\";",
+  "  for (size_t i = 0; i < b.seeds.size(); ++i) {",
+  "    const int rc = b.rcs[i];",
+  "    if (rc < 0) {",
+  "      std::cerr << \"[arcilator] seed \" << b.seeds[i] << \": did not finish\\n\";",
+  "    } else {",
+  "      std::cerr << \"[arcilator] seed \" << b.seeds[i] << \": rc=\" << rc << \" vcd=\" << b.vcds[i] << \"\\n\";",
+  "    }",
+  "    summary << (i ? \", \" : \"\") << \"{\\\"seed\\\": \" << b.seeds[i] << \", \\\"rc\\\": \";",
+  "    if (rc < 0) summary << \"null\"; else summary << rc;",
+  "    summary << \", \\\"vcd\\\": \\\"\" << b.vcds[i] << \"\\\"}\";",
+  "    if (rc != 0 && !worst) worst = rc < 0 ? 1 : rc;",
+  "  }",
+  "  summary << \"]\\n\";",
+  "  return worst;",
+  "}",
+  "",
+  "// Set while seeds run inside this process: $finish exit()s from inside",
+  "// eval(), which would end the batch at the current seed with the process'",
+  "// rc. The atexit() hook reports the seeds that never finished instead.",
+  "static ArcilatorSeedBatch* g_arcilator_seed_batch = nullptr;",
+  "",
+  "static void arcilator_seed_batch_atexit() {",
+  "  ArcilatorSeedBatch* b = g_arcilator_seed_batch;",
+  "  if (!b) return;",
+  "  g_arcilator_seed_batch = nullptr;",
+  "  std::cerr << \"[arcilator] process exited during an in-process seed batch ($finish?); \"",
+  "               \"run without ARCILATOR_SEED_FORK=0 / ARCILATOR_SEED_THREADS to fork one process per seed\\n\";",
+  "  const int worst = arcilator_seed_summary(*b);",
+  "  std::cout.flush();",
+  "  std::cerr.flush();",
+  "  std::fflush(nullptr);",
+  "  std::_Exit(worst ? worst : 1);",
+  "}",
+  "",
+  "int main(int argc, char** argv) {",
+  "  g_arcilator_ctx_init = arcilator_seed_sig_inits;",
+]
+if enable_profile:
+  lines += [
+    "#ifdef __linux__",
+    "  if (parse_u64_env(\"ARCILATOR_PERF_MAP\", 0ull) != 0ull) arcilator_write_perf_map();",
+    "#endif",
+  ]
+lines += [
+  "  const char* vcd_path = (argc > 1) ? argv[1] : \"wave.vcd\";",
+  "  // Multi-seed batch: `+arcilator_seeds=1,2,3` (or ARCILATOR_SEEDS) runs",
+  "  // one simulation per seed (as +ntb_random_seed) with per-seed VCDs and a",
+  "  // `<vcd stem>.seeds.json` summary.",
+  "  std::string seeds_arg;",
+  "  const std::string seeds_prefix = \"+arcilator_seeds=\";",
+  "  for (int i = 1; i < argc; ++i) {",
+  "    if (argv[i] && std::strncmp(argv[i], seeds_prefix.c_str(), seeds_prefix.size()) == 0) seeds_arg = argv[i] + seeds_prefix.size();",
+  "  }",
+  "  if (seeds_arg.empty()) {",
+  "    const char* env = std::getenv(\"ARCILATOR_SEEDS\");",
+  "    if (env) seeds_arg = env;",
+  "  }",
+  "  std::vector<uint64_t> seeds;",
+  "  for (size_t pos = 0; pos < seeds_arg.size();) {",
+  "    size_t end = seeds_arg.find_first_of(\", \", pos);",
+  "    if (end == std::string::npos) end = seeds_arg.size();",
+  "    if (end > pos) seeds.push_back(std::strtoull(seeds_arg.substr(pos, end - pos).c_str(), nullptr, 0));",
+  "    pos = end + 1;",
+  "  }",
+  "  if (seeds.empty()) return arcilator_simulate(argc, argv, vcd_path, nullptr);",
+  "",
+  "  ArcilatorSeedBatch batch;",
+  "  batch.stem = arcilator_vcd_stem(vcd_path);",
+  "  batch.seeds = seeds;",
+  "  batch.rcs.assign(seeds.size(), -1);",
+  "  for (uint64_t seed : seeds) batch.vcds.push_back(batch.stem + \".seed\" + std::to_string(seed) + \".vcd\");",
+  "  std::vector<int>& rcs = batch.rcs;",
+  "  const std::vector<std::string>& vcds = batch.vcds;",
+  "",
+  "  // Warm start: with ARCILATOR_CHECKPOINT_AT (and no ARCILATOR_CHECKPOINT_LOAD)",
+  "  // the steps before it run once, in a forked child that saves a checkpoint",
+  "  // there (to ARCILATOR_CHECKPOINT_SAVE, else `<vcd stem>.warm.ckpt`); every",
+  "  // seed then resumes from it with its own seed instead of re-simulating.",
+  "  const char* warm_at = std::getenv(\"ARCILATOR_CHECKPOINT_AT\");",
+  "  const char* warm_load = std::getenv(\"ARCILATOR_CHECKPOINT_LOAD\");",
+  "  const char* warm_save = std::getenv(\"ARCILATOR_CHECKPOINT_SAVE\");",
+  "  const bool warm_tmp = !(warm_save && *warm_save);",
+  "  const std::string warm_ckpt = warm_tmp ? batch.stem + \".warm.ckpt\" : std::string(warm_save);",
+  "  const bool warm = warm_at && *warm_at && !(warm_load && *warm_load);",
+  "  if (warm) {",
+  "    const std::string warm_vcd = batch.stem + \".warm.vcd\";",
+  "    ::setenv(\"ARCILATOR_CHECKPOINT_SAVE\", warm_ckpt.c_str(), 1);",
+  "    ::setenv(\"ARCILATOR_CHECKPOINT_EXIT\", \"1\", 1);",
+  "    std::remove(warm_ckpt.c_str());",
+  "    std::cout.flush();",
+  "    std::cerr.flush();",
+  "    const pid_t pid = ::fork();",
+  "    if (pid == 0) {",
+  "      const int rc = arcilator_simulate(argc, argv, warm_vcd.c_str(), nullptr);",
+  "      std::cout.flush();",
+  "      std::cerr.flush();",
+  "      std::fflush(nullptr);",
+  "      ::_exit(rc);",
+  "    }",
+  "    int status = 0;",
+  "    int warm_rc = (pid > 0 && ::waitpid(pid, &status, 0) == pid) ? arcilator_wait_status(status) : 1;",
+  "    std::remove(warm_vcd.c_str());",
+  "    ::unsetenv(\"ARCILATOR_CHECKPOINT_SAVE\");",
+  "    ::unsetenv(\"ARCILATOR_CHECKPOINT_EXIT\");",
+  "    if (std::FILE* f = std::fopen(warm_ckpt.c_str(), \"rb\")) {",
+  "      std::fclose(f);",
+  "    } else if (warm_rc == 0) {",
+  "      std::cerr << \"[arcilator] warm start: run ended before step \" << warm_at << \"\\n\";",
+  "      warm_rc = 1;",
+  "    }",
+  "    if (warm_rc != 0) {",
+  "      std::cerr << \"[arcilator] warm start to step \" << warm_at << \" failed (rc=\" << warm_rc << \")\\n\";",
+  "      rcs.assign(seeds.size(), warm_rc);",
+  "      return arcilator_seed_summary(batch);",
+  "    }",
+  "    ::setenv(\"ARCILATOR_CHECKPOINT_LOAD\", warm_ckpt.c_str(), 1);",
+  "    std::cerr << \"[arcilator] warm start: seeds resume from step \" << warm_at << \"\\n\";",
+  "  }",
+  "",
+]
+if not enable_uvm_hdl:
+  lines += [
+    "  // Threaded seeds share the CIRCT runtime's process-wide $urandom state and",
+    "  // its $finish exit(), so they only suit benches that use neither, which",
+    "  // ARCILATOR_SEED_THREADS_UNSAFE=1 confirms. Otherwise the K threads become",
+    "  // K forked children.",
+    "  uint64_t thread_jobs = parse_u64_env(\"ARCILATOR_SEED_THREADS\", 0ull);",
+    "  uint64_t fork_default = 1;",
+    "  if (thread_jobs > 1u && parse_u64_env(\"ARCILATOR_SEED_THREADS_UNSAFE\", 0ull) == 0ull) {",
+    "    std::cerr << \"[arcilator] ARCILATOR_SEED_THREADS: $urandom and $finish are process-wide, \"",
+    "                 \"running \" << thread_jobs << \" forked children instead \"",
+    "                 \"(ARCILATOR_SEED_THREADS_UNSAFE=1 forces threads)\\n\";",
+    "    fork_default = thread_jobs;",
+    "    thread_jobs = 0;",
+    "  }",
+    "  if (thread_jobs > 1u) fork_default = 0;",
+  ]
+else:
+  lines += [
+    "  const uint64_t fork_default = 1;",
+  ]
+lines += [
+  "  // Each seed runs in a child process forked from this one (up to",
+  "  // ARCILATOR_SEED_FORK=N at a time, default 1), so $finish and per-seed",
+  "  // state stay inside the seed. ARCILATOR_SEED_FORK=0 (or thread mode) opts",
+  "  // into running the seeds in this process after a runtime reset.",
+  "  const uint64_t fork_jobs = parse_u64_env(\"ARCILATOR_SEED_FORK\", fork_default);",
+  "  if (fork_jobs) {",
+  "    std::vector<std::pair<pid_t, size_t>> running;",
+  "    auto reap_one = [&]() {",
+  "      int status = 0;",
+  "      const pid_t pid = ::waitpid(-1, &status, 0);",
+  "      for (auto it = running.begin(); it != running.end(); ++it) {",
+  "        if (it->first != pid) continue;",
+  "        rcs[it->second] = arcilator_wait_status(status);",
+  "        running.erase(it);",
+  "        break;",
+  "      }",
+  "    };",
+  "    std::cout.flush();",
+  "    std::cerr.flush();",
+  "    for (size_t i = 0; i < seeds.size(); ++i) {",
+  "      while (running.size() >= fork_jobs) reap_one();",
+  "      const pid_t pid = ::fork();",
+  "      if (pid == 0) {",
+  "        const int rc = arcilator_simulate(argc, argv, vcds[i].c_str(), &seeds[i]);",
+  "        std::cout.flush();",
+  "        std::cerr.flush();",
+  "        std::fflush(nullptr);",
+  "        ::_exit(rc);",
+  "      }",
+  "      if (pid < 0) {",
+  "        std::cerr << \"[arcilator] fork failed for seed \" << seeds[i] << \"\\n\";",
+  "        rcs[i] = 1;",
+  "        continue;",
+  "      }",
+  "      running.push_back({pid, i});",
+  "    }",
+  "    while (!running.empty()) reap_one();",
+  "  } else {",
+  "    g_arcilator_seed_batch = &batch;",
+  "    std::atexit(arcilator_seed_batch_atexit);",
+]
+if not enable_uvm_hdl:
+  # Threads need every per-run global to be per-instance; the UVM HDL tables
+  # and the UVM heap are process-wide, so UVM drivers only get fork/sequential.
+  lines += [
+    "    // ARCILATOR_SEED_THREADS=K runs seeds on K threads, each with its own",
+    "    // scheduler context and model instance.",
+    "    if (thread_jobs > 1u) {",
+    "      std::atomic<size_t> next_seed{0};",
+    "      std::vector<std::thread> workers;",
+    "      for (uint64_t k = 0; k < thread_jobs && k < seeds.size(); ++k) {",
+    "        workers.emplace_back([&]() {",
+    "          void* ctx = arcilator_context_create();",
+    "          arcilator_context_bind(ctx);",
+    "          for (size_t i = next_seed++; i < seeds.size(); i = next_seed++) {",
+    "            arcilator_runtime_reset();",
+    "            rcs[i] = arcilator_simulate(argc, argv, vcds[i].c_str(), &seeds[i]);",
+    "          }",
+    "          arcilator_context_bind(nullptr);",
+    "          arcilator_context_destroy(ctx);",
+    "        });",
+    "      }",
+    "      for (auto &w : workers) w.join();",
+    "    } else {",
+  ]
+else:
+  lines += [
+    "    {",
+  ]
+lines += [
+  "      for (size_t i = 0; i < seeds.size(); ++i) {",
+  "        arcilator_runtime_reset();",
+]
+if enable_uvm_hdl:
+  lines += [
+    "        g_arcilator_forces.clear();",
+    "        arcilator_forces_changed();",
+  ]
+lines += [
+  "        rcs[i] = arcilator_simulate(argc, argv, vcds[i].c_str(), &seeds[i]);",
+  "      }",
+  "    }",
+  "    g_arcilator_seed_batch = nullptr;",
+  "  }",
+  "",
+  "  const int rc = arcilator_seed_summary(batch);",
+  "  if (warm && warm_tmp) std::remove(warm_ckpt.c_str());",
+  "  return rc;",
+  "}",
 ]
 
+# The checkpoint layout hash covers the model's state.json entry and the
+# generated driver, so a checkpoint only loads into the build that wrote it.
+layout = hashlib.sha256(json.dumps(model.to_model(), sort_keys=True).encode())
+layout.update("\n".join(lines).encode())
+lines = [line.replace("@CKPT_LAYOUT@", "0x" + layout.hexdigest()[:16]) for line in lines]
+
+if trace_scope_re:
+  # A view member missing from ARCILATOR_TRACE_KEEP would be dropped from the
+  # scoped header; fail here rather than with a C++ compile error.
+  used = set(re.findall(r"\bview\.((?:[A-Za-z_]\w*\.)*[A-Za-z_]\w*)", "\n".join(lines)))
+  used.discard("state")
+  missing = sorted(ref for ref in used if not any(ref == k or ref.startswith(k + ".") for k in trace_keep))
+  if missing:
+    sys.exit("[error] trace scope: driver uses view members not kept in the scoped header: " + " ".join(missing))
+
 pathlib.Path(cpp_out).write_text("\n".join(lines) + "\n")
 """)
                     script.write("PY\n")
@@ -3448,7 +5059,6 @@ pathlib.Path(cpp_out).write_text("\n".join(lines) + "\n")
                     script.write("if [[ ${obj_rc} -ne 0 ]]; then exit ${obj_rc}; fi\n")
 
                     # Build the simulation driver. Keep flags minimal; users can override CXX.
-                    script.write('echo "[stage] clang++ (driver)"\n')
                     compile_cmd = [
                         cxx,
                         "-std=c++17",
@@ -3458,18 +5068,100 @@ pathlib.Path(cpp_out).write_text("\n".join(lines) + "\n")
                         f"-I{tmp_dir}",
                         "-o",
                         driver_bin,
-                    ] + linux_no_pie + linux_atomic
-                    script.write(self._format_cmd(compile_cmd) + "\n")
-                    script.write("cxx_rc=$?\n")
+                    ] + linux_no_pie + linux_pthread + linux_atomic
+                    if driver_cache_root:
+                        # driver.cpp no longer embeds run parameters, so the
+                        # binary only depends on the model and the generated
+                        # driver (i.e. the driver kind and test hooks). Key the
+                        # cache on those inputs plus the compile command and
+                        # the compiler itself (resolved binary and its
+                        # `--version`, so upgrades and wrappers both count).
+                        runtime_hdr = os.path.join(self._runtime_inc, "arcilator-runtime.h")
+                        tmp_args = (model_obj_path, driver_cpp, f"-I{tmp_dir}", driver_bin)
+                        cxx_bin = shutil.which(cxx) or cxx
+                        compile_key = self._format_cmd([a for a in compile_cmd if a not in tmp_args])
+                        compile_key += " " + json.dumps(
+                            _file_fingerprint(cxx_bin) if os.path.isfile(cxx_bin) else cxx_bin,
+                            sort_keys=True,
+                        )
+                        script.write(
+                            "DRIVER_KEY=$("
+                            + self._format_cmd(
+                                ["python3", "-", compile_key, cxx, driver_cpp, sched_hdr, header_path, model_obj_path, runtime_hdr]
+                            )
+                            + " <<'PY'\n"
+                        )
+                        script.write(
+                            "import hashlib\n"
+                            "import os\n"
+                            "import subprocess\n"
+                            "import sys\n"
+                            "\n"
+                            "h = hashlib.sha256(sys.argv[1].encode())\n"
+                            "try:\n"
+                            "  h.update(subprocess.run([sys.argv[2], '--version'], capture_output=True).stdout)\n"
+                            "except OSError:\n"
+                            "  pass\n"
+                            "for path in sys.argv[3:]:\n"
+                            "  if os.path.isfile(path):\n"
+                            "    with open(path, 'rb') as f:\n"
+                            "      h.update(hashlib.sha256(f.read()).digest())\n"
+                            "print(h.hexdigest()[:16])\n"
+                        )
+                        script.write("PY\n)\n")
+                        script.write(
+                            f'DRIVER_CACHED={shlex.quote(driver_cache_root)}/"${{DRIVER_KEY}}"/driver.bin\n'
+                        )
+                        script.write('if [[ -n "${DRIVER_KEY}" && -x "${DRIVER_CACHED}" ]]; then\n')
+                        script.write('  echo "[stage] clang++ (driver) [cached ${DRIVER_KEY}]"\n')
+                        script.write(f'  cp -f "${{DRIVER_CACHED}}" {shlex.quote(driver_bin)}\n')
+                        script.write("  cxx_rc=$?\n")
+                        script.write("else\n")
+                        script.write('  echo "[stage] clang++ (driver)"\n')
+                        script.write("  " + self._format_cmd(compile_cmd) + "\n")
+                        script.write("  cxx_rc=$?\n")
+                        script.write('  if [[ ${cxx_rc} -eq 0 && -n "${DRIVER_KEY}" ]]; then\n')
+                        script.write('    mkdir -p "$(dirname "${DRIVER_CACHED}")" && \\\n')
+                        script.write(f'      cp -f {shlex.quote(driver_bin)} "${{DRIVER_CACHED}}.$$" && \\\n')
+                        script.write('      mv -f "${DRIVER_CACHED}.$$" "${DRIVER_CACHED}" || true\n')
+                        script.write("  fi\n")
+                        script.write("fi\n")
+                    else:
+                        script.write('echo "[stage] clang++ (driver)"\n')
+                        script.write(self._format_cmd(compile_cmd) + "\n")
+                        script.write("cxx_rc=$?\n")
                     script.write('echo "[stage] clang++ rc=${cxx_rc}"\n')
                     script.write(
                         "if [[ ${cxx_rc} -ne 0 ]]; then exit ${cxx_rc}; fi\n"
                     )
 
                     if mode == "simulation":
-                        script.write('echo "[stage] run (driver.bin)"\n')
-                        script.write(self._format_cmd([driver_bin, vcd_path] + list(sim_args)) + "\n")
-                        script.write("exit $?\n")
+                        for name, val in (
+                            ("ARCILATOR_CYCLES", cycles),
+                            ("ARCILATOR_RESET_CYCLES", reset_cycles),
+                            ("ARCILATOR_SEED", seed),
+                            ("ARCILATOR_VCD_DT", vcd_dt),
+                        ):
+                            script.write(f"export {name}={shlex.quote(val)}\n")
+                        if stimulus_path:
+                            script.write(f"export ARCILATOR_STIMULUS={shlex.quote(stimulus_path)}\n")
+                        run_cmd = self._format_cmd([driver_bin, vcd_path] + list(sim_args))
+                        if trace_on_fail:
+                            self._write_trace_on_fail_run(
+                                script,
+                                run_cmd,
+                                tmp_dir,
+                                params.get("should_fail") == "1",
+                                expect_m0,
+                                trace_on_fail_window,
+                            )
+                        else:
+                            script.write('echo "[stage] run (driver.bin)"\n')
+                            script.write(run_cmd + "\n")
+                            script.write("run_rc=$?\n")
+                        if os.environ.get("ARCILATOR_PROFILE", "").strip().lower() not in ("", "0", "false", "no", "off"):
+                            self._write_profile_summary(script, self._profile_json_path(vcd_path))
+                        script.write("exit ${run_rc}\n")
                     else:
                         script.write("exit 0\n")
 
@@ -7,16 +7,39 @@ from __future__ import annotations
 
 import argparse
 import bisect
+import csv
+import hashlib
+import json
+import mmap
+import os
+import pickle
 import re
+import struct
 import sys
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
+try:
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:
+    np = None
 
 BIT_RE = re.compile(r"^(.*)\[(\d+)\]$")
 RANGE_RE = re.compile(r"^(.*)\[(\d+):(\d+)\]$")
 
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+INDEX_STRIDE = 1 << 20
+# Body bytes per snapshotted code between checkpoints (keeps .idx ~1/16 of the VCD).
+INDEX_BYTES_PER_CODE = 512
+
+CACHE_MAGIC = b"VCDCACH1"
+CACHE_SUFFIX = ".vcdc"
+
 
 def info(enabled: bool, message: str) -> None:
     if enabled:
@@ -140,7 +163,8 @@ def parse_vcd_header(path: Path) -> VCDHeader:
                 if line.startswith("$enddefinitions"):
                     break
     except OSError as exc:
-        raise RuntimeError(f"failed to read VCD header: {path}: {exc}") from exc
+        raise RuntimeError(
+            f"failed to read VCD header: {path}: {exc}") from exc
 
     return VCDHeader(
         signals=signals,
@@ -168,34 +192,87 @@ class Signal:
         return self.tv[idx][1]
 
 
+class CachedSignal:
+    """A Signal over VCDCache arrays: `columns` is (times, value ids, value
+    strings); the `tv` list is only built when something asks for it."""
+    def __init__(
+            self, size: int, columns: tuple[memoryview, memoryview, list[str]],
+            endtime: int):
+        self.size = size
+        self.columns = columns
+        self.endtime = endtime
+        self._signal: Optional[Signal] = None
+
+    def _materialize(self) -> Signal:
+        if self._signal is None:
+            times, ids, values = self.columns
+            tv = [(t, values[i]) for t, i in zip(times.tolist(), ids.tolist())]
+            self._signal = Signal(size=self.size, tv=tv, endtime=self.endtime)
+        return self._signal
+
+    @property
+    def tv(self) -> list[tuple[int, str]]:
+        return self._materialize().tv
+
+    def __getitem__(self, t: int) -> Optional[str]:
+        return self._materialize()[t]
+
+
 class BusSignal:
-    def __init__(self, bits: dict[int, Signal], msb: int, lsb: int):
+    """A vector put together from single-bit signals, msb..lsb. The packed
+    value timeline is built once from the merged bit changes; every change
+    time of any of `bits` gets an entry, like a real vector signal."""
+    def __init__(self, bits: dict[int, Any], msb: int, lsb: int):
         step = -1 if msb >= lsb else 1
-        self._order = list(range(msb, lsb + step, step))
-        self._bits = bits
-        self.size = len(self._order)
+        order = list(range(msb, lsb + step, step))
+        self.size = len(order)
         self.endtime = max((sig.endtime for sig in bits.values()), default=0)
-
-        merged: set[int] = set()
-        for sig in bits.values():
-            merged.update(int(t) for t, _ in sig.tv)
-        self.tv = [(t, "") for t in sorted(merged)]
+        self.initial = bus_value([None] * self.size)
+
+        pos = {bit: i for i, bit in enumerate(order)}
+        events: list[tuple[int, int, str]] = []
+        for bit, sig in bits.items():
+            i = pos.get(bit, -1)
+            for t, v in sig.tv:
+                events.append((t, i, _BUS_BITS.get(v) or bus_bit(v)))
+        events.sort(key=lambda ev: ev[0])
+
+        chars = list(self.initial)
+        self.tv: list[tuple[int, str]] = []
+        last: Optional[int] = None
+        for t, i, c in events:
+            if t != last:
+                if last is not None:
+                    self.tv.append((last, "".join(chars)))
+                last = t
+            if i >= 0:
+                chars[i] = c
+        if last is not None:
+            self.tv.append((last, "".join(chars)))
+        self._times = [t for t, _ in self.tv]
 
     def __getitem__(self, t: int) -> str:
-        chars: list[str] = []
-        for bit in self._order:
-            sig = self._bits.get(bit)
-            v = sig[int(t)] if sig is not None else None
-            if v is None:
-                chars.append("x")
-                continue
-            v = str(v).lower()
-            if v not in ("0", "1", "x", "z"):
-                v = "x"
-            if v == "z":
-                v = "x"
-            chars.append(v)
-        return "".join(chars)
+        idx = bisect.bisect_right(self._times, int(t)) - 1
+        if idx < 0:
+            return self.initial
+        return self.tv[idx][1]
+
+
+_BUS_BITS = {"0": "0", "1": "1", "x": "x", "z": "x"}
+
+
+def bus_bit(v: Optional[str]) -> str:
+    if v is None:
+        return "x"
+    v = str(v).lower()
+    if v not in ("0", "1", "x"):
+        return "x"
+    return v
+
+
+def bus_value(bits: list[Optional[str]]) -> str:
+    """Joins per-bit values (msb first) into a bus value; z and unknown are x."""
+    return "".join(bus_bit(v) for v in bits)
 
 
 @dataclass(frozen=True)
@@ -204,100 +281,463 @@ class ParsedVCD:
     endtime: int
 
 
-def parse_vcd_values(path: Path, header: VCDHeader, needed_names: set[str]) -> ParsedVCD:
+def _value_change(line: str) -> Optional[tuple[str, str]]:
+    """(code, value) of a stripped body line, None for anything else."""
+    kind = line[0]
+    if kind in ("b", "B", "r", "R"):
+        rest = line[1:].strip()
+        if not rest:
+            return None
+        parts = rest.split(None, 1)
+        if len(parts) != 2:
+            return None
+        value = parts[0].strip().lower()
+        code = parts[1].strip()
+    elif kind in ("0", "1", "x", "X", "z", "Z"):
+        value = kind.lower()
+        code = line[1:].strip()
+    else:
+        return None
+    if not code:
+        return None
+    return code, value
+
+
+_SCALAR_VALUES = {ord(c): c.lower() for c in "01xXzZ"}
+_VECTOR_KINDS = frozenset(b"bBrR")
+_BLANK = frozenset(b" \t\r\v\f")
+_BODY_CHUNK = 1 << 20
+# Decoded vector values kept for reuse; the table starts over when full so a
+# body with ever-new values (counters, data buses) stays bounded in memory.
+_VALUE_INTERN_MAX = 1 << 12
+
+
+def iter_vcd_body(
+    path: Path,
+    wanted_codes: Any,
+    offset: Optional[int] = None
+) -> Iterator[tuple[int, list[tuple[str, str]]]]:
+    """Yields `(time, [(code, value), ...])` for every time step of the body,
+    keeping only changes of `wanted_codes` (steps without any are yielded too).
+    `offset` starts at a `#time` line found by the index instead.
+
+    The body is scanned as mmap'd bytes, dispatching on each line's first
+    byte; id codes are looked up as bytes and only the values of wanted codes
+    are decoded (once per distinct value, up to _VALUE_INTERN_MAX at a time)."""
+    wanted = {str(code).encode("utf-8"): code for code in wanted_codes}
+    values: dict[bytes, str] = {}
+    current_time = 0
+    changes: list[tuple[str, str]] = []
+    started = offset is None
+
+    try:
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if offset is None:
+                    pos = mm.find(b"$enddefinitions")
+                    if pos < 0:
+                        return
+                    # The rest of the $enddefinitions line is not body.
+                    pos = mm.find(b"\n", pos)
+                    pos = size if pos < 0 else pos + 1
+                else:
+                    pos = offset
+                tail = b""
+                while pos < size:
+                    chunk = mm[pos:pos + _BODY_CHUNK]
+                    pos += len(chunk)
+                    lines = chunk.split(b"\n")
+                    if tail:
+                        lines[0] = tail + lines[0]
+                    tail = lines.pop() if pos < size else b""
+
+                    for line in lines:
+                        if not line:
+                            continue
+                        c = line[0]
+                        if c in _BLANK:
+                            line = line.strip()
+                            if not line:
+                                continue
+                            c = line[0]
+
+                        if c == 35:  # '#'
+                            if started:
+                                yield current_time, changes
+                            started = True
+                            changes = []
+                            try:
+                                current_time = int(line[1:])
+                            except ValueError:
+                                current_time = 0
+                            continue
+
+                        scalar = _SCALAR_VALUES.get(c)
+                        if scalar is not None:
+                            code = wanted.get(line[1:].strip())
+                            if code is not None:
+                                changes.append((code, scalar))
+                            continue
+
+                        if c in _VECTOR_KINDS:
+                            parts = line[1:].split(None, 1)
+                            if len(parts) != 2:
+                                continue
+                            code = wanted.get(parts[1].strip())
+                            if code is None:
+                                continue
+                            value = values.get(parts[0])
+                            if value is None:
+                                if len(values) >= _VALUE_INTERN_MAX:
+                                    values.clear()
+                                value = values[parts[0]] = parts[0].decode(
+                                    "utf-8", errors="ignore").lower()
+                            changes.append((code, value))
+                        # '$' keywords ($dumpvars/$end/...) only wrap value changes.
+    except (OSError, ValueError) as exc:
+        raise RuntimeError(
+            f"failed to read VCD values: {path}: {exc}") from exc
+    if started:
+        yield current_time, changes
+
+
+def parse_vcd_values(
+    path: Path,
+    header: VCDHeader,
+    needed_names: set[str],
+    start: Optional[tuple[int, int, dict[str, str]]] = None,
+    until: Optional[int] = None,
+) -> ParsedVCD:
+    """Transitions of `needed_names`. With `start` (from index_start()) the
+    body is read from that offset, the snapshot values standing in for the
+    history; with `until` reading stops at the first step after it (only
+    valid for files whose time never goes backwards)."""
+    # Aliased names share one identifier code: transitions are kept once per
+    # code and names of the same size share one Signal.
     wanted_codes: dict[str, list[str]] = {}
     for code, names in header.code_to_names.items():
         selected = [n for n in names if n in needed_names]
         if selected:
             wanted_codes[code] = selected
 
-    tvs: dict[str, list[tuple[int, str]]] = {n: [] for n in needed_names}
-    current_time = 0
+    tvs: dict[str, list[tuple[int, str]]] = {code: [] for code in wanted_codes}
     endtime = 0
-    in_dumpvars = False
-    in_body = False
+    offset: Optional[int] = None
+    if start is not None:
+        offset, prev_time, snapshot = start
+        for code in wanted_codes:
+            value = snapshot.get(code)
+            if value is not None:
+                tvs[code].append((prev_time, value))
+    for t, changes in iter_vcd_body(path, wanted_codes, offset):
+        endtime = max(endtime, t)
+        if until is not None and t > until:
+            break
+        for code, value in changes:
+            tvs[code].append((t, value))
 
+    signals: dict[str, Signal] = {}
+    for code, names in wanted_codes.items():
+        compressed: list[tuple[int, str]] = []
+        for t, v in tvs.pop(code):
+            if compressed and compressed[-1][0] == t:
+                compressed[-1] = (t, v)
+            else:
+                compressed.append((t, v))
+        by_size: dict[int, Signal] = {}
+        for name in names:
+            size = header.name_to_size.get(name, 1)
+            sig = by_size.get(size)
+            if sig is None:
+                sig = by_size[size] = Signal(
+                    size=size, tv=compressed, endtime=endtime)
+            signals[name] = sig
+    for name in needed_names:
+        if name not in signals:
+            signals[name] = Signal(
+                size=header.name_to_size.get(name, 1), tv=[], endtime=endtime)
+
+    return ParsedVCD(signals=signals, endtime=endtime)
+
+
+def index_path(path: Path) -> Path:
+    return Path(str(path) + INDEX_SUFFIX)
+
+
+def _source_key(path: Path) -> tuple[int, int]:
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def build_index(path: Path, stride: int = INDEX_STRIDE) -> dict[str, Any]:
+    """Scans `path` once and (best effort) writes its `.idx` sidecar.
+
+    Every `stride` body bytes (more for wide dumps, so that snapshots stay
+    small next to the VCD) the next `#time` line becomes a checkpoint
+    `(time, offset, prev_time, snapshot)`: its byte offset, the time of the
+    step before it and the value of every code just before it (so the first
+    checkpoint carries the $dumpvars values). Files whose time ever goes
+    backwards get no checkpoints.
+    """
+    source = _source_key(path)
+    checkpoints: list[tuple[int, int, int, dict[str, str]]] = []
+    current: dict[str, str] = {}
+    monotonic = True
+    in_body = False
+    current_time = 0
+    endtime = 0
+    offset = 0
+    next_checkpoint = 0
     try:
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
+        with path.open("rb") as f:
             for raw in f:
-                line = raw.strip()
+                line_offset = offset
+                offset += len(raw)
+                line = raw.decode("utf-8", errors="ignore").strip()
                 if not in_body:
                     if line.startswith("$enddefinitions"):
                         in_body = True
+                        next_checkpoint = offset + stride
                     continue
-                if not line:
+                if not line or line.startswith("$"):
                     continue
-
                 if line.startswith("#"):
                     try:
-                        current_time = int(line[1:].strip() or "0")
+                        t = int(line[1:].strip() or "0")
                     except ValueError:
-                        current_time = 0
-                    endtime = max(endtime, current_time)
-                    continue
-
-                if line.startswith("$"):
-                    if line.startswith("$dumpvars"):
-                        in_dumpvars = True
-                        continue
-                    if line.startswith("$end") and in_dumpvars:
-                        in_dumpvars = False
-                        continue
+                        t = 0
+                    if t < current_time:
+                        monotonic = False
+                    if monotonic and line_offset >= next_checkpoint:
+                        checkpoints.append(
+                            (t, line_offset, current_time, dict(current)))
+                        next_checkpoint = line_offset + max(
+                            stride, INDEX_BYTES_PER_CODE * len(current))
+                    current_time = t
+                    endtime = max(endtime, t)
                     continue
+                change = _value_change(line)
+                if change is not None:
+                    current[change[0]] = change[1]
+    except OSError as exc:
+        raise RuntimeError(f"failed to index VCD: {path}: {exc}") from exc
+
+    index = {
+        "version": INDEX_VERSION,
+        "source": source,
+        "endtime": endtime,
+        "checkpoints": checkpoints if monotonic else [],
+        "monotonic": monotonic,
+    }
+    idx = index_path(path)
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=idx.name + ".", dir=idx.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, idx)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except OSError:
+        # Read-only gold dir: the index is still good for this run.
+        pass
+    return index
+
+
+def load_index(path: Path) -> Optional[dict[str, Any]]:
+    """The `.idx` sidecar of `path` if it is current, else None."""
+    try:
+        with open(index_path(path), "rb") as f:
+            index = pickle.load(f)
+        if index.get("version") == INDEX_VERSION and tuple(index.get(
+                "source", ())) == _source_key(path):
+            return index
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError,
+            KeyError, TypeError, ValueError):
+        pass
+    return None
 
-                kind = line[0]
-                value: str
-                code: str
-                if kind in ("b", "B", "r", "R"):
-                    rest = line[1:].strip()
-                    if not rest:
-                        continue
-                    parts = rest.split(None, 1)
-                    if len(parts) != 2:
-                        continue
-                    value = parts[0].strip().lower()
-                    code = parts[1].strip()
-                elif kind in ("0", "1", "x", "X", "z", "Z"):
-                    value = kind.lower()
-                    code = line[1:].strip()
-                else:
-                    continue
 
-                if not code:
-                    continue
-                names = wanted_codes.get(code)
-                if not names:
-                    continue
+def index_start(
+        index: Optional[dict[str, Any]],
+        after: Optional[int]) -> Optional[tuple[int, int, dict[str, str]]]:
+    """`(offset, prev_time, snapshot)` of the last checkpoint that can stand in
+    for everything before `after`: nothing before it is compared, and its
+    snapshot time stays before the window."""
+    if index is None or after is None:
+        return None
+    best = None
+    for t, offset, prev_time, snapshot in index["checkpoints"]:
+        if t > after or prev_time >= after:
+            break
+        best = (offset, prev_time, snapshot)
+    return best
+
+
+class VCDCache:
+    """A VCD parsed once into a cache file that is mmap'd on load:
+
+        "VCDCACH1"  u64 meta length  meta (pickle)  zero padding to 8
+        times       array('q'), the transitions of every code, code by code
+        value ids   array('I'), the same layout, indexes into meta "values"
+
+    meta holds the VCDHeader, the end time, the interned value strings and
+    `code -> (first, count)` into the arrays. Transitions are the per-code
+    lists parse_vcd_values() builds (last value per time step).
+    """
+    def __init__(self, path: Path):
+        with path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_len = struct.unpack_from("<8sQ", self._mm, 0)
+        if magic != CACHE_MAGIC:
+            raise ValueError(f"not a vcd_diff cache: {path}")
+        meta = pickle.loads(self._mm[16:16 + meta_len])
+        if meta["byteorder"] != sys.byteorder:
+            raise ValueError(
+                f"vcd_diff cache from a different byte order: {path}")
+        self.header = VCDHeader(**meta["header"])
+        self.endtime: int = meta["endtime"]
+        self._values: list[str] = meta["values"]
+        self._codes: dict[str, tuple[int, int]] = meta["codes"]
+        total = meta["transitions"]
+        start = 16 + meta_len + (-(16 + meta_len) % 8)
+        view = memoryview(self._mm)
+        self._times = view[start:start + 8 * total].cast("q")
+        self._ids = view[start + 8 * total:start + 12 * total].cast("I")
+
+    def parsed(self, needed_names: set[str]) -> ParsedVCD:
+        """The same ParsedVCD that parse_vcd_values() returns for these names."""
+        signals: dict[str, Any] = {}
+        shared: dict[tuple[str, int], CachedSignal] = {}
+        values = self._values
+        for name in needed_names:
+            code = self.header.name_to_code.get(name, "")
+            size = self.header.name_to_size.get(name, 1)
+            sig = shared.get((code, size))
+            if sig is None:
+                first, count = self._codes.get(code, (0, 0))
+                sig = shared[(code, size)] = CachedSignal(
+                    size,
+                    (
+                        self._times[first:first + count],
+                        self._ids[first:first + count], values),
+                    self.endtime,
+                )
+            signals[name] = sig
+        return ParsedVCD(signals=signals, endtime=self.endtime)
+
+
+def _content_key(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_vcd_cache(path: Path, cache_file: Path) -> None:
+    """Parses all of `path` (every code) and writes `cache_file` atomically."""
+    header = parse_vcd_header(path)
+    per_code: dict[str, tuple[list[int], list[int]]] = {
+        code: ([], [])
+        for code in header.code_to_names
+    }
+    interned: dict[str, int] = {}
+    endtime = 0
+    for t, changes in iter_vcd_body(path, per_code):
+        endtime = max(endtime, t)
+        for code, value in changes:
+            vid = interned.get(value)
+            if vid is None:
+                vid = interned[value] = len(interned)
+            times, ids = per_code[code]
+            if times and times[-1] == t:
+                ids[-1] = vid
+            else:
+                times.append(t)
+                ids.append(vid)
+
+    all_times = array("q")
+    all_ids = array("I")
+    codes: dict[str, tuple[int, int]] = {}
+    for code, (times, ids) in per_code.items():
+        codes[code] = (len(all_times), len(times))
+        all_times.extend(times)
+        all_ids.extend(ids)
+    meta = pickle.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "header": {
+                "signals": header.signals,
+                "name_to_size": header.name_to_size,
+                "name_to_code": header.name_to_code,
+                "code_to_names": header.code_to_names,
+            },
+            "endtime": endtime,
+            "values": list(interned),
+            "codes": codes,
+            "transitions": len(all_times),
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    head = struct.pack("<8sQ", CACHE_MAGIC, len(meta)) + meta
+    head += b"\0" * (-len(head) % 8)
 
-                for name in names:
-                    tvs[name].append((current_time, value))
-    except OSError as exc:
-        raise RuntimeError(f"failed to read VCD values: {path}: {exc}") from exc
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(
+        prefix=cache_file.name + ".", dir=cache_file.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(head)
+            all_times.tofile(f)
+            all_ids.tofile(f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_file)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_vcd_cache(path: Path, cache_root: Path) -> Optional[VCDCache]:
+    """The cached parse of `path` under `cache_root`, built on a miss; None
+    when the cache cannot be written (the caller then parses the text)."""
+    cache_file = cache_root / (_content_key(path) + CACHE_SUFFIX)
+    try:
+        return VCDCache(cache_file)
+    except (OSError, EOFError, KeyError, TypeError, ValueError,
+            pickle.UnpicklingError, struct.error):
+        pass
+    try:
+        build_vcd_cache(path, cache_file)
+        return VCDCache(cache_file)
+    except (OSError, ValueError):
+        return None
 
-    signals: dict[str, Signal] = {}
-    for name, tv in tvs.items():
-        compressed: list[tuple[int, str]] = []
-        for t, v in tv:
-            if compressed and compressed[-1][0] == t:
-                compressed[-1] = (t, v)
-            else:
-                compressed.append((t, v))
-        signals[name] = Signal(
-            size=header.name_to_size.get(name, 1),
-            tv=compressed,
-            endtime=endtime,
-        )
 
-    return ParsedVCD(signals=signals, endtime=endtime)
+def cache_root(args: argparse.Namespace) -> Optional[Path]:
+    """--cache, else $VCD_DIFF_CACHE_ROOT; None (no cache) when neither is
+    set, since a cold build holds every code's transitions in memory."""
+    if args.no_cache:
+        return None
+    root = args.cache or os.environ.get("VCD_DIFF_CACHE_ROOT", "")
+    return Path(root) if root else None
 
 
-def filter_signals(signals: list[str], prefix: Optional[str]) -> dict[str, str]:
+def filter_signals(signals: list[str],
+                   prefix: Optional[str]) -> dict[str, str]:
     if prefix is None:
         return {s: s for s in signals}
-    return {s[len(prefix) :]: s for s in signals if s.startswith(prefix)}
+    return {s[len(prefix):]: s for s in signals if s.startswith(prefix)}
 
 
-def index_by_base(filtered: dict[str, str]) -> tuple[dict[str, tuple[int, int, str]], dict[str, dict[int, str]]]:
+def index_by_base(
+    filtered: dict[str, str]
+) -> tuple[dict[str, tuple[int, int, str]], dict[str, dict[int, str]]]:
     ranges: dict[str, tuple[int, int, str]] = {}
     bits: dict[str, dict[int, str]] = {}
     for short, full in filtered.items():
@@ -320,6 +760,23 @@ def has_bits(bits: dict[int, str], msb: int, lsb: int) -> bool:
     return True
 
 
+def _timeline(
+        sig: Any,
+        width: int) -> tuple[Optional[str], list[int], list[Optional[str]]]:
+    """(value before the first change, change times, values), normalized once
+    per change; equal values share one string."""
+    tv = getattr(sig, "tv", [])
+    times = [int(t) for t, _ in tv]
+    seen: dict[Optional[str], Optional[str]] = {}
+    values: list[Optional[str]] = []
+    for _, v in tv:
+        n = seen.get(v, seen)
+        if n is seen:
+            n = seen[v] = normalize(v, width)
+        values.append(n)
+    return normalize(getattr(sig, "initial", None), width), times, values
+
+
 def compare_at_times(
     key: str,
     sig_a: Any,
@@ -329,77 +786,411 @@ def compare_at_times(
     after: Optional[int],
     before: Optional[int],
 ) -> Optional[tuple[int, str, str, str]]:
-    endtime = max(getattr(sig_a, "endtime", 0), getattr(sig_b, "endtime", 0))
-    times: set[int] = {0, int(endtime)}
-    times.update(int(t) for t, _ in getattr(sig_a, "tv", []))
-    times.update(int(t) for t, _ in getattr(sig_b, "tv", []))
-    for t in sorted(times):
-        if after is not None and t < after:
-            continue
+    """First time in {0, end time, changes of either signal} where the two
+    normalized values differ, found by walking both change lists at once."""
+    endtime = int(
+        max(getattr(sig_a, "endtime", 0), getattr(sig_b, "endtime", 0)))
+    v1, times_a, values_a = _timeline(sig_a, width_a)
+    v2, times_b, values_b = _timeline(sig_b, width_b)
+    na = len(times_a)
+    nb = len(times_b)
+    ia = ib = 0
+
+    def differs(t: int) -> bool:
+        return v1 != v2 and (after is None or t >= after)
+
+    zero_pending = True
+    while ia < na or ib < nb:
+        if ib >= nb or (ia < na and times_a[ia] <= times_b[ib]):
+            t = times_a[ia]
+        else:
+            t = times_b[ib]
+        if zero_pending and t > 0:
+            zero_pending = False
+            if differs(0) and (before is None or before >= 0):
+                return (0, v1 or "", v2 or "", key)
+        if before is not None and t > before:
+            return None
+        while ia < na and times_a[ia] == t:
+            v1 = values_a[ia]
+            ia += 1
+        while ib < nb and times_b[ib] == t:
+            v2 = values_b[ib]
+            ib += 1
+        if t == 0:
+            zero_pending = False
+        if differs(t):
+            return (t, v1 or "", v2 or "", key)
+
+    for t in ((0, endtime) if zero_pending else (endtime, )):
         if before is not None and t > before:
             break
-        v1 = normalize(sig_a[t], width_a)
-        v2 = normalize(sig_b[t], width_b)
-        if v1 == v2:
-            continue
-        return (t, v1 or "", v2 or "", key)
+        if differs(t):
+            return (t, v1 or "", v2 or "", key)
     return None
 
 
-def main(argv: list[str]) -> int:
-    parser = argparse.ArgumentParser(description="Print the first difference between two VCD files")
-    parser.add_argument("file1", metavar="VCD1", help="first file to compare")
-    parser.add_argument("file2", metavar="VCD2", help="second file to compare")
-    parser.add_argument("--top1", metavar="INSTPATH", help="instance in first file to compare")
-    parser.add_argument("--top2", metavar="INSTPATH", help="instance in second file to compare")
-    parser.add_argument(
-        "-f",
-        "--filter",
-        metavar="REGEX",
-        action="append",
-        default=[],
-        help="only compare signals matching a regex",
-    )
-    parser.add_argument(
-        "-i",
-        "--ignore",
-        metavar="REGEX",
-        action="append",
-        default=[],
-        help="ignore signals matching a regex",
-    )
-    parser.add_argument("-l", "--list", action="store_true", help="list signals and exit")
-    parser.add_argument("-v", "--verbose", action="store_true", help="verbose output")
-    parser.add_argument("-a", "--after", type=int, help="only compare after time")
-    parser.add_argument("-b", "--before", type=int, help="only compare before time")
-    args = parser.parse_args(argv)
+def compare_at_times_np(
+    key: str,
+    sig_a: Any,
+    width_a: int,
+    sig_b: Any,
+    width_b: int,
+    after: Optional[int],
+    before: Optional[int],
+) -> Optional[tuple[int, str, str, str]]:
+    """NumPy twin of compare_at_times(): int64 change times, normalized values
+    interned to int ids, both sides sampled at all compare times at once with
+    searchsorted and the first unequal sample taken."""
+    endtime = int(
+        max(getattr(sig_a, "endtime", 0), getattr(sig_b, "endtime", 0)))
+    ids: dict[Optional[str], int] = {}
+
+    def timeline(sig: Any, width: int) -> tuple[int, Any, Any]:
+        memo: dict[Optional[str], int] = {}
+
+        def vid(v: Optional[str]) -> int:
+            i = memo.get(v)
+            if i is None:
+                i = memo[v] = ids.setdefault(normalize(v, width), len(ids))
+            return i
+
+        columns = getattr(sig, "columns", None)
+        if columns is not None:
+            # Straight off the cache: normalize each distinct value once.
+            times = np.frombuffer(columns[0], dtype=np.int64)
+            raw, inverse = np.unique(
+                np.frombuffer(columns[1], dtype=np.uint32),
+                return_inverse=True)
+            table = np.array(
+                [vid(columns[2][i]) for i in raw.tolist()], dtype=np.int64)
+            values = table[inverse]
+        else:
+            tv = getattr(sig, "tv", [])
+            times = np.fromiter(
+                (t for t, _ in tv), dtype=np.int64, count=len(tv))
+            values = np.fromiter(
+                (vid(v) for _, v in tv), dtype=np.int64, count=len(tv))
+        return vid(getattr(sig, "initial", None)), times, values
+
+    init_a, times_a, values_a = timeline(sig_a, width_a)
+    init_b, times_b, values_b = timeline(sig_b, width_b)
+    at = np.union1d(
+        np.union1d(times_a, times_b), np.array([0, endtime], dtype=np.int64))
+    if after is not None:
+        at = at[at >= after]
+    if before is not None:
+        at = at[at <= before]
+    if not at.size:
+        return None
 
-    path1 = Path(args.file1)
-    path2 = Path(args.file2)
+    def sample(init: int, times: Any, values: Any) -> Any:
+        if not times.size:
+            return np.full(at.size, init, dtype=np.int64)
+        k = np.searchsorted(times, at, side="right") - 1
+        return np.where(k >= 0, values[np.maximum(k, 0)], init)
 
-    hdr1 = parse_vcd_header(path1)
-    hdr2 = parse_vcd_header(path2)
-    infoln(args.verbose, f"{len(hdr1.signals)} signals in first file")
-    infoln(args.verbose, f"{len(hdr2.signals)} signals in second file")
+    v1 = sample(init_a, times_a, values_a)
+    v2 = sample(init_b, times_b, values_b)
+    unequal = np.flatnonzero(v1 != v2)
+    if not unequal.size:
+        return None
+    j = int(unequal[0])
+    names = list(ids)
+    return (int(at[j]), names[int(v1[j])] or "", names[int(v2[j])] or "", key)
+
+
+def stream_compare(
+    path1: Path,
+    hdr1: VCDHeader,
+    path2: Path,
+    hdr2: VCDHeader,
+    entries: list[dict[str, Any]],
+    after: Optional[int],
+    before: Optional[int],
+    starts: tuple[Optional[tuple[int, int, dict[str, str]]],
+                  ...] = (None, None),
+) -> list[tuple[int, str, str, str]]:
+    """Same result as compare_at_times() over all entries, but walks both
+    bodies in time order together, holding only the current value per code,
+    and stops at the first time step with a mismatch. `starts` are optional
+    index_start() checkpoints to begin each body at."""
+    keys = [str(e["key"]) for e in entries]
+    # Entries reading the same codes on both sides (aliased names) form one
+    # group that is evaluated once per check.
+    groups: dict[tuple[Any, Any], int] = {}
+    members: list[list[int]] = []
+    values: tuple[list[Any], list[Any]] = ([], [])
+    touch: tuple[dict[str, list[int]], dict[str, list[int]]] = ({}, {})
+
+    def direct(hdr: VCDHeader, name: str) -> tuple[Any, ...]:
+        return (hdr.name_to_code[name], hdr.name_to_size.get(name, 1))
+
+    def bus(hdr: VCDHeader, bit_sigs: dict[int, str], msb: int,
+            lsb: int) -> tuple[Any, ...]:
+        step = -1 if msb >= lsb else 1
+        codes = tuple(
+            hdr.name_to_code[bit_sigs[bit]]
+            for bit in range(msb, lsb + step, step))
+        # Like BusSignal, any bit of the base (even outside msb..lsb) adds a compare time.
+        return (
+            codes,
+            tuple(
+                dict.fromkeys(
+                    hdr.name_to_code[name] for name in bit_sigs.values())))
+
+    def add(side: int, sig: tuple[Any, ...], group: int) -> None:
+        if isinstance(sig[0], str):
+            code, size = sig
+            touch[side].setdefault(code, []).append(group)
+            values[side].append(lambda cur: normalize(cur.get(code), size))
+        else:
+            codes, touched = sig
+            for code in touched:
+                touch[side].setdefault(code, []).append(group)
+            values[side].append(
+                lambda cur: normalize(
+                    bus_value([cur.get(c) for c in codes]), len(codes)))
+
+    for idx, e in enumerate(entries):
+        if e["kind"] == "direct":
+            sig1 = direct(hdr1, e["sig1"])
+            sig2 = direct(hdr2, e["sig2"])
+        elif e["which_range"] == "file1":
+            sig1 = direct(hdr1, e["range_sig"])
+            sig2 = bus(hdr2, e["bit_sigs"], int(e["msb"]), int(e["lsb"]))
+        else:
+            sig1 = bus(hdr1, e["bit_sigs"], int(e["msb"]), int(e["lsb"]))
+            sig2 = direct(hdr2, e["range_sig"])
+        group = groups.get((sig1, sig2))
+        if group is None:
+            group = groups[(sig1, sig2)] = len(members)
+            members.append([])
+            add(0, sig1, group)
+            add(1, sig2, group)
+        members[group].append(idx)
+
+    current: tuple[dict[str, str], dict[str, str]] = ({}, {})
+    offsets: list[Optional[int]] = [None, None]
+    for side, start in enumerate(starts):
+        if start is not None:
+            offsets[side], _, snapshot = start
+            current[side].update(
+                (code, snapshot[code])
+                for code in touch[side]
+                if code in snapshot)
+    everything = range(len(members))
+
+    def check(t: int, touched: Any) -> list[tuple[int, str, str, str]]:
+        if (after is not None and t < after) or (before is not None
+                                                 and t > before):
+            return []
+        found: list[tuple[int, str, str, str]] = []
+        for group in touched:
+            v1 = values[0][group](current[0])
+            v2 = values[1][group](current[1])
+            if v1 != v2:
+                found.extend(
+                    (idx, v1 or "", v2 or "") for idx in members[group])
+        return [(t, v1, v2, keys[idx]) for idx, v1, v2 in sorted(found)]
+
+    bodies = (
+        iter_vcd_body(path1, touch[0],
+                      offsets[0]), iter_vcd_body(path2, touch[1], offsets[1]))
+    heads = [next(bodies[0], None), next(bodies[1], None)]
+    endtime = 0
+    zero_pending = True
+    while heads[0] is not None or heads[1] is not None:
+        t = min(head[0] for head in heads if head is not None)
+        if zero_pending and t > 0:
+            zero_pending = False
+            found = check(0, everything)
+            if found:
+                return found
+        if before is not None and t > before:
+            return []
+
+        touched: set[int] = set()
+        for side in (0, 1):
+            while heads[side] is not None and heads[side][0] == t:
+                for code, value in heads[side][1]:
+                    current[side][code] = value
+                    touched.update(touch[side][code])
+                heads[side] = next(bodies[side], None)
+                if heads[side] is not None and heads[side][0] < t:
+                    path = path1 if side == 0 else path2
+                    raise RuntimeError(
+                        f"time goes backwards in {path} (#{heads[side][0]} after #{t}); compare without --stream"
+                    )
+        endtime = t
+        if t == 0:
+            zero_pending = False
+            found = check(0, everything)
+        else:
+            found = check(t, touched)
+        if found:
+            return found
+
+    if zero_pending:
+        found = check(0, everything)
+        if found:
+            return found
+    return check(endtime, everything)
+
+
+def compare_parsed(
+    path1: Path,
+    hdr1: VCDHeader,
+    path2: Path,
+    hdr2: VCDHeader,
+    entries: list[dict[str, Any]],
+    after: Optional[int],
+    before: Optional[int],
+    verbose: bool = False,
+    indexes: tuple[Optional[dict[str, Any]], ...] = (None, None),
+    cached1: Optional[VCDCache] = None,
+    backend: str = "python",
+) -> list[tuple[int, str, str, str]]:
+    """Earliest mismatches, from the full transition lists of both files
+    (only the --after/--before window of them when `indexes` allow; the
+    first file's from `cached1` when given). `backend` "auto" uses NumPy
+    for the entries it is faster on: those with a cache-backed side and
+    no BusSignal; converting plain tuple lists costs more than it saves."""
+    def compare_fn(s1: Any, s2: Any) -> Any:
+        if backend == "numpy" or (backend == "auto" and np is not None and
+                                  (isinstance(s1, CachedSignal)
+                                   or isinstance(s2, CachedSignal))
+                                  and not isinstance(s1, BusSignal)
+                                  and not isinstance(s2, BusSignal)):
+            return compare_at_times_np
+        return compare_at_times
 
+    need1: set[str] = set()
+    need2: set[str] = set()
+    for e in entries:
+        if e["kind"] == "direct":
+            need1.add(e["sig1"])
+            need2.add(e["sig2"])
+            continue
+        if e["which_range"] == "file1":
+            need1.add(e["range_sig"])
+            need2.update(e["bit_sigs"].values())
+        else:
+            need1.update(e["bit_sigs"].values())
+            need2.add(e["range_sig"])
+
+    def until(index: Optional[dict[str, Any]]) -> Optional[int]:
+        return before if index is not None and index["monotonic"] else None
+
+    if cached1 is not None:
+        infoln(verbose, "Loading first file from the cache")
+        vcd1 = cached1.parsed(need1)
+    else:
+        infoln(verbose, "Reading first file")
+        vcd1 = parse_vcd_values(
+            path1, hdr1, need1, index_start(indexes[0], after),
+            until(indexes[0]))
+    infoln(verbose, "Reading second file")
+    vcd2 = parse_vcd_values(
+        path2, hdr2, need2, index_start(indexes[1], after), until(indexes[1]))
+
+    # Entries over aliased names see the same Signal objects; their buses and
+    # results are only computed once. `limit` never grows, so a result from
+    # an earlier entry stays valid.
+    buses: dict[tuple[int, int, tuple[tuple[int, int], ...]], BusSignal] = {}
+    results: dict[tuple[int, int, int, int], Optional[tuple[int, str, str,
+                                                            str]]] = {}
+
+    def bus(
+            vcd: ParsedVCD, bit_sigs: dict[int, str], msb: int,
+            lsb: int) -> BusSignal:
+        bits = {idx: vcd.signals[name] for idx, name in bit_sigs.items()}
+        ident = (
+            msb, lsb,
+            tuple(sorted((idx, id(sig)) for idx, sig in bits.items())))
+        sig = buses.get(ident)
+        if sig is None:
+            sig = buses[ident] = BusSignal(bits, msb, lsb)
+        return sig
+
+    earliest: list[tuple[int, str, str, str]] = []
+    for entry in entries:
+        key = entry["key"]
+        infoln(verbose, f"Comparing {key}")
+        # Later mismatches than the earliest one so far are dropped anyway.
+        limit = before
+        if earliest and (limit is None or earliest[0][0] < limit):
+            limit = earliest[0][0]
+
+        if entry["kind"] == "direct":
+            s1 = vcd1.signals[entry["sig1"]]
+            s2 = vcd2.signals[entry["sig2"]]
+            w1, w2 = s1.size, s2.size
+        else:
+            msb = int(entry["msb"])
+            lsb = int(entry["lsb"])
+            width = abs(msb - lsb) + 1
+            if entry["which_range"] == "file1":
+                s1 = vcd1.signals[entry["range_sig"]]
+                s2 = bus(vcd2, entry["bit_sigs"], msb, lsb)
+            else:
+                s1 = bus(vcd1, entry["bit_sigs"], msb, lsb)
+                s2 = vcd2.signals[entry["range_sig"]]
+            w1, w2 = getattr(s1, "size", width), getattr(s2, "size", width)
+
+        ident = (id(s1), w1, id(s2), w2)
+        if ident in results:
+            mismatch = results[ident]
+        else:
+            mismatch = results[ident] = compare_fn(s1, s2)(
+                key, s1, w1, s2, w2, after, limit)
+
+        if mismatch is None:
+            continue
+        t, v1, v2, _ = mismatch
+        if earliest and t < earliest[0][0]:
+            earliest = []
+        if not earliest or t == earliest[0][0]:
+            earliest.append((t, v1, v2, key))
+
+    return earliest
+
+
+def common_signal_entries(
+        hdr1: VCDHeader, hdr2: VCDHeader,
+        args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Comparable signals of both headers under --top1/--top2, after
+    --filter/--ignore, sorted by key."""
     filtered1 = filter_signals(hdr1.signals, args.top1)
     filtered2 = filter_signals(hdr2.signals, args.top2)
     if args.top1 is not None:
-        infoln(args.verbose, f"{len(filtered1)} signals under `{args.top1}` in first file")
+        infoln(
+            args.verbose,
+            f"{len(filtered1)} signals under `{args.top1}` in first file")
     if args.top2 is not None:
-        infoln(args.verbose, f"{len(filtered2)} signals under `{args.top2}` in second file")
+        infoln(
+            args.verbose,
+            f"{len(filtered2)} signals under `{args.top2}` in second file")
 
     common_entries: list[dict[str, Any]] = []
     for key, sig1 in filtered1.items():
         sig2 = filtered2.get(key)
         if sig2 is not None:
-            common_entries.append({"key": key, "kind": "direct", "sig1": sig1, "sig2": sig2})
+            common_entries.append(
+                {
+                    "key": key,
+                    "kind": "direct",
+                    "sig1": sig1,
+                    "sig2": sig2
+                })
 
     ranges1, bits1 = index_by_base(filtered1)
     ranges2, bits2 = index_by_base(filtered2)
     direct_keys = {e["key"] for e in common_entries}
 
-    def add_bus_entry(base: str, msb: int, lsb: int, range_sig: str, bit_sigs: dict[int, str], which_range: str) -> None:
+    def add_bus_entry(
+            base: str, msb: int, lsb: int, range_sig: str,
+            bit_sigs: dict[int, str], which_range: str) -> None:
         key = f"{base}[{msb}:{lsb}]"
         if key in direct_keys:
             return
@@ -411,23 +1202,25 @@ def main(argv: list[str]) -> int:
                 "lsb": lsb,
                 "which_range": which_range,
                 "range_sig": range_sig,
-                "bit_sigs": {int(k): v for k, v in bit_sigs.items()},
-            }
-        )
+                "bit_sigs": {int(k): v
+                             for k, v in bit_sigs.items()},
+            })
 
     for base, (msb, lsb, full_range) in ranges1.items():
         if base not in bits2:
             continue
         if not has_bits(bits2[base], msb, lsb):
             continue
-        add_bus_entry(base, msb, lsb, full_range, bits2[base], which_range="file1")
+        add_bus_entry(
+            base, msb, lsb, full_range, bits2[base], which_range="file1")
 
     for base, (msb, lsb, full_range) in ranges2.items():
         if base not in bits1:
             continue
         if not has_bits(bits1[base], msb, lsb):
             continue
-        add_bus_entry(base, msb, lsb, full_range, bits1[base], which_range="file2")
+        add_bus_entry(
+            base, msb, lsb, full_range, bits1[base], which_range="file2")
 
     common_entries.sort(key=lambda e: e["key"])
     infoln(args.verbose, f"{len(common_entries)} comparable signal entries")
@@ -441,73 +1234,301 @@ def main(argv: list[str]) -> int:
         common_entries = [e for e in common_entries if not rx.search(e["key"])]
 
     if args.filter or args.ignore:
-        infoln(args.verbose, f"{len(common_entries)} filtered and unignored entries")
+        infoln(
+            args.verbose,
+            f"{len(common_entries)} filtered and unignored entries")
 
-    if args.list:
-        for e in common_entries:
-            print(e["key"])
-        return 0
+    return common_entries
 
+
+def format_mismatch(mismatch: tuple[int, str, str, str]) -> str:
+    t, sig1, sig2, name = mismatch
+    return f"{t}  {binary_string_to_hex(sig1)}  {binary_string_to_hex(sig2)}  {name}"
+
+
+def diff_files(
+        path1: Path, path2: Path, args: argparse.Namespace
+) -> tuple[int, list[tuple[int, str, str, str]]]:
+    """(exit code, earliest mismatches) of one comparison: 0 match, 1
+    mismatch, 2 no common signals."""
+    cached1: Optional[VCDCache] = None
+    root = None if args.stream else cache_root(args)
+    if root is not None:
+        cached1 = load_vcd_cache(path1, root)
+    hdr1 = cached1.header if cached1 is not None else parse_vcd_header(path1)
+    hdr2 = parse_vcd_header(path2)
+    infoln(args.verbose, f"{len(hdr1.signals)} signals in first file")
+    infoln(args.verbose, f"{len(hdr2.signals)} signals in second file")
+
+    common_entries = common_signal_entries(hdr1, hdr2, args)
     if not common_entries:
-        sys.stderr.write("no common signals between input files\n")
-        return 2
+        return 2, []
 
-    need1: set[str] = set()
-    need2: set[str] = set()
-    for e in common_entries:
-        if e["kind"] == "direct":
-            need1.add(e["sig1"])
-            need2.add(e["sig2"])
-            continue
-        if e["which_range"] == "file1":
-            need1.add(e["range_sig"])
-            need2.update(e["bit_sigs"].values())
-        else:
-            need1.update(e["bit_sigs"].values())
-            need2.add(e["range_sig"])
+    indexes: list[Optional[dict[str, Any]]] = [None, None]
+    for i, path in enumerate((path1, path2)):
+        if args.after is None and args.before is None and not args.index:
+            break
+        index = load_index(path)
+        if index is None and args.index:
+            infoln(args.verbose, f"Indexing {path}")
+            index = build_index(path)
+        indexes[i] = index
+
+    if args.stream:
+        infoln(args.verbose, "Streaming both files")
+        starts = tuple(index_start(index, args.after) for index in indexes)
+        earliest = stream_compare(
+            path1, hdr1, path2, hdr2, common_entries, args.after, args.before,
+            starts)
+    else:
+        earliest = compare_parsed(
+            path1,
+            hdr1,
+            path2,
+            hdr2,
+            common_entries,
+            args.after,
+            args.before,
+            args.verbose,
+            tuple(indexes),
+            cached1,
+            args.backend,
+        )
+    return (1 if earliest else 0), earliest
 
-    infoln(args.verbose, "Reading first file")
-    vcd1 = parse_vcd_values(path1, hdr1, need1)
-    infoln(args.verbose, "Reading second file")
-    vcd2 = parse_vcd_values(path2, hdr2, need2)
 
-    earliest: list[tuple[int, str, str, str]] = []
-    for entry in common_entries:
-        key = entry["key"]
-        infoln(args.verbose, f"Comparing {key}")
+BATCH_VCD = "wave.vcd"
+BATCH_STATUS = {0: "pass", 1: "mismatch", 2: "no-common"}
 
-        mismatch: Optional[tuple[int, str, str, str]]
-        if entry["kind"] == "direct":
-            s1 = vcd1.signals[entry["sig1"]]
-            s2 = vcd2.signals[entry["sig2"]]
-            mismatch = compare_at_times(key, s1, s1.size, s2, s2.size, args.after, args.before)
+
+def _batch_one(test: str, gold: Path, actual: Path,
+               args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        rc, earliest = diff_files(gold, actual, args)
+    except (OSError, RuntimeError, ValueError) as exc:
+        return {
+            "test": test,
+            "status": "error",
+            "time": None,
+            "mismatches": [str(exc)]
+        }
+    return {
+        "test": test,
+        "status": BATCH_STATUS[rc],
+        "time": earliest[0][0] if earliest else None,
+        "mismatches": [format_mismatch(m) for m in earliest],
+    }
+
+
+def run_batch(
+        gold_root: Path, actual_root: Path, args: argparse.Namespace) -> int:
+    """Compares every `<stem>/wave.vcd` of two roots, largest pairs first on a
+    process pool; prints one line per test and optionally writes --summary."""
+    for root in (gold_root, actual_root):
+        if not root.is_dir():
+            sys.stderr.write(f"not a directory: {root}\n")
+            return 2
+
+    gold = {
+        p.parent.name: p
+        for p in gold_root.glob(f"*/{BATCH_VCD}")
+        if p.is_file()
+    }
+    actual = {
+        p.parent.name: p
+        for p in actual_root.glob(f"*/{BATCH_VCD}")
+        if p.is_file()
+    }
+    results: dict[str, dict[str, Any]] = {}
+    for test in gold.keys() - actual.keys():
+        results[test] = {
+            "test": test,
+            "status": "missing-actual",
+            "time": None,
+            "mismatches": []
+        }
+    for test in actual.keys() - gold.keys():
+        results[test] = {
+            "test": test,
+            "status": "missing-gold",
+            "time": None,
+            "mismatches": []
+        }
+
+    jobs = sorted(
+        gold.keys() & actual.keys(),
+        key=lambda test: gold[test].stat().st_size + actual[test].stat().
+        st_size,
+        reverse=True,
+    )
+    infoln(args.verbose, f"{len(jobs)} VCD pairs, {len(results)} unpaired")
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [
+            pool.submit(_batch_one, test, gold[test], actual[test], args)
+            for test in jobs
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["test"]] = result
+            infoln(args.verbose, f"[{result['status']}] {result['test']}")
+
+    counts: dict[str, int] = {}
+    for test in sorted(results):
+        result = results[test]
+        result["gold"] = str(gold[test]) if test in gold else None
+        result["actual"] = str(actual[test]) if test in actual else None
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        print(f"[{result['status']}] {test}")
+        for line in result["mismatches"]:
+            print(f"  {line}")
+    print(
+        "[summary] total=" + str(len(results)) +
+        "".join(f" {k}={v}" for k, v in sorted(counts.items())))
+
+    if args.summary:
+        ordered = [results[test] for test in sorted(results)]
+        summary = Path(args.summary)
+        if summary.suffix.lower() == ".csv":
+            with summary.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["test", "status", "time", "mismatches", "gold", "actual"])
+                for r in ordered:
+                    time = "" if r["time"] is None else r["time"]
+                    writer.writerow(
+                        [
+                            r["test"], r["status"], time,
+                            "; ".join(r["mismatches"]), r["gold"] or "",
+                            r["actual"] or ""
+                        ])
         else:
-            msb = int(entry["msb"])
-            lsb = int(entry["lsb"])
-            width = abs(msb - lsb) + 1
-            if entry["which_range"] == "file1":
-                s1 = vcd1.signals[entry["range_sig"]]
-                bits = {idx: vcd2.signals[name] for idx, name in entry["bit_sigs"].items()}
-                s2 = BusSignal(bits, msb, lsb)
-            else:
-                bits = {idx: vcd1.signals[name] for idx, name in entry["bit_sigs"].items()}
-                s1 = BusSignal(bits, msb, lsb)
-                s2 = vcd2.signals[entry["range_sig"]]
-            mismatch = compare_at_times(key, s1, getattr(s1, "size", width), s2, getattr(s2, "size", width), args.after, args.before)
+            payload = {
+                "gold_root": str(gold_root),
+                "actual_root": str(actual_root),
+                "counts": counts,
+                "tests": ordered,
+            }
+            summary.write_text(
+                json.dumps(payload, indent=2) + "\n", encoding="utf-8")
 
-        if mismatch is None:
-            continue
-        t, v1, v2, name = mismatch
-        if earliest and t < earliest[0][0]:
-            earliest = []
-        if not earliest or t == earliest[0][0]:
-            earliest.append((t, v1, v2, name))
+    failed = {"mismatch", "missing-actual", "missing-gold", "error"}
+    return 1 if any(r["status"] in failed for r in results.values()) else 0
 
-    for t, sig1, sig2, name in earliest:
-        print(f"{t}  {binary_string_to_hex(sig1)}  {binary_string_to_hex(sig2)}  {name}")
-    return 1 if earliest else 0
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Print the first difference between two VCD files")
+    parser.add_argument(
+        "file1",
+        metavar="VCD1",
+        help="first file to compare (GOLD_ROOT with --batch)")
+    parser.add_argument(
+        "file2",
+        metavar="VCD2",
+        help="second file to compare (ACTUAL_ROOT with --batch)")
+    parser.add_argument(
+        "--top1", metavar="INSTPATH", help="instance in first file to compare")
+    parser.add_argument(
+        "--top2",
+        metavar="INSTPATH",
+        help="instance in second file to compare")
+    parser.add_argument(
+        "-f",
+        "--filter",
+        metavar="REGEX",
+        action="append",
+        default=[],
+        help="only compare signals matching a regex",
+    )
+    parser.add_argument(
+        "-i",
+        "--ignore",
+        metavar="REGEX",
+        action="append",
+        default=[],
+        help="ignore signals matching a regex",
+    )
+    parser.add_argument(
+        "-l", "--list", action="store_true", help="list signals and exit")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="verbose output")
+    parser.add_argument(
+        "-a", "--after", type=int, help="only compare after time")
+    parser.add_argument(
+        "-b", "--before", type=int, help="only compare before time")
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help=
+        "read both files side by side in time order (memory bounded by the signal count)",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help=
+        "build or refresh the .idx sidecars of both files (used for --after/--before whenever current)",
+    )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="keep the parsed first (gold) file in DIR, keyed by its content "
+        "(default: $VCD_DIFF_CACHE_ROOT; off when neither is given)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always parse the first file from text")
+    parser.add_argument(
+        "--backend",
+        choices=("auto", "python", "numpy"),
+        default="auto",
+        help=
+        "timeline comparison backend (auto: numpy where it is faster, when installed)",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=
+        f"compare every <stem>/{BATCH_VCD} under GOLD_ROOT with the one under ACTUAL_ROOT",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="worker processes for --batch (default: CPU count)")
+    parser.add_argument(
+        "--summary",
+        metavar="PATH",
+        help="write the --batch results as JSON (or CSV for *.csv)")
+    args = parser.parse_args(argv)
+
+    path1 = Path(args.file1)
+    path2 = Path(args.file2)
+
+    if args.backend == "numpy" and np is None:
+        parser.error("--backend numpy needs NumPy installed")
+    if args.batch:
+        if args.list:
+            parser.error("--list does not apply to --batch")
+        return run_batch(path1, path2, args)
+    if args.summary:
+        parser.error("--summary needs --batch")
+
+    if args.list:
+        hdr1 = parse_vcd_header(path1)
+        hdr2 = parse_vcd_header(path2)
+        for e in common_signal_entries(hdr1, hdr2, args):
+            print(e["key"])
+        return 0
+
+    rc, earliest = diff_files(path1, path2, args)
+    if rc == 2:
+        sys.stderr.write("no common signals between input files\n")
+    for mismatch in earliest:
+        print(format_mismatch(mismatch))
+    return rc
 
 
 if __name__ == "__main__":
     raise SystemExit(main(sys.argv[1:]))
-
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# SPDX-License-Identifier: ISC
+"""Extract arcilator input stimulus from a gold VCD.
+
+Writes the binary stimulus replayed by the autogenerated arcilator driver
+(`ARCILATOR_STIMULUS=<file>` or `:runner_arcilator_stimulus:`):
+
+    "ARCSTIM1"  u32 port count  u32 frame bytes  u64 frame count
+    per port:   u32 numBits  u32 name length  name
+    zero padding to a multiple of 8 bytes
+    frames:     each port's value, little-endian, ceil(numBits / 8) bytes
+
+Frame i holds the input values at VCD time `start + i * dt`. The driver
+drives frame 0 before time 0 settles and frame t + 1 in step t, so with `dt`
+equal to the driver's `ARCILATOR_VCD_DT` the replayed inputs line up with
+the gold waveform. X/Z bits are replayed as 0.
+"""
+
+from __future__ import annotations
+
+import argparse
+import struct
+import sys
+from pathlib import Path
+from typing import Optional
+
+from arcilator_state import load_models, select_model
+from vcd_diff import RANGE_RE, infoln, parse_vcd_header, parse_vcd_values
+
+MAGIC = b"ARCSTIM1"
+
+
+def load_inputs(
+        state_json: Path,
+        model_name: Optional[str]) -> tuple[str, list[tuple[str, int]]]:
+    tables = load_models(state_json)
+    if not tables:
+        raise RuntimeError(f"empty state.json: {state_json}")
+    if model_name and model_name not in (t.name for t in tables):
+        raise RuntimeError(f"model `{model_name}` not found in {state_json}")
+    model = select_model(tables, model_name or "")
+    inputs = []
+    for st in model.of_type("input"):
+        name = st.get("name")
+        bits = int(st.get("numBits", 0))
+        if name and bits > 0:
+            inputs.append((name, bits))
+    return model.name, inputs
+
+
+def match_signal(
+        port: str, signals: list[str], top: Optional[str],
+        model_name: str) -> Optional[str]:
+    """Finds the VCD signal for input `port` (`a/b` matches `a.b`)."""
+    ref = port.replace("/", ".")
+
+    def base(sig: str) -> str:
+        m = RANGE_RE.match(sig)
+        return m.group(1) if m else sig
+
+    if top is not None:
+        want = f"{top}.{ref}" if top else ref
+        for sig in signals:
+            if base(sig) == want:
+                return sig
+        return None
+
+    # No scope given: prefer a match directly under a scope named like the
+    # model, then the shallowest one, then header order.
+    best: Optional[tuple[int, int, int]] = None
+    best_sig: Optional[str] = None
+    for idx, sig in enumerate(signals):
+        b = base(sig)
+        if b != ref and not b.endswith("." + ref):
+            continue
+        scope = b[:len(b) - len(ref)].rstrip(".")
+        rank = (
+            0 if scope.split(".")[-1] == model_name else 1, b.count("."), idx)
+        if best is None or rank < best:
+            best, best_sig = rank, sig
+    return best_sig
+
+
+def value_to_int(value: Optional[str], bits: int) -> int:
+    if not value:
+        return 0
+    v = value.translate(str.maketrans("xXzZ", "0000"))
+    try:
+        return int(v, 2) & ((1 << bits) - 1)
+    except ValueError:
+        return 0
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(
+        description="Convert a gold VCD into arcilator driver stimulus")
+    parser.add_argument(
+        "state_json",
+        metavar="STATE_JSON",
+        help="arcilator state.json of the model to drive")
+    parser.add_argument(
+        "vcd", metavar="VCD", help="gold VCD to take the input values from")
+    parser.add_argument(
+        "-o", "--output", required=True, help="stimulus file to write")
+    parser.add_argument(
+        "--model", help="model in state.json (default: the first one)")
+    parser.add_argument(
+        "--top",
+        metavar="INSTPATH",
+        help="VCD scope holding the input ports (default: search)")
+    parser.add_argument(
+        "--dt",
+        type=int,
+        default=10,
+        help="VCD time units per driver step (ARCILATOR_VCD_DT)")
+    parser.add_argument(
+        "--start", type=int, default=0, help="VCD time of frame 0")
+    parser.add_argument(
+        "--frames",
+        type=int,
+        help="number of frames (default: up to the end of the VCD)")
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="verbose output")
+    args = parser.parse_args(argv)
+
+    if args.dt <= 0:
+        parser.error("--dt must be positive")
+
+    model_name, inputs = load_inputs(Path(args.state_json), args.model)
+    vcd_path = Path(args.vcd)
+    hdr = parse_vcd_header(vcd_path)
+
+    ports: list[tuple[str, int, str]] = []
+    for name, bits in inputs:
+        sig = match_signal(name, hdr.signals, args.top, model_name)
+        if sig is None:
+            sys.stderr.write(
+                f"warning: no VCD signal for input `{name}`, left to the model\n"
+            )
+            continue
+        infoln(args.verbose, f"{name} <- {sig}")
+        ports.append((name, bits, sig))
+    if not ports:
+        sys.stderr.write("no input ports found in the VCD\n")
+        return 2
+
+    vcd = parse_vcd_values(vcd_path, hdr, {sig for _, _, sig in ports})
+    nframes = args.frames
+    if nframes is None:
+        nframes = max(vcd.endtime - args.start, 0) // args.dt + 1
+
+    # Walk all ports forward through their changes once, frame by frame.
+    tvs = [vcd.signals[sig].tv for _, _, sig in ports]
+    nbytes = [(bits + 7) // 8 for _, bits, _ in ports]
+    pos = [0] * len(ports)
+    cur = [0] * len(ports)
+    frame = b""
+    out = bytearray()
+    for i in range(nframes):
+        t = args.start + i * args.dt
+        changed = not frame
+        for k, tv in enumerate(tvs):
+            p = pos[k]
+            while p < len(tv) and tv[p][0] <= t:
+                p += 1
+            if p != pos[k]:
+                pos[k] = p
+                v = value_to_int(tv[p - 1][1], ports[k][1])
+                if v != cur[k]:
+                    cur[k] = v
+                    changed = True
+        if changed:
+            frame = b"".join(
+                v.to_bytes(n, "little") for v, n in zip(cur, nbytes))
+        out += frame
+
+    header = bytearray(
+        struct.pack("<8sIIQ", MAGIC, len(ports), sum(nbytes), nframes))
+    for name, bits, _ in ports:
+        raw = name.encode("utf-8")
+        header += struct.pack("<II", bits, len(raw)) + raw
+    header += b"\0" * (-len(header) % 8)
+
+    Path(args.output).write_bytes(bytes(header) + bytes(out))
+    infoln(
+        args.verbose,
+        f"wrote {nframes} frames x {sum(nbytes)} bytes to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))